@@ -0,0 +1,106 @@
+"""
+Dupefilter that recognises OLX ad pages by ad ID and remembers them between runs.
+
+Requests for ad pages are deduplicated by the ad ID from the URL, so the same
+ad reached through another slug, language prefix or query string is requested
+once. IDs of ads committed to PostgreSQL (the ads_stored signal of
+PostgresPipeline) are appended to AD_DUPEFILTER_FILE and loaded into a set on
+the next run: ads scraped by previous cron runs are filtered in O(1) without
+querying PostgreSQL. Ads that were requested but not stored (errors, blocks,
+failed or unflushed writes) are not persisted and are retried by the next run.
+
+Other requests (list pages) fall back to the default fingerprint filter.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from scrapy import Request
+from scrapy.dupefilters import RFPDupeFilter
+
+from .signals import ads_stored
+from .utils.canonical import ad_id_from_url
+
+AD_DUPEFILTER_FILE = "seen_ads.txt"
+
+
+class AdIdDupeFilter(RFPDupeFilter):
+    """
+    Stats: dupefilter/ad_ids_loaded, ad_ids_saved, filtered_seen_before,
+    filtered_this_run.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        debug: bool = False,
+        *,
+        fingerprinter=None,
+        ads_file: Optional[str] = AD_DUPEFILTER_FILE,
+        stats=None,
+    ):
+        super().__init__(path, debug, fingerprinter=fingerprinter)
+        self.stats = stats
+        # Ads scraped by this or previous runs (persisted)
+        self.scraped_ids: set[str] = set()
+        # Ads requested during this run
+        self.requested_ids: set[str] = set()
+        self.ads_file = None
+        if ads_file:
+            self.ads_file = Path(ads_file).open("a+", encoding="utf-8")
+            self.ads_file.seek(0)
+            self.scraped_ids.update(line.rstrip() for line in self.ads_file)
+            self.scraped_ids.discard("")
+        self._set("dupefilter/ad_ids_loaded", len(self.scraped_ids))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        dupefilter = cls(
+            # JOBDIR keeps the fingerprints of the other requests, as in RFPDupeFilter
+            crawler.settings.get("JOBDIR"),
+            crawler.settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=crawler.request_fingerprinter,
+            ads_file=crawler.settings.get("AD_DUPEFILTER_FILE", AD_DUPEFILTER_FILE),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(dupefilter.ads_stored, signal=ads_stored)
+        return dupefilter
+
+    def request_seen(self, request: Request) -> bool:
+        ad_id = ad_id_from_url(request.url)
+        if not ad_id:
+            return super().request_seen(request)
+        if ad_id in self.scraped_ids:
+            self._inc("dupefilter/filtered_seen_before")
+            return True
+        if ad_id in self.requested_ids:
+            self._inc("dupefilter/filtered_this_run")
+            return True
+        self.requested_ids.add(ad_id)
+        return False
+
+    def ads_stored(self, urls, spider) -> None:
+        """Persist IDs of ads whose rows were committed."""
+        for url in urls:
+            ad_id = ad_id_from_url(url or "")
+            if not ad_id or ad_id in self.scraped_ids:
+                continue
+            self.scraped_ids.add(ad_id)
+            if self.ads_file:
+                self.ads_file.write(ad_id + "\n")
+            self._inc("dupefilter/ad_ids_saved")
+        if self.ads_file:
+            self.ads_file.flush()
+
+    def close(self, reason: str) -> None:
+        super().close(reason)
+        if self.ads_file:
+            self.ads_file.close()
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
+
+    def _set(self, key: str, value) -> None:
+        if self.stats is not None:
+            self.stats.set_value(key, value)
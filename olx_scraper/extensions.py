@@ -0,0 +1,68 @@
+# Define here your Scrapy extensions
+#
+# Don't forget to enable them in the EXTENSIONS setting
+# See: https://docs.scrapy.org/en/latest/topics/extensions.html
+
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how long the reactor (asyncio loop) is stalled by blocking code.
+
+    A periodic call is scheduled every `LOOP_LAG_INTERVAL` seconds; the delay
+    between the planned and the actual run time is the loop lag. Compare the
+    `loop_lag/*` stats of two runs (e.g. PostgresPipeline vs
+    AsyncPostgresPipeline) to see how much blocking I/O costs the browser work.
+    """
+
+    def __init__(self, stats, interval: float, stall_threshold: float):
+        self.stats = stats
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.loop = None
+        self.expected_at = 0.0
+        self.samples = 0
+        self.total_lag = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("LOOP_LAG_MONITOR_ENABLED"):
+            raise NotConfigured
+        ext = cls(
+            crawler.stats,
+            interval=crawler.settings.getfloat("LOOP_LAG_INTERVAL", 0.05),
+            stall_threshold=crawler.settings.getfloat("LOOP_LAG_STALL_THRESHOLD", 0.1),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.expected_at = time.monotonic() + self.interval
+        self.loop = task.LoopingCall(self.tick, spider)
+        self.loop.start(self.interval, now=False)
+
+    def tick(self, spider):
+        now = time.monotonic()
+        lag = max(0.0, now - self.expected_at)
+        self.expected_at = now + self.interval
+        self.samples += 1
+        self.total_lag += lag
+        self.stats.max_value("loop_lag/max", round(lag, 4), spider=spider)
+        if lag >= self.stall_threshold:
+            self.stats.inc_value("loop_lag/stalls", spider=spider)
+            self.stats.inc_value("loop_lag/stalled_time", round(lag, 4), spider=spider)
+
+    def spider_closed(self, spider):
+        if self.loop and self.loop.running:
+            self.loop.stop()
+        if self.samples:
+            self.stats.set_value(
+                "loop_lag/avg", round(self.total_lag / self.samples, 4), spider=spider
+            )
+            self.stats.set_value("loop_lag/samples", self.samples, spider=spider)
@@ -25,3 +25,36 @@ class OlxScraperItem(scrapy.Item):
     description = scrapy.Field()
     ad_tags = scrapy.Field()
     img_src_list = scrapy.Field()
+    # Typed values filled in by NormalizationPipeline
+    price_amount = scrapy.Field()
+    price_currency = scrapy.Field()
+    view_count = scrapy.Field()
+    pub_date = scrapy.Field()
+    user_last_seen_at = scrapy.Field()
+    # Fingerprint of the list card, stored in ad_state for change detection
+    card_fingerprint = scrapy.Field()
+    # Phone left to the phone phase (PHONE_REVEAL_MODE = "deferred")
+    phone_pending = scrapy.Field()
+
+
+class AdRefreshItem(scrapy.Item):
+    """Fresh price, views and liveness of an ad already in the ads table"""
+
+    ad_id = scrapy.Field()
+    price = scrapy.Field()
+    price_amount = scrapy.Field()
+    price_currency = scrapy.Field()
+    ad_view_counter = scrapy.Field()
+    view_count = scrapy.Field()
+    is_active = scrapy.Field()
+
+
+class PhoneItem(scrapy.Item):
+    """Result of the phone phase for an ad of the phone_pending queue"""
+
+    ad_id = scrapy.Field()
+    # Revealed phone, "N/A" when the ad has none, None when the reveal failed
+    phone_number = scrapy.Field()
+    error = scrapy.Field()
+    # False when the ad page is gone: the ad is deactivated and leaves the queue
+    is_active = scrapy.Field()
@@ -4,10 +4,233 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
+import time
+
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
 import psycopg2
+from psycopg2.extras import execute_values
+from twisted.enterprise import adbapi
+from twisted.internet import defer, task
+
+from .signals import ads_stored
+from .utils.canonical import ad_key, canonical_ad_url
+from .utils.change_detection import DEFERRED_PHONE_HASHED_FIELDS, content_hash
+from .utils.placeholders import PLACEHOLDERS, sql_literal
+from .utils.known_ads import KnownAdIndex
+from .utils.normalize import date_to_datetime, parse_count, parse_price
+from .utils.observations import (
+    INSERT_OBSERVATIONS_SQL,
+    apply_retention,
+    prepare_observations,
+)
+from .utils.parse_date import parse_date
+from .utils.phone_queue import (
+    DEACTIVATE_ADS_SQL,
+    DELETE_PENDING_SQL,
+    ENQUEUE_PHONES_SQL,
+    RESCHEDULE_PENDING_SQL,
+    RESCHEDULE_ROW_TEMPLATE,
+    UPDATE_PHONES_SQL,
+    prepare_phone_queue,
+)
+
+# Rows fetched per round-trip while streaming known ads from the server-side cursor
+KNOWN_ADS_FETCH_SIZE = 10_000
+
+ADS_COLUMNS = (
+    "ad_id",
+    "title",
+    "price",
+    "user_name",
+    "phone_number",
+    "user_score",
+    "user_registration",
+    "user_last_seen",
+    "ad_view_counter",
+    "location",
+    "ad_pub_date",
+    "url",
+    "description",
+    "ad_tags",
+    "img_src_list",
+    "price_amount",
+    "price_currency",
+    "view_count",
+    "pub_date",
+    "user_last_seen_at",
+    "content_hash",
+)
+URL_COLUMN_INDEX = ADS_COLUMNS.index("url")
+# Fields that were not extracted are written as their placeholder (shared with
+# the spider, utils.placeholders). When a changed ad is updated they keep the
+# stored value, so a partial re-fetch (e.g. a failed, rate-limited phone reveal)
+# does not erase data found before. NULL keeps it too: a pending phone
+# (PHONE_REVEAL_MODE = "deferred") is stored as NULL.
+# Typed columns parsed from a text column keep their value together with it
+TYPED_SOURCES = {
+    "price_amount": "price",
+    "price_currency": "price",
+    "view_count": "ad_view_counter",
+    "pub_date": "ad_pub_date",
+    "user_last_seen_at": "user_last_seen",
+}
+# ad_observations columns taken from a buffered row
+OBSERVATION_COLUMN_INDEXES = tuple(
+    ADS_COLUMNS.index(column)
+    for column in ("ad_id", "price_amount", "price_currency", "view_count")
+)
+HASH_COLUMN_INDEX = ADS_COLUMNS.index("content_hash")
+# Buffered rows are the ads columns followed by the card fingerprint (ad_state)
+# and whether the phone is left to the phone phase (phone_pending)
+FINGERPRINT_INDEX = len(ADS_COLUMNS)
+PHONE_PENDING_INDEX = FINGERPRINT_INDEX + 1
+
+CREATE_ADS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ads (
+    ad_id VARCHAR(255) PRIMARY KEY,
+    title TEXT,
+    price TEXT,
+    user_name TEXT,
+    phone_number TEXT,
+    user_score TEXT,
+    user_registration TEXT,
+    user_last_seen TEXT,
+    ad_view_counter TEXT,
+    location TEXT,
+    ad_pub_date TEXT,
+    url TEXT,
+    description TEXT,
+    ad_tags TEXT[],
+    img_src_list TEXT[],
+    price_amount NUMERIC(14, 2),
+    price_currency CHAR(3),
+    view_count INTEGER,
+    pub_date DATE,
+    user_last_seen_at TIMESTAMPTZ,
+    content_hash TEXT,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    removed_at TIMESTAMPTZ
+)
+"""
+
+# Migration of tables created by older versions: typed columns filled in by
+# NormalizationPipeline (old rows: python -m olx_scraper.utils.migrate_ads)
+# and indexes for analytics queries. Every statement is idempotent.
+MIGRATE_ADS_SQL = (
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS content_hash TEXT",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS price_amount NUMERIC(14, 2)",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS price_currency CHAR(3)",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS view_count INTEGER",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS pub_date DATE",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS user_last_seen_at TIMESTAMPTZ",
+    "CREATE INDEX IF NOT EXISTS ads_price_amount_idx ON ads (price_amount)",
+    "CREATE INDEX IF NOT EXISTS ads_pub_date_idx ON ads (pub_date)",
+    # text_pattern_ops serves both "= 'Київ'" and prefix "LIKE 'Київ%'"
+    "CREATE INDEX IF NOT EXISTS ads_location_idx ON ads (location text_pattern_ops)",
+    # Liveness, maintained by the refresh spider
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE",
+    "ALTER TABLE ads ADD COLUMN IF NOT EXISTS removed_at TIMESTAMPTZ",
+)
+
+# Refresh bookkeeping of the refresh spider, kept out of the wide ads row.
+# No index on last_checked_at and a low fillfactor keep its updates HOT.
+CREATE_AD_REFRESH_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ad_refresh (
+    ad_id VARCHAR(255) PRIMARY KEY,
+    last_checked_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0
+) WITH (fillfactor = 70)
+"""
+
+# Refreshed ads: only rows whose price, views or liveness changed are written.
+# Missing values (None) keep what is stored.
+UPDATE_REFRESHED_ADS_SQL = """
+UPDATE ads SET
+    price = COALESCE(v.price, ads.price),
+    price_amount = COALESCE(v.price_amount, ads.price_amount),
+    price_currency = COALESCE(v.price_currency, ads.price_currency),
+    ad_view_counter = COALESCE(v.ad_view_counter, ads.ad_view_counter),
+    view_count = COALESCE(v.view_count, ads.view_count),
+    is_active = v.is_active,
+    removed_at = CASE WHEN v.is_active THEN NULL
+        ELSE COALESCE(ads.removed_at, now()) END
+FROM (VALUES %s) AS v (
+    ad_id, price, price_amount, price_currency, ad_view_counter, view_count, is_active
+)
+WHERE ads.ad_id = v.ad_id AND (
+    ads.price_amount IS DISTINCT FROM COALESCE(v.price_amount, ads.price_amount)
+    OR ads.view_count IS DISTINCT FROM COALESCE(v.view_count, ads.view_count)
+    OR ads.is_active IS DISTINCT FROM v.is_active
+)
+RETURNING ads.ad_id
+"""
+# Casts give NULL-only columns of VALUES the type of the target column
+REFRESH_ROW_TEMPLATE = "(%s, %s, %s::numeric, %s, %s, %s::integer, %s::boolean)"
+
+UPSERT_AD_REFRESH_SQL = """
+INSERT INTO ad_refresh (ad_id, last_checked_at, checks, changes)
+VALUES %s
+ON CONFLICT (ad_id) DO UPDATE SET
+    last_checked_at = EXCLUDED.last_checked_at,
+    checks = ad_refresh.checks + 1,
+    changes = ad_refresh.changes + EXCLUDED.changes
+"""
+AD_REFRESH_ROW_TEMPLATE = "(%s, now(), 1, %s)"
+
+CREATE_AD_STATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ad_state (
+    ad_key TEXT PRIMARY KEY,
+    card_fingerprint BIGINT,
+    content_hash TEXT,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+def update_assignment(column: str) -> str:
+    """
+    SET clause of a column in the ads upsert: a placeholder (or a typed value
+    parsed from one) keeps the stored value.
+    """
+    if column in PLACEHOLDERS:
+        return (
+            f"{column} = COALESCE(NULLIF("
+            f"EXCLUDED.{column}, {sql_literal(PLACEHOLDERS[column])}), ads.{column})"
+        )
+    if column in TYPED_SOURCES:
+        source = TYPED_SOURCES[column]
+        return (
+            f"{column} = CASE WHEN EXCLUDED.{source} = "
+            f"{sql_literal(PLACEHOLDERS[source])}"
+            f" THEN ads.{column} ELSE EXCLUDED.{column} END"
+        )
+    return f"{column} = EXCLUDED.{column}"
+
+
+SET_SEPARATOR = ",\n    "
+
+INSERT_ADS_SQL = f"""
+INSERT INTO ads ({", ".join(ADS_COLUMNS)})
+VALUES %s
+ON CONFLICT (ad_id) DO UPDATE SET
+    {SET_SEPARATOR.join(update_assignment(column) for column in ADS_COLUMNS[1:])}
+WHERE ads.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+"""
+
+# Unchanged ads match the WHERE clause of neither statement: no row is written
+UPSERT_AD_STATE_SQL = """
+INSERT INTO ad_state (ad_key, card_fingerprint, content_hash)
+VALUES %s
+ON CONFLICT (ad_key) DO UPDATE SET
+    card_fingerprint = EXCLUDED.card_fingerprint,
+    content_hash = EXCLUDED.content_hash,
+    changed_at = now()
+WHERE ad_state.card_fingerprint IS DISTINCT FROM EXCLUDED.card_fingerprint
+    OR ad_state.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+"""
 
 
 class OlxScraperPipeline:
@@ -15,14 +238,76 @@ class OlxScraperPipeline:
         return item
 
 
+class NormalizationPipeline:
+    """
+    Fill the typed fields from the scraped text before the item is stored:
+    price amount and currency, view count, publication date and last seen time.
+
+    The text fields are kept as they are.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(stats=crawler.stats)
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        amount, currency = parse_price(adapter.get("price"))
+        adapter["price_amount"] = amount
+        adapter["price_currency"] = currency
+        adapter["view_count"] = parse_count(adapter.get("ad_view_counter"))
+        adapter["pub_date"] = parse_date(adapter.get("ad_pub_date"))
+        if not adapter.get("user_last_seen_at"):
+            adapter["user_last_seen_at"] = date_to_datetime(
+                parse_date(adapter.get("user_last_seen"))
+            )
+        if self.stats:
+            for field in ("price_amount", "view_count", "pub_date"):
+                if adapter[field] is None:
+                    self.stats.inc_value(f"normalize/missing/{field}", spider=spider)
+        return item
+
+
 class PostgresPipeline:
-    def __init__(self, postgres_uri, postgres_db, postgres_user, postgres_password):
+    def __init__(
+        self,
+        postgres_uri,
+        postgres_db,
+        postgres_user,
+        postgres_password,
+        batch_size=1,
+        flush_interval=10.0,
+        stats=None,
+        observations=True,
+        retention_months=12,
+        drop_detached=False,
+        signals=None,
+    ):
         self.postgres_uri = postgres_uri
         self.postgres_db = postgres_db
         self.postgres_user = postgres_user
         self.postgres_password = postgres_password
         self.conn = None
-        self.cursor = None
+        self.known_ads = KnownAdIndex()
+        # Card fingerprints of known ads by ad key (ad_state table)
+        self.card_fingerprints: dict[str, int] = {}
+        # Items are buffered and written in batches
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.buffer: list[tuple] = []
+        self.buffer_started_at = 0.0
+        self.flush_loop = None
+        self.flush_time_total = 0.0
+        self.stats = stats
+        # Price/views history (ad_observations) and its retention
+        self.observations = observations
+        self.retention_months = retention_months
+        self.drop_detached = drop_detached
+        # Committed rows are announced with the ads_stored signal
+        self.signals = signals
 
     @classmethod
     def from_crawler(cls, crawler):
@@ -31,6 +316,15 @@ class PostgresPipeline:
             postgres_db=crawler.settings.get("POSTGRES_DB"),
             postgres_user=crawler.settings.get("POSTGRES_USER"),
             postgres_password=crawler.settings.get("POSTGRES_PASSWORD"),
+            batch_size=crawler.settings.getint("POSTGRES_BATCH_SIZE", 1),
+            flush_interval=crawler.settings.getfloat("POSTGRES_FLUSH_INTERVAL", 10.0),
+            stats=crawler.stats,
+            observations=crawler.settings.getbool("OBSERVATIONS_ENABLED", True),
+            retention_months=crawler.settings.getint(
+                "OBSERVATIONS_RETENTION_MONTHS", 12
+            ),
+            drop_detached=crawler.settings.getbool("OBSERVATIONS_DROP_DETACHED"),
+            signals=crawler.signals,
         )
 
     def open_spider(self, spider):
@@ -42,50 +336,91 @@ class PostgresPipeline:
                 user=self.postgres_user,
                 password=self.postgres_password,
             )
-            self.cursor = self.conn.cursor()
-            # Create table if it doesn't exist
-            self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ads (
-                ad_id VARCHAR(255) PRIMARY KEY,
-                title TEXT,
-                price TEXT,
-                user_name TEXT,
-                phone_number TEXT,
-                user_score TEXT,
-                user_registration TEXT,
-                user_last_seen TEXT,
-                ad_view_counter TEXT,
-                location TEXT,
-                ad_pub_date TEXT,
-                url TEXT,
-                description TEXT,
-                ad_tags TEXT[],
-                img_src_list TEXT[]
-            )
-            """)
-            self.conn.commit()
+            self.prepare_database(self.conn)
+            self.prepare_history(self.conn, spider)
             spider.logger.info("✅ Table checked or created.")
+            self.known_ads = self.fetch_known_ads(self.conn)
+            self.card_fingerprints = self.fetch_card_fingerprints(self.conn)
+            spider.logger.info(f"📚 Loaded {len(self.known_ads)} known ads.")
         except psycopg2.Error as e:
             spider.logger.error(f"❌ Error connecting to PostgreSQL: {e}")
             raise
+        self.start_flush_loop(spider)
 
     def close_spider(self, spider):
+        self.stop_flush_loop()
+        try:
+            self.flush(spider)
+        except Exception as e:
+            spider.logger.error(f"❌ Final flush failed: {e}")
         try:
             spider.logger.info("Closing PostgreSQL pipeline.")
-            if self.cursor:
-                self.cursor.close()
             if self.conn:
                 self.conn.close()
                 spider.logger.info("✅ Connection successfully closed.")
         except psycopg2.Error as e:
             spider.logger.error(f"❌ Error closing PostgreSQL connection: {e}")
 
-    def get_existing_urls(self):
+    def start_flush_loop(self, spider):
+        """Flush by age too, so a slow crawl does not keep items in memory."""
+        if self.batch_size > 1:
+            self.flush_loop = task.LoopingCall(self.flush_if_stale, spider)
+            self.flush_loop.start(self.flush_interval, now=False)
+
+    def stop_flush_loop(self):
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+
+    @staticmethod
+    def prepare_database(conn):
+        """Create tables if they don't exist."""
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_ADS_TABLE_SQL)
+            for statement in MIGRATE_ADS_SQL:
+                cursor.execute(statement)
+            cursor.execute(CREATE_AD_STATE_TABLE_SQL)
+            cursor.execute(CREATE_AD_REFRESH_TABLE_SQL)
+        conn.commit()
+        prepare_phone_queue(conn)
+
+    def prepare_history(self, conn, spider):
+        """Partitions of ad_observations for this month and the next; retention."""
+        if not self.observations:
+            return
+        prepare_observations(conn)
+        detached = apply_retention(conn, self.retention_months, self.drop_detached)
+        if detached:
+            spider.logger.info(
+                f"🗄️ Detached expired observation partitions: {', '.join(detached)}"
+            )
+
+    @staticmethod
+    def fetch_known_ads(conn) -> KnownAdIndex:
         """
-        Return set of URL, that exist in db.
+        Load the index of ads that already exist in db.
+
+        Runs once per crawl: URLs are streamed through a server-side cursor
+        so the full result set never sits in memory at once.
         """
-        self.cursor.execute("SELECT url FROM ads")
-        return {row[0] for row in self.cursor.fetchall()}
+        with conn.cursor(name="known_ads") as cursor:
+            cursor.itersize = KNOWN_ADS_FETCH_SIZE
+            cursor.execute("SELECT url FROM ads WHERE url IS NOT NULL")
+            known_ads = KnownAdIndex.from_urls(row[0] for row in cursor)
+        conn.commit()
+        return known_ads
+
+    @staticmethod
+    def fetch_card_fingerprints(conn) -> dict[str, int]:
+        """Load card fingerprints of known ads (streamed like the known ads)."""
+        with conn.cursor(name="card_fingerprints") as cursor:
+            cursor.itersize = KNOWN_ADS_FETCH_SIZE
+            cursor.execute(
+                "SELECT ad_key, card_fingerprint FROM ad_state"
+                " WHERE card_fingerprint IS NOT NULL"
+            )
+            fingerprints = {key: fingerprint for key, fingerprint in cursor}
+        conn.commit()
+        return fingerprints
 
     def process_item(self, item, spider):
         try:
@@ -98,56 +433,561 @@ class PostgresPipeline:
                 )
                 return item
 
-            # Checking if the ad_id is in the database
-            self.cursor.execute(
-                "SELECT EXISTS(SELECT 1 FROM ads WHERE ad_id = %s)", (ad_id,)
-            )
-            if self.cursor.fetchone()[0]:
-                spider.logger.info(
-                    f"🔄 Item with ID {ad_id} already exists. Skipping insert."
+            # Duplicates are skipped by ON CONFLICT, no need to check beforehand
+            if not self.buffer:
+                self.buffer_started_at = time.monotonic()
+            self.buffer.append(self.item_to_row(adapter))
+            if len(self.buffer) >= self.batch_size:
+                self.flush(spider)
+            return item
+
+        except Exception as e:
+            spider.logger.error(f"❌ Unexpected error in process_item: {e}")
+            return item
+
+    @staticmethod
+    def item_to_row(adapter: ItemAdapter) -> tuple:
+        """
+        Convert an item into a row for the `ads` table (ADS_COLUMNS order),
+        followed by the card fingerprint for `ad_state` and the phone_pending flag.
+
+        A pending phone is stored as NULL and left out of the content hash,
+        so the ad is not rewritten on every deferred scrape.
+        """
+        phone_pending = bool(adapter.get("phone_pending"))
+        return (
+            adapter.get("ad_id") or "unknown",
+            adapter.get("title") or PLACEHOLDERS["title"],
+            adapter.get("price") or PLACEHOLDERS["price"],
+            adapter.get("user_name") or PLACEHOLDERS["user_name"],
+            adapter.get("phone_number")
+            or (None if phone_pending else PLACEHOLDERS["phone_number"]),
+            adapter.get("user_score") or PLACEHOLDERS["user_score"],
+            adapter.get("user_registration") or PLACEHOLDERS["user_registration"],
+            adapter.get("user_last_seen") or PLACEHOLDERS["user_last_seen"],
+            adapter.get("ad_view_counter") or PLACEHOLDERS["ad_view_counter"],
+            adapter.get("location") or PLACEHOLDERS["location"],
+            adapter.get("ad_pub_date") or PLACEHOLDERS["ad_pub_date"],
+            canonical_ad_url(adapter.get("url") or "") or None,
+            adapter.get("description") or PLACEHOLDERS["description"],
+            adapter.get("ad_tags") or PLACEHOLDERS["ad_tags"],
+            adapter.get("img_src_list") or PLACEHOLDERS["img_src_list"],
+            adapter.get("price_amount"),
+            adapter.get("price_currency"),
+            adapter.get("view_count"),
+            adapter.get("pub_date"),
+            adapter.get("user_last_seen_at"),
+            content_hash(adapter, DEFERRED_PHONE_HASHED_FIELDS)
+            if phone_pending
+            else content_hash(adapter),
+            adapter.get("card_fingerprint"),
+            phone_pending,
+        )
+
+    @staticmethod
+    def observation_row(row: tuple) -> tuple:
+        """Row for the `ad_observations` table from a buffered row."""
+        return tuple(row[index] for index in OBSERVATION_COLUMN_INDEXES)
+
+    @staticmethod
+    def state_row(row: tuple) -> tuple:
+        """Row for the `ad_state` table from a buffered row."""
+        return (
+            ad_key(row[URL_COLUMN_INDEX] or row[0]),
+            row[FINGERPRINT_INDEX],
+            row[HASH_COLUMN_INDEX],
+        )
+
+    def flush_if_stale(self, spider):
+        """Flush a partially filled buffer that is older than flush_interval."""
+        if (
+            self.buffer
+            and time.monotonic() - self.buffer_started_at >= self.flush_interval
+        ):
+            return self.flush(spider)
+
+    def flush(self, spider):
+        """Write all buffered rows with a single multi-row INSERT."""
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        started = time.monotonic()
+        result = self.write_rows(self.conn, rows, spider)
+        self.flushed(result, rows, started, spider)
+
+    def write_rows(self, conn, rows, spider) -> tuple[int, bool, list[tuple]]:
+        """
+        Upsert rows in one statement and commit.
+
+        Returns the number of inserted or changed rows, whether the batch
+        failed (in that case rows are retried one by one, skipping broken ones)
+        and the rows that were committed.
+        """
+        try:
+            with conn.cursor() as cursor:
+                inserted = self.write_batch(cursor, rows)
+            conn.commit()
+            return inserted, False, rows
+        except psycopg2.Error as e:
+            spider.logger.error(f"❌ Database error while flushing batch: {e}")
+            conn.rollback()
+
+        inserted = 0
+        stored = []
+        for row in rows:
+            try:
+                with conn.cursor() as cursor:
+                    inserted += self.write_batch(cursor, [row])
+                conn.commit()
+                stored.append(row)
+            except psycopg2.Error as e:
+                spider.logger.error(
+                    f"❌ Database error while saving item {row[0]}: {e}"
                 )
-                return item
+                conn.rollback()
+        return inserted, True, stored
+
+    def write_batch(self, cursor, rows) -> int:
+        """
+        Write rows to ads, ad_state, ad_observations and phone_pending (one
+        statement each).
 
-            data = (
-                adapter.get("ad_id") or "unknown",
-                adapter.get("title") or "No Title",
-                adapter.get("price") or "0",
-                adapter.get("user_name") or "Anonymous",
-                adapter.get("phone_number") or "N/A",
-                adapter.get("user_score") or "N/A",
-                adapter.get("user_registration") or "Unknown",
-                adapter.get("user_last_seen") or "Unknown",
-                adapter.get("ad_view_counter") or "0",
-                adapter.get("location") or "Unknown",
-                adapter.get("ad_pub_date") or "Unknown",
-                adapter.get("url"),
-                adapter.get("description") or "No Description",
-                adapter.get("ad_tags") or [],
-                adapter.get("img_src_list") or [],
+        Returns the number of inserted or changed ads rows.
+        """
+        execute_values(
+            cursor,
+            INSERT_ADS_SQL,
+            [row[:FINGERPRINT_INDEX] for row in rows],
+            page_size=len(rows),
+        )
+        inserted = cursor.rowcount
+        execute_values(
+            cursor,
+            UPSERT_AD_STATE_SQL,
+            [self.state_row(row) for row in rows],
+            page_size=len(rows),
+        )
+        if self.observations:
+            # Appended on every scrape, changed or not: views grow daily
+            execute_values(
+                cursor,
+                INSERT_OBSERVATIONS_SQL,
+                [self.observation_row(row) for row in rows],
+                page_size=len(rows),
             )
+        pending = [(row[0],) for row in rows if row[PHONE_PENDING_INDEX]]
+        if pending:
+            execute_values(cursor, ENQUEUE_PHONES_SQL, pending, page_size=len(pending))
+        return inserted
 
-            # Efficiently insert data using execute_values
-            self.cursor.execute(
-                """
-            INSERT INTO ads (ad_id, title, price, user_name, phone_number, user_score, user_registration, 
-                             user_last_seen, ad_view_counter, location, ad_pub_date, url, description, ad_tags, img_src_list)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (ad_id) DO NOTHING
-            """,
-                data,
+    def flushed(self, result, rows, started, spider):
+        """Bookkeeping after a flush: known ads index, signal, stats and log."""
+        inserted, batch_failed, stored = result
+        elapsed = time.monotonic() - started
+        if self.signals and stored:
+            self.signals.send_catch_log(
+                signal=ads_stored,
+                urls=[row[URL_COLUMN_INDEX] for row in stored],
+                spider=spider,
             )
+        for row in stored:
+            self.known_ads.add(row[URL_COLUMN_INDEX])
+            if row[FINGERPRINT_INDEX] is not None:
+                key = ad_key(row[URL_COLUMN_INDEX] or row[0])
+                self.card_fingerprints[key] = row[FINGERPRINT_INDEX]
+        self.record_flush_stats(len(rows), inserted, elapsed, batch_failed, spider)
+        spider.logger.info(
+            f"✅ Flushed {len(rows)} items ({inserted} new or changed) "
+            f"in {elapsed:.3f}s."
+        )
 
-            self.conn.commit()
-            spider.logger.info(
-                f"✅ Item with ID {adapter.get('ad_id')} saved successfully."
+    def record_flush_stats(self, size, inserted, elapsed, batch_failed, spider):
+        """Expose flush size, latency and throughput in the Scrapy stats."""
+        if not self.stats:
+            return
+        if batch_failed:
+            self.stats.inc_value("postgres/flush_errors", spider=spider)
+        self.stats.inc_value("postgres/flushes", spider=spider)
+        self.stats.inc_value("postgres/rows_written", size, spider=spider)
+        self.stats.inc_value("postgres/rows_inserted", inserted, spider=spider)
+        self.stats.set_value("postgres/flush_size_last", size, spider=spider)
+        self.stats.max_value("postgres/flush_size_max", size, spider=spider)
+        self.stats.set_value(
+            "postgres/flush_latency_last", round(elapsed, 4), spider=spider
+        )
+        self.stats.max_value(
+            "postgres/flush_latency_max", round(elapsed, 4), spider=spider
+        )
+        self.flush_time_total += elapsed
+        rows_written = self.stats.get_value("postgres/rows_written", 0, spider=spider)
+        if self.flush_time_total > 0:
+            self.stats.set_value(
+                "postgres/rows_per_second",
+                round(rows_written / self.flush_time_total, 1),
+                spider=spider,
             )
-            return item
 
-        except psycopg2.Error as e:
-            spider.logger.error(f"❌ Database error while saving item: {e}")
-            self.conn.rollback()
-            return item
+
+class AsyncPostgresPipeline(PostgresPipeline):
+    """
+    Non-blocking variant of PostgresPipeline for the asyncio reactor.
+
+    Same table and semantics, but every psycopg2 call runs in the Twisted
+    connection pool threads (adbapi). Methods return Deferreds, so commits
+    overlap with Playwright work instead of stalling the event loop.
+    """
+
+    def __init__(self, *args, pool_size=2, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_size = pool_size
+        self.dbpool = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = super().from_crawler(crawler)
+        pipeline.pool_size = crawler.settings.getint("POSTGRES_POOL_SIZE", 2)
+        return pipeline
+
+    def open_spider(self, spider):
+        spider.logger.info("📡 Opening async PostgreSQL pipeline.")
+        self.dbpool = adbapi.ConnectionPool(
+            "psycopg2",
+            host=self.postgres_uri,
+            dbname=self.postgres_db,
+            user=self.postgres_user,
+            password=self.postgres_password,
+            cp_min=1,
+            cp_max=self.pool_size,
+            cp_reconnect=True,
+        )
+        d = self.dbpool.runWithConnection(self.prepare_database)
+        d.addCallback(
+            lambda _: self.dbpool.runWithConnection(self.prepare_history, spider)
+        )
+        d.addCallback(lambda _: spider.logger.info("✅ Table checked or created."))
+        d.addCallback(lambda _: self.dbpool.runWithConnection(self.fetch_known_ads))
+        d.addCallback(self.known_ads_loaded, spider)
+        d.addCallback(
+            lambda _: self.dbpool.runWithConnection(self.fetch_card_fingerprints)
+        )
+        d.addCallback(self.card_fingerprints_loaded)
+        d.addErrback(self.open_failed, spider)
+        return d
+
+    def known_ads_loaded(self, known_ads, spider):
+        self.known_ads = known_ads
+        spider.logger.info(f"📚 Loaded {len(self.known_ads)} known ads.")
+        self.start_flush_loop(spider)
+
+    def card_fingerprints_loaded(self, fingerprints):
+        self.card_fingerprints = fingerprints
+
+    def open_failed(self, failure, spider):
+        spider.logger.error(f"❌ Error connecting to PostgreSQL: {failure.value}")
+        return failure
+
+    def close_spider(self, spider):
+        self.stop_flush_loop()
+        d = self.flush(spider)
+        d.addBoth(lambda _: self.close_pool(spider))
+        return d
+
+    def close_pool(self, spider):
+        spider.logger.info("Closing PostgreSQL pipeline.")
+        if self.dbpool:
+            self.dbpool.close()
+            spider.logger.info("✅ Connection pool successfully closed.")
+
+    def process_item(self, item, spider):
+        try:
+            adapter = ItemAdapter(item)
+
+            if not adapter.get("ad_id"):
+                spider.logger.warning(
+                    "⚠️ Item does not have a valid ad_id. Skipping insert."
+                )
+                return item
+
+            if not self.buffer:
+                self.buffer_started_at = time.monotonic()
+            self.buffer.append(self.item_to_row(adapter))
+            if len(self.buffer) < self.batch_size:
+                return item
+            # Item is passed on once its batch is committed (natural backpressure)
+            d = self.flush(spider)
+            d.addCallback(lambda _: item)
+            return d
 
         except Exception as e:
             spider.logger.error(f"❌ Unexpected error in process_item: {e}")
             return item
+
+    def flush(self, spider):
+        """Write buffered rows in a pool thread, returns a Deferred."""
+        if not self.buffer:
+            return defer.succeed(None)
+        rows, self.buffer = self.buffer, []
+        started = time.monotonic()
+        d = self.dbpool.runWithConnection(self.write_rows, rows, spider)
+        d.addCallback(self.flushed, rows, started, spider)
+        d.addErrback(self.flush_failed, rows, spider)
+        return d
+
+    def flush_failed(self, failure, rows, spider):
+        spider.logger.error(
+            f"❌ Failed to write {len(rows)} items to PostgreSQL: {failure.value}"
+        )
+        if self.stats:
+            self.stats.inc_value("postgres/flush_errors", spider=spider)
+
+
+class RefreshPipeline:
+    """
+    Bulk writes of the refresh spider (olx_refresh).
+
+    Only ads whose price, views or liveness changed are updated in `ads`;
+    every checked ad gets its ad_refresh bookkeeping (last check, checks,
+    changes) and active ads an ad_observations row.
+
+    Stats: refresh/checked, refresh/changed, refresh/flush_errors.
+    """
+
+    def __init__(
+        self,
+        postgres_uri,
+        postgres_db,
+        postgres_user,
+        postgres_password,
+        batch_size=200,
+        observations=True,
+        stats=None,
+    ):
+        self.postgres_uri = postgres_uri
+        self.postgres_db = postgres_db
+        self.postgres_user = postgres_user
+        self.postgres_password = postgres_password
+        self.batch_size = max(1, batch_size)
+        self.observations = observations
+        self.stats = stats
+        self.conn = None
+        self.buffer: list[tuple] = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            postgres_uri=crawler.settings.get("POSTGRES_URI"),
+            postgres_db=crawler.settings.get("POSTGRES_DB"),
+            postgres_user=crawler.settings.get("POSTGRES_USER"),
+            postgres_password=crawler.settings.get("POSTGRES_PASSWORD"),
+            batch_size=crawler.settings.getint("REFRESH_BATCH_SIZE", 200),
+            observations=crawler.settings.getbool("OBSERVATIONS_ENABLED", True),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        spider.logger.info("📡 Opening PostgreSQL refresh pipeline.")
+        self.conn = psycopg2.connect(
+            host=self.postgres_uri,
+            dbname=self.postgres_db,
+            user=self.postgres_user,
+            password=self.postgres_password,
+        )
+        PostgresPipeline.prepare_database(self.conn)
+        if self.observations:
+            prepare_observations(self.conn)
+
+    def close_spider(self, spider):
+        try:
+            self.flush(spider)
+        finally:
+            if self.conn:
+                self.conn.close()
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        self.buffer.append(
+            (
+                adapter.get("ad_id"),
+                adapter.get("price"),
+                adapter.get("price_amount"),
+                adapter.get("price_currency"),
+                adapter.get("ad_view_counter"),
+                adapter.get("view_count"),
+                bool(adapter.get("is_active")),
+            )
+        )
+        if len(self.buffer) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def flush(self, spider):
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        try:
+            with self.conn.cursor() as cursor:
+                changed = {
+                    row[0]
+                    for row in execute_values(
+                        cursor,
+                        UPDATE_REFRESHED_ADS_SQL,
+                        rows,
+                        template=REFRESH_ROW_TEMPLATE,
+                        page_size=len(rows),
+                        fetch=True,
+                    )
+                }
+                execute_values(
+                    cursor,
+                    UPSERT_AD_REFRESH_SQL,
+                    [(row[0], int(row[0] in changed)) for row in rows],
+                    template=AD_REFRESH_ROW_TEMPLATE,
+                    page_size=len(rows),
+                )
+                observations = [
+                    (row[0], row[2], row[3], row[5])
+                    for row in rows
+                    if row[6] and (row[2] is not None or row[5] is not None)
+                ]
+                if self.observations and observations:
+                    execute_values(
+                        cursor,
+                        INSERT_OBSERVATIONS_SQL,
+                        observations,
+                        page_size=len(observations),
+                    )
+            self.conn.commit()
+        except psycopg2.Error as e:
+            spider.logger.error(f"❌ Failed to write {len(rows)} refreshed ads: {e}")
+            self.conn.rollback()
+            if self.stats:
+                self.stats.inc_value("refresh/flush_errors", spider=spider)
+            return
+        if self.stats:
+            self.stats.inc_value("refresh/checked", len(rows), spider=spider)
+            self.stats.inc_value("refresh/changed", len(changed), spider=spider)
+        spider.logger.info(f"✅ Refreshed {len(rows)} ads ({len(changed)} changed).")
+
+
+class PhonePipeline:
+    """
+    Bulk writes of the phone phase (olx_phones).
+
+    Revealed phones are written to ads.phone_number and leave phone_pending;
+    removed ads are marked inactive and leave it too; failed reveals are
+    rescheduled with an exponential delay.
+
+    Stats: phones/saved, phones/deactivated, phones/rescheduled, phones/flush_errors.
+    """
+
+    def __init__(
+        self,
+        postgres_uri,
+        postgres_db,
+        postgres_user,
+        postgres_password,
+        batch_size=100,
+        retry_delay=1800.0,
+        stats=None,
+    ):
+        self.postgres_uri = postgres_uri
+        self.postgres_db = postgres_db
+        self.postgres_user = postgres_user
+        self.postgres_password = postgres_password
+        self.batch_size = max(1, batch_size)
+        self.retry_delay = retry_delay
+        self.stats = stats
+        self.conn = None
+        self.phones: list[tuple] = []
+        self.gone: list[tuple] = []
+        self.failures: list[tuple] = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            postgres_uri=crawler.settings.get("POSTGRES_URI"),
+            postgres_db=crawler.settings.get("POSTGRES_DB"),
+            postgres_user=crawler.settings.get("POSTGRES_USER"),
+            postgres_password=crawler.settings.get("POSTGRES_PASSWORD"),
+            batch_size=crawler.settings.getint("PHONE_PHASE_BATCH_SIZE", 100),
+            retry_delay=crawler.settings.getfloat("PHONE_PHASE_RETRY_DELAY", 1800.0),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        spider.logger.info("📡 Opening PostgreSQL phone pipeline.")
+        self.conn = psycopg2.connect(
+            host=self.postgres_uri,
+            dbname=self.postgres_db,
+            user=self.postgres_user,
+            password=self.postgres_password,
+        )
+        prepare_phone_queue(self.conn)
+
+    def close_spider(self, spider):
+        try:
+            self.flush(spider)
+        finally:
+            if self.conn:
+                self.conn.close()
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        if adapter.get("is_active") is False:
+            self.gone.append((adapter["ad_id"],))
+        elif adapter.get("phone_number"):
+            self.phones.append((adapter["ad_id"], adapter["phone_number"]))
+        else:
+            self.failures.append(
+                (adapter["ad_id"], adapter.get("error"), self.retry_delay)
+            )
+        if len(self.phones) + len(self.gone) + len(self.failures) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def flush(self, spider):
+        if not self.phones and not self.gone and not self.failures:
+            return
+        phones, self.phones = self.phones, []
+        gone, self.gone = self.gone, []
+        failures, self.failures = self.failures, []
+        done = [(ad_id,) for ad_id, _ in phones] + gone
+        try:
+            with self.conn.cursor() as cursor:
+                if phones:
+                    execute_values(
+                        cursor, UPDATE_PHONES_SQL, phones, page_size=len(phones)
+                    )
+                if gone:
+                    execute_values(
+                        cursor, DEACTIVATE_ADS_SQL, gone, page_size=len(gone)
+                    )
+                if done:
+                    execute_values(
+                        cursor, DELETE_PENDING_SQL, done, page_size=len(done)
+                    )
+                if failures:
+                    execute_values(
+                        cursor,
+                        RESCHEDULE_PENDING_SQL,
+                        failures,
+                        template=RESCHEDULE_ROW_TEMPLATE,
+                        page_size=len(failures),
+                    )
+            self.conn.commit()
+        except psycopg2.Error as e:
+            spider.logger.error(
+                f"❌ Failed to write {len(done) + len(failures)} phone results: {e}"
+            )
+            self.conn.rollback()
+            if self.stats:
+                self.stats.inc_value("phones/flush_errors", spider=spider)
+            return
+        if self.stats:
+            self.stats.inc_value("phones/saved", len(phones), spider=spider)
+            self.stats.inc_value("phones/deactivated", len(gone), spider=spider)
+            self.stats.inc_value("phones/rescheduled", len(failures), spider=spider)
+        spider.logger.info(
+            f"✅ Saved {len(phones)} phones, deactivated {len(gone)} ads, "
+            f"rescheduled {len(failures)}."
+        )
@@ -7,6 +7,36 @@ from decouple import config, Config, RepositoryEnv
 # Range of pages of the list of ads (olx.ua/list)
 START_PAGE = 1
 END_PAGE = 2
+# Incremental mode (e.g. hourly cron): newest ads first, list pages requested one by
+# one until a page has no new ads or INCREMENTAL_STOP_AFTER_KNOWN known cards in a row
+# (with QUERY_SHARDING every shard is paginated and stopped this way on its own)
+INCREMENTAL_MODE = False
+INCREMENTAL_STOP_AFTER_KNOWN = 0  # 0 = stop only on a fully known page
+INCREMENTAL_MAX_PAGES = 25  # OLX does not show more than 25 pages of a search
+# Query sharding: split a search above the OLX page limit by subcategory, location
+# and price range until every shard fits into SHARDING_MAX_PAGES pages
+QUERY_SHARDING = False
+SHARDING_MAX_PAGES = 25
+SHARDING_PAGE_SIZE = 40  # Ads per list page
+SHARDING_MAX_PRICE = 10_000_000  # Upper bound of the first price split
+SHARDING_LOCATIONS = []  # Location slugs to split by, e.g. ["kiev", "lvov"]
+SHARDING_CACHE_FILE = "shard_counts.json"
+SHARDING_CACHE_TTL = 6 * 3600  # Seconds the result count of a shard is reused
+# Category catalog (slugs and ad counts per category), discovered from the site:
+# scrapy crawl olx_catalog (skips the crawl while the file is fresh)
+CATALOG_FILE = "category_catalog.json"
+CATALOG_TTL = 7 * 24 * 3600  # Seconds before the catalog is considered stale
+CATALOG_ROOTS = ["transport", "nedvizhimost"]
+CATALOG_MAX_DEPTH = 2  # transport -> legkovye-avtomobili -> bmw
+# Promoted ("ТОП") cards repeat on every list page: fetch each once per run, or
+# skip them (they are also listed among regular cards by date)
+FETCH_PROMOTED_ADS = True
+# Re-fetch known ads whose list card (title, price, date) changed; fingerprints and
+# content hashes live in the ad_state table. Ads stored before it existed have no
+# fingerprint and are fetched once to fill it in
+CHANGE_DETECTION = True
+# Read ad data from the JSON state prerendered into OLX pages (DOM is the fallback)
+USE_PRERENDERED_STATE = True
 
 # === Basic Scrapy setting ===
 BOT_NAME = "olx_scraper"  # Project name Scrapy
@@ -30,6 +60,55 @@ PLAYWRIGHT_LAUNCH_OPTIONS = {
     ],
 }
 PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 30_000
+PLAYWRIGHT_BROWSERS = 1  # Browser processes (rendering scales with CPU cores)
+PLAYWRIGHT_CONTEXTS_PER_BROWSER = 1  # Contexts per browser, each with own cookies
+PAGE_POOL_SIZE = 0  # Pages per context (0 = CONCURRENT_REQUESTS split across contexts)
+PAGE_POOL_MAX_USES = 50  # Page is recycled after this number of ads
+# Network blocking on detail pages: "full" (nothing), "text-only" (images, media,
+# fonts, trackers) or "minimal" (also stylesheets and maps)
+PLAYWRIGHT_RESOURCE_PROFILE = "text-only"
+AD_TIME_BUDGET_MS = 20_000  # Total time for one ad page (navigation, waits, phone)
+AD_SECTIONS_QUIET_MS = 500  # DOM silence after which missing sections count as absent
+# Phone numbers via the OLX phone endpoint; ads it fails for go to phone_pending
+PHONE_API_ENABLED = True
+PHONE_API_RATE = 1.0  # Requests per second for all contexts together
+PHONE_API_CONCURRENCY = 2
+PHONE_API_TIMEOUT_MS = 10_000
+# "deferred": ads are stored without phones and queued in phone_pending,
+# `scrapy crawl olx_phones` reveals them later with the limits below
+PHONE_REVEAL_MODE = "inline"
+PHONE_PHASE_CONCURRENCY = 2
+PHONE_PHASE_RATE = 0.5  # Phone requests per second for all accounts together
+PHONE_PHASE_CONTEXTS = 0  # Contexts of the phone phase (0 = one per account)
+PHONE_PHASE_LIMIT = 2000  # Queued ads per run
+PHONE_PHASE_MAX_ATTEMPTS = 3  # Failed reveals before the ad is stored with "N/A"
+PHONE_PHASE_RETRY_DELAY = 1800  # Seconds before a retry, doubled for each attempt
+PHONE_PHASE_COOLDOWN = 300  # Seconds an account rests after a 403/429
+PHONE_PHASE_CLICK_FALLBACK = False  # Click the button when the API fails
+PHONE_PHASE_BATCH_SIZE = 100  # Phone results per bulk update
+# Detail pages: adaptive concurrency and crawl-wide pause on 403 (CloudFront) blocks
+THROTTLE_MIN_CONCURRENCY = 1
+THROTTLE_TARGET_LATENCY = 5.0  # Seconds per navigation above which concurrency drops
+THROTTLE_BACKOFF_BASE = 30.0  # First pause after a block, doubled for each next one
+THROTTLE_BACKOFF_MAX = 600.0
+THROTTLE_WINDOW = 50  # Navigations used for throttle/block_rate
+THROTTLE_BLOCK_RETRIES = 2  # Times a blocked ad is requeued
+
+# === OLX sessions ===
+# Several accounts as "email:password" separated by commas (default: OLX_EMAIL)
+OLX_ACCOUNTS = config("OLX_ACCOUNTS", default="")
+SESSION_MAX_AGE = 24 * 3600  # Seconds a saved session is trusted without a new login
+SESSION_REFRESH_MARGIN = 1800  # Refresh sessions expiring within this many seconds
+SESSION_REFRESH_INTERVAL = 300  # Background refresh check period (0 = off)
+
+# === Proxies ===
+# One proxy per browser context; URLs separated by commas or new lines
+PROXY_LIST = config("PROXY_LIST", default="")
+PROXY_FILE = config("PROXY_FILE", default="")  # Optional file with one URL per line
+PROXY_CHECK_URL = "https://www.olx.ua/robots.txt"
+PROXY_CHECK_TIMEOUT = 15
+PROXY_MIN_SCORE = 0.5  # Health score (0..1) below which a proxy is retired
+PROXY_MIN_SAMPLES = 10  # Requests before a proxy can be retired by its score
 
 # === HTTP Headers ===
 USER_AGENT = None
@@ -41,14 +120,34 @@ DEFAULT_REQUEST_HEADERS = {
 }
 
 # === Download Handlers ===
+# Requests without meta["playwright"] fall through to Scrapy's HTTP downloader
+LIST_PAGES_VIA_HTTP = True  # List pages over plain HTTP with the browser cookies
 DOWNLOAD_HANDLERS = {
     "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
     "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
 }
 
+# === Duplicate filter ===
+# Ad pages are deduplicated by OLX ad ID; IDs of scraped ads are kept on disk
+# between runs so ads from earlier runs are skipped without a database query
+DUPEFILTER_CLASS = "olx_scraper.dupefilters.AdIdDupeFilter"
+AD_DUPEFILTER_FILE = "seen_ads.txt"
+
+# === Extensions ===
+EXTENSIONS = {
+    "olx_scraper.extensions.EventLoopLagMonitor": 500,
+}
+LOOP_LAG_MONITOR_ENABLED = True  # Report event-loop stalls in stats (loop_lag/*)
+LOOP_LAG_INTERVAL = 0.05  # Seconds between probes
+LOOP_LAG_STALL_THRESHOLD = 0.1  # Lag (seconds) counted as a stall
+
 # === Pipelines ===
 ITEM_PIPELINES = {
+    # Typed price, view count and dates from the scraped text (before storage)
+    "olx_scraper.pipelines.NormalizationPipeline": 200,
     "olx_scraper.pipelines.PostgresPipeline": 300,  # Using PostgresPipeline to process data
+    # Non-blocking variant (psycopg2 in a thread pool), keeps the asyncio loop free:
+    # "olx_scraper.pipelines.AsyncPostgresPipeline": 300,
 }
 
 
@@ -63,6 +162,25 @@ POSTGRES_URI = config("POSTGRES_URI", default="localhost")
 POSTGRES_DB = config("POSTGRES_DB", default="olx_db")
 POSTGRES_USER = config("POSTGRES_USER", default="user")
 POSTGRES_PASSWORD = config("POSTGRES_PASSWORD", default="password")
+POSTGRES_BATCH_SIZE = 50  # Items buffered before a bulk insert
+POSTGRES_FLUSH_INTERVAL = 10  # Max age of the buffer in seconds before it is flushed
+POSTGRES_POOL_SIZE = 2  # Connections used by AsyncPostgresPipeline
+# Price/views history: one ad_observations row per scrape, partitioned by month
+OBSERVATIONS_ENABLED = True
+OBSERVATIONS_RETENTION_MONTHS = 12  # Older partitions are detached on start (0 = keep)
+OBSERVATIONS_DROP_DETACHED = False  # Drop detached partitions instead of keeping them
+
+# === Refresh spider (scrapy crawl olx_refresh) ===
+# Price, views and liveness of stored ads over plain HTTP, stalest/most volatile first
+REFRESH_CONCURRENCY = 16
+REFRESH_DOWNLOAD_DELAY = 0.0
+REFRESH_MIN_AGE = 6 * 3600  # Seconds since the last check before an ad is refreshed
+REFRESH_LIMIT = 5000  # Ads per run
+REFRESH_AGE_HALF_LIFE_DAYS = 14  # Age at which the priority of an ad halves
+REFRESH_VOLATILITY_WEIGHT = 4  # Boost of ads whose checks often found changes
+REFRESH_BATCH_SIZE = 200  # Refreshed ads per bulk update
+# Views are not in the HTML of an ad page: read them from the page-views endpoint
+REFRESH_VIEWS_API = True
 
 # === Other Settings ===
 ROBOTSTXT_OBEY = False  # Ignoring robots.txt rules
@@ -0,0 +1,8 @@
+"""
+Project signals (sent through crawler.signals like Scrapy's own).
+
+ads_stored: ads were committed to PostgreSQL by PostgresPipeline.
+    Arguments: urls (canonical ad URLs of the committed rows), spider.
+"""
+
+ads_stored = object()
@@ -0,0 +1,80 @@
+"""
+Category catalog refresh (olx_catalog) with plain Scrapy requests.
+
+The spider walks the category tree from CATALOG_ROOTS down to
+CATALOG_MAX_DEPTH and saves it to CATALOG_FILE, so the olx spider only reads
+the file and makes no blocking requests in the reactor. While the catalog is
+fresh (CATALOG_TTL) nothing is downloaded, so it can run before every crawl.
+
+Run: scrapy crawl olx_catalog [-a force=1]
+"""
+
+import time
+from pathlib import Path
+from typing import Iterator
+
+import scrapy
+from scrapy.http.response import Response
+
+from ..utils.category_catalog import (
+    BASE_URL,
+    CATALOG_FILE,
+    DEFAULT_ROOTS,
+    CategoryCatalog,
+    merge_catalog_page,
+)
+
+
+class CatalogSpider(scrapy.Spider):
+    """Breadth-first crawl of the OLX category tree into the catalog file"""
+
+    name = "olx_catalog"
+    allowed_domains: list[str] = ["olx.ua"]
+    custom_settings = {
+        "ITEM_PIPELINES": {},
+        # Scrapy's HTTP downloader only, no browser is started
+        "DOWNLOAD_HANDLERS": {},
+    }
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.path = Path(settings.get("CATALOG_FILE", CATALOG_FILE))
+        spider.ttl = settings.getfloat("CATALOG_TTL", 7 * 24 * 3600)
+        spider.roots = settings.getlist("CATALOG_ROOTS") or list(DEFAULT_ROOTS)
+        spider.max_depth = settings.getint("CATALOG_MAX_DEPTH", 2)
+        spider.force = str(kwargs.get("force", "")).lower() in ("1", "true", "yes")
+        spider.nodes = {}
+        return spider
+
+    def start_requests(self) -> Iterator[scrapy.Request]:
+        if CategoryCatalog.load(self.path).is_fresh(self.ttl) and not self.force:
+            self.logger.info(f"📚 {self.path} is fresh, nothing to refresh.")
+            return
+        for root in self.roots:
+            yield self.category_request(root.strip("/"), depth=0)
+
+    def category_request(self, path: str, depth: int) -> scrapy.Request:
+        return scrapy.Request(
+            f"{BASE_URL}{path}/",
+            callback=self.parse,
+            dont_filter=True,
+            meta={"catalog_path": path, "depth": depth},
+        )
+
+    def parse(self, response: Response) -> Iterator[scrapy.Request]:
+        path, depth = response.meta["catalog_path"], response.meta["depth"]
+        children = merge_catalog_page(self.nodes, path, response.text)
+        if depth + 1 < self.max_depth:
+            for child_path in children:
+                yield self.category_request(child_path, depth + 1)
+
+    def closed(self, reason: str) -> None:
+        """Save the catalog only after a complete crawl"""
+        if reason != "finished" or not self.nodes:
+            return
+        CategoryCatalog(self.nodes, time.time()).save(self.path)
+        self.logger.info(f"📚 {len(self.nodes)} categories saved to {self.path}.")
+        if self.crawler.stats is not None:
+            self.crawler.stats.set_value("catalog/nodes", len(self.nodes), spider=self)
@@ -0,0 +1,208 @@
+"""
+Pool of Playwright browsers and contexts (N browsers x M contexts).
+
+Every context has its own OLX account session (cookie jar), its own bounded
+page pool, a load counter and, with PROXY_LIST, its own proxy. Ad page
+requests go to the least-loaded context; a context with a bad proxy is rebuilt.
+"""
+
+from typing import Any, Awaitable, Callable, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright
+
+from ..utils.proxy_pool import Proxy, ProxyPool
+from .page_pool import PagePool
+from .session_pool import Session, SessionPool
+
+# Called for every new context, e.g. to validate or log in its session
+ContextCallback = Callable[[BrowserContext, Session], Awaitable[None]]
+
+
+class ContextSlot:
+    """One BrowserContext with its own pages, account session and load counter."""
+
+    def __init__(
+        self,
+        index: int,
+        browser: Browser,
+        context: BrowserContext,
+        page_pool: PagePool,
+        session: Session,
+        proxy: Optional[Proxy] = None,
+    ):
+        self.index = index
+        self.browser = browser
+        self.context = context
+        self.page_pool = page_pool
+        self.session = session
+        self.proxy = proxy
+        # Requests dispatched to this context that are not finished yet
+        self.assigned = 0
+        # The proxy went bad: no new requests, rebuilt once the last one is done
+        self.retiring = False
+        self.closed = False
+
+    def __repr__(self) -> str:
+        proxy = f" proxy={self.proxy.label}" if self.proxy else ""
+        return f"<ContextSlot {self.index} assigned={self.assigned}{proxy}>"
+
+
+class ContextPool:
+    """
+    Launches `browsers` browser processes with `contexts_per_browser` contexts
+    each and dispatches detail pages to the least-loaded context.
+
+    Separate browser processes let rendering scale with CPU cores instead of
+    saturating one renderer; separate contexts give separate cookie jars.
+    Contexts take sessions from `session_pool`, one account per context
+    while there are enough accounts.
+    """
+
+    def __init__(
+        self,
+        playwright: Playwright,
+        launch_options: dict,
+        context_options: dict,
+        session_pool: SessionPool,
+        browsers: int = 1,
+        contexts_per_browser: int = 1,
+        pages_per_context: int = 1,
+        max_page_uses: int = 50,
+        stats: Any = None,
+        proxy_pool: Optional[ProxyPool] = None,
+    ):
+        self.playwright = playwright
+        self.launch_options = launch_options
+        self.context_options = context_options
+        self.session_pool = session_pool
+        self.browsers_count = max(1, browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.pages_per_context = max(1, pages_per_context)
+        self.max_page_uses = max_page_uses
+        self.stats = stats
+        self.proxy_pool = proxy_pool
+        self.browsers: list[Browser] = []
+        self.slots: list[ContextSlot] = []
+        self.on_context_created: Optional[ContextCallback] = None
+
+    @property
+    def size(self) -> int:
+        return self.browsers_count * self.contexts_per_browser
+
+    async def start(
+        self,
+        on_context_created: Optional[ContextCallback] = None,
+    ) -> None:
+        """
+        Launch browsers and contexts.
+
+        :param on_context_created: coroutine called for every new context with its
+            session (e.g. to validate it or log in).
+        """
+        self.on_context_created = on_context_created
+        for _ in range(self.browsers_count):
+            browser = await self.playwright.chromium.launch(**self.launch_options)
+            self.browsers.append(browser)
+            for _ in range(self.contexts_per_browser):
+                await self.add_slot(browser, on_context_created)
+
+    async def add_slot(
+        self,
+        browser: Browser,
+        on_context_created: Optional[ContextCallback] = None,
+    ) -> ContextSlot:
+        slot = await self._new_slot(len(self.slots), browser, on_context_created)
+        self.slots.append(slot)
+        return slot
+
+    async def _new_slot(
+        self,
+        index: int,
+        browser: Browser,
+        on_context_created: Optional[ContextCallback] = None,
+    ) -> ContextSlot:
+        session = self.session_pool.acquire()
+        proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+        context = await browser.new_context(
+            **self.context_options,
+            storage_state=self.session_pool.storage_state(session),
+            proxy=proxy.playwright_config() if proxy else None,
+        )
+        if on_context_created:
+            await on_context_created(context, session)
+        page_pool = PagePool(
+            context,
+            size=self.pages_per_context,
+            max_uses=self.max_page_uses,
+            stats=self.stats,
+        )
+        return ContextSlot(index, browser, context, page_pool, session, proxy)
+
+    def pick(self) -> ContextSlot:
+        """Reserve the least-loaded context for a new detail request."""
+        active = [s for s in self.slots if not s.retiring] or self.slots
+        slot = min(active, key=lambda s: s.assigned)
+        slot.assigned += 1
+        if self.stats is not None:
+            self.stats.inc_value(f"context_pool/dispatched/{slot.index}")
+        return slot
+
+    def get(self, index: Optional[int]) -> ContextSlot:
+        return self.slots[index or 0]
+
+    def done(self, slot: ContextSlot) -> None:
+        """Release a reservation made by pick()."""
+        slot.assigned = max(0, slot.assigned - 1)
+
+    def report(
+        self,
+        slot: ContextSlot,
+        latency: Optional[float] = None,
+        blocked: bool = False,
+        failed: bool = False,
+    ) -> None:
+        """Feed a request result to the proxy score of the context."""
+        if not self.proxy_pool or slot.proxy is None:
+            return
+        if self.proxy_pool.record(slot.proxy, latency, blocked, failed):
+            slot.retiring = True
+
+    async def release(self, slot: ContextSlot) -> Optional[ContextSlot]:
+        """
+        done() + rebuild of a retiring context after its last request.
+
+        :return: The new slot if the context was rebuilt, otherwise None.
+        """
+        self.done(slot)
+        if slot.retiring and slot.assigned == 0 and not slot.closed:
+            return await self.rebuild(slot)
+        return None
+
+    async def rebuild(self, slot: ContextSlot) -> ContextSlot:
+        """Replace a context (and its proxy) with a fresh one in the same browser."""
+        # Marked first so that concurrent release() calls don't rebuild it twice
+        slot.closed = True
+        await slot.page_pool.close()
+        await slot.context.close()
+        self.session_pool.release(slot.session)
+        if self.proxy_pool:
+            self.proxy_pool.release(slot.proxy)
+        new_slot = await self._new_slot(
+            slot.index, slot.browser, self.on_context_created
+        )
+        self.slots[slot.index] = new_slot
+        if self.stats is not None:
+            self.stats.inc_value("context_pool/rebuilt")
+        return new_slot
+
+    async def close(self) -> None:
+        for slot in self.slots:
+            await slot.page_pool.close()
+            await slot.context.close()
+            self.session_pool.release(slot.session)
+            if self.proxy_pool:
+                self.proxy_pool.release(slot.proxy)
+        for browser in self.browsers:
+            await browser.close()
+        self.slots.clear()
+        self.browsers.clear()
@@ -0,0 +1,176 @@
+"""
+Extraction of the ad page fields in a single page.evaluate call.
+
+Instead of ~20 sequential Playwright calls (text_content, is_visible with
+timeouts, get_attribute for every photo) all fields are collected in the
+browser in one round-trip. Missing elements are not waited for but listed
+in `missing`.
+"""
+
+from typing import Optional, TypedDict
+
+from playwright.async_api import Page
+
+
+class AdDetailFields(TypedDict):
+    """Raw fields of the ad detail page (None if the element is absent)."""
+
+    ad_pub_date: Optional[str]
+    user_name: Optional[str]
+    user_score: Optional[str]
+    user_registration: Optional[str]
+    user_last_seen: Optional[str]
+    location: Optional[str]
+    img_src_list: list[str]
+    ad_tags: list[str]
+    description: Optional[str]
+    ad_id: Optional[str]
+    ad_view_counter: Optional[str]
+    missing: list[str]
+
+
+# Receives a {field: selector} mapping, returns AdDetailFields
+EXTRACT_AD_FIELDS_JS = """
+(sel) => {
+    const missing = [];
+    const one = (name) => {
+        const el = document.querySelector(sel[name]);
+        const text = el ? el.textContent.trim() : "";
+        if (!text) missing.push(name);
+        return text || null;
+    };
+    const texts = (selector) =>
+        Array.from(document.querySelectorAll(selector))
+            .map((el) => el.textContent.trim())
+            .filter(Boolean);
+
+    const overlay = document.querySelector(sel.map_overlay);
+    const locationParts = overlay && overlay.parentElement
+        ? Array.from(overlay.parentElement.querySelectorAll("svg + div *"))
+              .map((el) => el.textContent.trim())
+              .filter(Boolean)
+        : [];
+    if (!locationParts.length) missing.push("location");
+
+    const images = Array.from(
+        document.querySelectorAll(sel.photo_block + " img")
+    ).map((img) => img.getAttribute("src")).filter(Boolean);
+    if (!images.length) missing.push("img_src_list");
+
+    const tags = texts(sel.ad_tags);
+    if (!tags.length) missing.push("ad_tags");
+
+    const description = texts(sel.description).join(" ");
+    if (!description) missing.push("description");
+
+    return {
+        ad_pub_date: one("ad_pub_date"),
+        user_name: one("user_name"),
+        user_score: one("user_score"),
+        user_registration: one("user_registration"),
+        user_last_seen: one("user_last_seen"),
+        location: locationParts.join(" ") || null,
+        img_src_list: images,
+        ad_tags: tags,
+        description: description || null,
+        ad_id: one("ad_id"),
+        ad_view_counter: one("ad_view_counter"),
+        missing: missing,
+    };
+}
+"""
+
+
+async def extract_ad_fields(page: Page, selectors: dict[str, str]) -> AdDetailFields:
+    """
+    Collect all fields of the ad detail page in a single page.evaluate call.
+
+    :param page: Playwright Page with the ad already loaded.
+    :param selectors: {field: CSS selector}, see DETAIL_SELECTORS in olxspider.
+    :return: AdDetailFields; names of missing fields under `missing`.
+    """
+    return await page.evaluate(EXTRACT_AD_FIELDS_JS, selectors)
+
+
+# Synthetic detail page for the benchmark (same data-testid markup as OLX)
+BENCHMARK_HTML = (
+    """
+<span data-cy="ad-posted-at">Сьогодні о 12:30</span>
+<a data-testid="user-profile-link"><div><div><h4>Олена</h4>
+  <p><span>На OLX з березня 2019 р.</span></p></div></div></a>
+<p data-testid="lastSeenBox"><span>Онлайн вчора о 21:10</span></p>
+<div><div data-testid="qa-map-overlay-hidden"></div><svg></svg>
+  <div><p>Київ</p><p>Київська область</p></div></div>
+<div data-testid="ad-photo">"""
+    + "".join(
+        f'<img src="https://ireland.apollo.olxcdn.com/v1/files/{n}/image">'
+        for n in range(8)
+    )
+    + """</div>
+<div data-cy="ad_description"><div>Продам</div><div>у гарному стані</div></div>
+<div data-testid="ad-footer-bar-section"><span>ID: 861234567</span>
+  <span data-testid="page-view-counter">Переглядів: 154</span></div>
+"""
+)
+
+
+async def benchmark(iterations: int = 50) -> None:
+    """
+    Micro-benchmark of per-ad extraction latency: the previous sequence of
+    locator round-trips in parse_ad vs one evaluate.
+
+    Run: python -m olx_scraper.spiders.dom_extractor
+    """
+    import time
+
+    from playwright.async_api import async_playwright
+
+    from .olxspider import DETAIL_SELECTORS
+
+    async def legacy(page: Page) -> None:
+        sel = DETAIL_SELECTORS
+        await page.locator(sel["ad_pub_date"]).first.text_content()
+        await page.locator(sel["user_name"]).first.text_content()
+        if await page.locator(sel["user_score"]).first.is_visible(timeout=1000):
+            await page.locator(sel["user_score"]).first.text_content()
+        await page.locator(sel["user_registration"]).first.text_content()
+        if await page.locator(sel["user_last_seen"]).first.is_visible(timeout=100):
+            await page.locator(sel["user_last_seen"]).first.text_content()
+        await (
+            page.locator(sel["map_overlay"])
+            .locator("..")
+            .locator("svg + div *")
+            .all_text_contents()
+        )
+        block = page.locator(sel["photo_block"])
+        if await block.first.is_visible(timeout=1000):
+            for img in await block.locator("img").all():
+                if await img.get_attribute("src"):
+                    await img.get_attribute("src")
+        if await page.locator(sel["ad_tags"]).first.is_visible(timeout=1000):
+            await page.locator(sel["ad_tags"]).all_text_contents()
+        await page.locator(sel["description"]).all_text_contents()
+        await page.locator(sel["ad_id"]).first.text_content()
+        if await page.locator(sel["ad_view_counter"]).is_visible(timeout=3000):
+            await page.locator(sel["ad_view_counter"]).text_content()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        await page.set_content(BENCHMARK_HTML)
+        for name, extract in (
+            ("locators", legacy),
+            ("evaluate", lambda pg: extract_ad_fields(pg, DETAIL_SELECTORS)),
+        ):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                await extract(page)
+            elapsed = (time.perf_counter() - started) / iterations
+            print(f"{name:>9}: {elapsed * 1000:8.2f} ms/ad")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(benchmark())
@@ -1,15 +1,16 @@
 import json
-import re
+import math
 import time
-from datetime import datetime, timedelta
-from pathlib import Path
+from dataclasses import replace
 from typing import Iterator, AsyncGenerator, Any, Optional
 
 import scrapy
 from scrapy import signals
 from scrapy.http.response import Response
 from scrapy.selector.unified import SelectorList
+from scrapy.spidermiddlewares.httperror import HttpError
 from scrapy.crawler import Crawler
+from scrapy.utils.defer import deferred_from_coro
 from decouple import config
 from playwright.async_api import (
     Browser,
@@ -22,13 +23,42 @@ from playwright.async_api import (
 
 from ..items import OlxScraperItem
 from ..pipelines import PostgresPipeline
+from ..utils.canonical import ad_id_from_url, ad_key, canonical_ad_url
+from ..utils.change_detection import card_date, card_fingerprint
+from ..utils.parse_date import format_date_uk, parse_date
+from ..utils.placeholders import NO_PHONE, NO_PHOTOS, NO_SCORE, NO_TAGS, NO_VIEWS
+from ..utils.proxy_pool import ProxyPool, ProxyPoolExhausted
+from ..utils.prerendered_state import (
+    ad_to_item_fields,
+    is_promoted,
+    detail_ad,
+    extract_prerendered_state,
+    listing_ads,
+    listing_total,
+)
+from ..utils.query_planner import (
+    NEWEST_FIRST,
+    ORDER_FILTER,
+    QueryPlanner,
+    QueryShard,
+    ShardCountCache,
+    parse_result_count,
+)
+from ..utils.category_catalog import load_catalog
 from ..utils.url_factory import UrlBuilderFactory
+from .context_pool import ContextPool, ContextSlot
+from .session_pool import Session, SessionPool
+from .dom_extractor import AdDetailFields, extract_ad_fields
+from .phone_api import PhoneApiClient, PhoneApiError
+from .throttle import BlockedError, ThrottleController
 from .playwright_helpers import (
     check_403_error,
-    scroll_to_number_of_views,
     scroll_and_click_to_show_phone,
-    wait_for_number_of_views,
-    login_olx,
+    wait_for_ad_sections,
+    AdTimeBudget,
+    StepTimer,
+    playwright_cookies_to_scrapy,
+    ResourceBlocker,
 )
 
 
@@ -37,17 +67,26 @@ OLX_URL = "https://www.olx.ua/"
 OLX_EMAIL = config("OLX_EMAIL")
 OLX_PASSWORD = config("OLX_PASSWORD")
 
-# path to the root of the project
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
-STATE_FILE = PROJECT_ROOT / "state.json"
-# Check that state.json exist else None
-storage_state_path = str(STATE_FILE) if STATE_FILE.exists() else None
+# Options of every BrowserContext (storage state is added per context)
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "viewport": {"width": 1920, "height": 1080},
+    "java_script_enabled": True,
+    "timezone_id": "Europe/Kiev",
+    "locale": "uk-UA",
+    "extra_http_headers": {
+        "Accept-Language": "uk-UA,uk;q=0.9",
+        "Referer": f"{OLX_URL}",
+    },
+}
 
 # ADS LIST PAGE
 ADS_BLOCK_SELECTOR = 'div[data-testid="l-card"]'
 AD_TITLE_URL_SELECTOR = ' div[data-cy="ad-card-title"] a'
 AD_TITLE_SELECTOR = ' div[data-cy="ad-card-title"] a > h4'
 AD_PRICE_SELECTOR = ' p[data-testid="ad-price"]'
+# "ТОП" badge of promoted cards, shown on every list page of a query
+AD_PROMOTED_SELECTOR = ' div[data-testid="adCard-featured"]'
 AD_LOCATION_AND_DATE_SELECTOR = ' p[data-testid="location-date"]'
 
 # AD DETAIL PAGE
@@ -74,6 +113,21 @@ FOOTER_BAR_SELECTOR = 'div[data-testid="ad-footer-bar-section"]'
 AD_ID_SELECTOR = 'div[data-testid="ad-footer-bar-section"] > span'
 AD_VIEW_COUNTER_SELECTOR = 'span[data-testid="page-view-counter"]'
 
+# Selectors of the fields collected in one page.evaluate (see dom_extractor)
+DETAIL_SELECTORS = {
+    "ad_pub_date": AD_PUB_DATE_SELECTOR,
+    "user_name": USER_NAME_SELECTOR,
+    "user_score": USER_SCORE_SELECTOR,
+    "user_registration": USER_REGISTRATION_SELECTOR,
+    "user_last_seen": USER_LAST_SEEN_SELECTOR,
+    "map_overlay": MAP_OVERLAY_SELECTOR,
+    "photo_block": BLOCK_WITH_PHOTO_SELECTOR,
+    "ad_tags": AD_TAGS_SELECTOR,
+    "description": DESCRIPTION_PARTS_SELECTOR,
+    "ad_id": AD_ID_SELECTOR,
+    "ad_view_counter": AD_VIEW_COUNTER_SELECTOR,
+}
+
 
 class OlxSpider(scrapy.Spider):
     """Scraper for olx.ua/list"""
@@ -102,49 +156,107 @@ class OlxSpider(scrapy.Spider):
         """
         super().__init__(*args, **kwargs)
         self.filters_dict = json.loads(filters) if filters else {}
+        # The whole search as a shard for the query planner (before builders pop "q")
+        self.query = QueryShard(
+            category, location, subcategory_1, subcategory_2, dict(self.filters_dict)
+        )
 
         self.start_page = start_page
         self.end_page = end_page
 
-        # Створюємо генератор URL через фабрику
-        try:
-            self.url_builder = UrlBuilderFactory.get_builder(
-                category=category,
-                location=location,
-                subcategory_1=subcategory_1,
-                subcategory_2=subcategory_2,
-                filters_dict=self.filters_dict,
-            )
-        except ValueError as e:
-            self.logger.error(f"❌ Помилка у фабриці генерації URL: {e}")
-            return
+        # The URL builder is created in from_crawler(), after the category catalog
+        self.catalog = None
+        self.url_builder = None
 
         self.browser = None
         self.context = None
         self.playwright = None
+        self.context_pool: ContextPool | None = None
+        self.use_prerendered_state = True
+        # Incremental mode: newest first, next list page only while new ads appear
+        self.incremental = False
+        self.max_list_page = 0
+        # Keys of ads scheduled for parse_ad during this run
+        self.inflight_ads: set[str] = set()
+        self.fetch_promoted = True
+        # Re-fetch known ads whose list card changed (fingerprints in ad_state)
+        self.detect_changes = True
+        # Phones are revealed later by the olx_phones spider (phone_pending queue)
+        self.defer_phones = False
+        # Query sharding: split searches that exceed the OLX page limit
+        self.planner: QueryPlanner | None = None
+        self.shard_counts: ShardCountCache | None = None
+        self.resource_blocker: ResourceBlocker | None = None
+        self.phone_api: PhoneApiClient | None = None
+        self.throttle: ThrottleController | None = None
+        self.session_pool: SessionPool | None = None
+        # Session cookies of the Playwright context for plain HTTP requests
+        self.http_cookies: list[dict] = []
 
     async def open_spider(self, spider: scrapy.Spider):
         """Start Playwright"""
         self.logger.info("🚀 Starting Playwright...")
         # get PLAYWRIGHT_LAUNCH_OPTIONS from settings.py
         self.playwright: Playwright = await async_playwright().start()
-        launch_options = spider.settings.getdict("PLAYWRIGHT_LAUNCH_OPTIONS")
-        self.browser: Browser = await self.playwright.chromium.launch(
-            **launch_options,
+        settings = spider.settings
+        browsers = settings.getint("PLAYWRIGHT_BROWSERS", 1)
+        contexts_per_browser = settings.getint("PLAYWRIGHT_CONTEXTS_PER_BROWSER", 1)
+        # Pages per context: explicit PAGE_POOL_SIZE or CONCURRENT_REQUESTS split evenly
+        pages_per_context = settings.getint("PAGE_POOL_SIZE") or math.ceil(
+            settings.getint("CONCURRENT_REQUESTS", 1)
+            / (browsers * contexts_per_browser)
+        )
+        # One proxy per context when PROXY_LIST / PROXY_FILE is configured
+        proxy_pool = ProxyPool.from_settings(settings, self.crawler.stats)
+        if len(proxy_pool):
+            healthy = await proxy_pool.check_all()
+            self.logger.info(f"🌐 {len(healthy)}/{len(proxy_pool)} proxies healthy.")
+            if not healthy:
+                self.proxies_exhausted(ProxyPoolExhausted("no healthy proxies"))
+                return
+        # Saved sessions of OLX_ACCOUNTS, one account per context
+        self.session_pool = SessionPool.from_settings(settings, self.crawler.stats)
+        self.context_pool = ContextPool(
+            self.playwright,
+            launch_options=settings.getdict("PLAYWRIGHT_LAUNCH_OPTIONS"),
+            context_options=CONTEXT_OPTIONS,
+            session_pool=self.session_pool,
+            browsers=browsers,
+            contexts_per_browser=contexts_per_browser,
+            pages_per_context=pages_per_context,
+            max_page_uses=settings.getint("PAGE_POOL_MAX_USES", 50),
+            stats=self.crawler.stats,
+            proxy_pool=proxy_pool if len(proxy_pool) else None,
+        )
+        await self.context_pool.start(self.login_context)
+        # Block images, fonts, trackers... on detail pages (after login)
+        self.resource_blocker = ResourceBlocker(
+            settings.get("PLAYWRIGHT_RESOURCE_PROFILE", "text-only"),
+            stats=self.crawler.stats,
         )
-        self.context: BrowserContext = await self.browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            java_script_enabled=True,
-            timezone_id="Europe/Kiev",
-            locale="uk-UA",
-            extra_http_headers={
-                "Accept-Language": "uk-UA,uk;q=0.9",
-                "Referer": f"{OLX_URL}",
-            },
-            storage_state=storage_state_path,
+        for slot in self.context_pool.slots:
+            await self.resource_blocker.install(slot.context)
+        # The first context and browser are used for list pages
+        first_slot = self.context_pool.get(0)
+        self.browser: Browser = first_slot.browser
+        self.context: BrowserContext = first_slot.context
+        await self.sync_http_cookies()
+        # Detail pages of all contexts share one throttle / circuit breaker
+        self.throttle = ThrottleController.from_crawler(
+            self.crawler, max_concurrency=pages_per_context * self.context_pool.size
+        )
+        # Refresh sessions that are about to expire while the crawl runs
+        self.session_pool.start_refresh(
+            lambda: [(slot.context, slot.session) for slot in self.context_pool.slots],
+            self,
+            on_refresh=self.session_refreshed,
+        )
+        if settings.getbool("PHONE_API_ENABLED", True) and not self.defer_phones:
+            self.phone_api = PhoneApiClient.from_settings(settings, self.crawler.stats)
+        self.logger.info(
+            f"🧩 {browsers} browser(s) × {contexts_per_browser} context(s), "
+            f"{pages_per_context} page(s) per context."
         )
-        await login_olx(self.context, OLX_URL, OLX_EMAIL, OLX_PASSWORD, self)
         if self.context:
             self.logger.info("✅ Playwright started successfully!")
         else:
@@ -152,14 +264,43 @@ class OlxSpider(scrapy.Spider):
                 "❌ Error Playwright! self.context or self.browser = None"
             )
 
+    async def login_context(self, context: BrowserContext, session: Session) -> None:
+        """Validate the saved session of a new context, log in if it is not valid"""
+        await self.session_pool.ensure(context, session, self)
+
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
         """Scrapy passes a `crawler` to give access to the `settings`"""
         spider = super().from_crawler(crawler, *args, **kwargs)
         crawler.signals.connect(spider.open_spider, signal=signals.spider_opened)
         crawler.signals.connect(spider.close_spider, signal=signals.spider_closed)
+        crawler.signals.connect(spider.request_dropped, signal=signals.request_dropped)
         # Зберігаємо crawler в атрибут spider щоб при потребі мати доступ до налаштувань
         spider.crawler = crawler
+        spider.use_prerendered_state = crawler.settings.getbool(
+            "USE_PRERENDERED_STATE", True
+        )
+        spider.fetch_promoted = crawler.settings.getbool("FETCH_PROMOTED_ADS", True)
+        spider.detect_changes = crawler.settings.getbool("CHANGE_DETECTION", True)
+        spider.defer_phones = (
+            crawler.settings.get("PHONE_REVEAL_MODE", "inline") == "deferred"
+        )
+
+        # Створюємо генератор URL через фабрику
+        # Subcategory slugs come from the cached category catalog when it exists
+        spider.catalog = load_catalog(crawler.settings)
+        UrlBuilderFactory.use_catalog(spider.catalog)
+        try:
+            spider.url_builder = UrlBuilderFactory.get_builder(
+                category=spider.query.category,
+                location=spider.query.location,
+                subcategory_1=spider.query.subcategory_1,
+                subcategory_2=spider.query.subcategory_2,
+                filters_dict=spider.filters_dict,
+            )
+        except ValueError as e:
+            spider.logger.error(f"❌ Помилка у фабриці генерації URL: {e}")
+            raise
 
         # # Start async Playwright
         # asyncio.ensure_future(spider.init_playwright())
@@ -172,6 +313,35 @@ class OlxSpider(scrapy.Spider):
             kwargs.get("end_page", crawler.settings.getint("END_PAGE", 1))
         )
 
+        spider.incremental = crawler.settings.getbool("INCREMENTAL_MODE")
+        if spider.incremental:
+            # Newest ads first; further pages are requested lazily from parse()
+            spider.url_builder.filters[ORDER_FILTER] = NEWEST_FIRST
+            spider.query = replace(
+                spider.query,
+                filters={**spider.query.filters, ORDER_FILTER: NEWEST_FIRST},
+            )
+            spider.max_list_page = spider.start_page + max(
+                0, crawler.settings.getint("INCREMENTAL_MAX_PAGES", 25) - 1
+            )
+
+        if crawler.settings.getbool("QUERY_SHARDING"):
+            # Pages are planned per shard in start_requests(); in incremental
+            # mode every shard is paginated lazily and stops on its own
+            spider.planner = QueryPlanner.from_settings(
+                crawler.settings, catalog=spider.catalog
+            )
+            spider.shard_counts = ShardCountCache(
+                crawler.settings.get("SHARDING_CACHE_FILE", "shard_counts.json"),
+                ttl=crawler.settings.getfloat("SHARDING_CACHE_TTL", 6 * 3600),
+            )
+            spider.start_urls = []
+            return spider
+
+        if spider.incremental:
+            spider.start_urls = [spider.url_builder.build_url(page=spider.start_page)]
+            return spider
+
         # Створюємо `start_urls` тільки після оновлення `start_page` та `end_page`
         spider.start_urls = [
             spider.url_builder.build_url(page=i)  # type: ignore
@@ -193,14 +363,121 @@ class OlxSpider(scrapy.Spider):
 
     def start_requests(self) -> Iterator[scrapy.Request]:
         """Override start_requests to include Playwright meta"""
-        for url in self.start_urls:
+        if self.planner:
+            yield from self.plan_shard(self.query)
+            return
+        for page, url in enumerate(self.start_urls, start=self.start_page):
             self.logger.debug(f"Generating request for URL: {url}")
-            yield scrapy.Request(
+            yield self.list_page_request(url, page)
+
+    def list_page_request(
+        self, url: str, page: int = 1, callback=None, meta: dict | None = None
+    ) -> scrapy.Request:
+        """
+        Request for a page of the ads list.
+
+        List cards are server-rendered, so by default (LIST_PAGES_VIA_HTTP) the
+        page goes through Scrapy's HTTP downloader with the cookies and
+        User-Agent of the Playwright context. Otherwise it is rendered in a
+        browser by scrapy-playwright.
+        """
+        meta = {**(meta or {}), "context": self.context, "list_page": page}
+        if self.settings.getbool("LIST_PAGES_VIA_HTTP", True):
+            proxy = self.context_pool.get(0).proxy
+            if proxy:
+                meta["proxy"] = proxy.url
+            return scrapy.Request(
                 url=url,
-                callback=self.parse,
-                meta={"context": self.context},
+                callback=callback or self.parse,
+                meta=meta,
+                cookies=self.http_cookies,
+                headers={"User-Agent": CONTEXT_OPTIONS["user_agent"]},
                 errback=self.errback_close_page,
             )
+        return scrapy.Request(
+            url=url,
+            callback=callback or self.parse,
+            meta={**meta, "playwright": True},
+            errback=self.errback_close_page,
+        )
+
+    def plan_shard(self, shard: QueryShard) -> Iterator[scrapy.Request]:
+        """
+        Requests covering one shard of the search.
+
+        A shard with a cached count is either paginated or split right away;
+        otherwise its first page is requested and parse_shard() decides.
+        """
+        count = self.shard_counts.get(shard)
+        if count is None:
+            count = self.planner.catalog_count(shard)
+        if count is None:
+            self.crawler.stats.inc_value("sharding/count_requests")
+            yield self.list_page_request(
+                shard.build_url(page=1),
+                1,
+                callback=self.parse_shard,
+                meta={"shard": shard},
+            )
+            return
+        self.crawler.stats.inc_value("sharding/cache_hits")
+        yield from self.schedule_shard(shard, count, first_page=1)
+
+    def schedule_shard(
+        self, shard: QueryShard, count: int, first_page: int
+    ) -> Iterator[scrapy.Request]:
+        """Paginate a shard that fits under the cap, split it otherwise"""
+        children = [] if self.planner.fits(count) else self.planner.split(shard)
+        if children:
+            self.crawler.stats.inc_value("sharding/splits")
+            self.logger.info(
+                f"🔪 {shard.label}: {count} ads > {self.planner.cap}, "
+                f"split into {len(children)} shards"
+            )
+            for child in children:
+                yield from self.plan_shard(child)
+            return
+        if not self.planner.fits(count):
+            # Nothing left to split on: only the first max_pages are reachable
+            self.crawler.stats.inc_value("sharding/truncated")
+            self.logger.warning(f"⚠️ {shard.label}: {count} ads, cannot split further")
+        pages = self.planner.pages(count)
+        self.crawler.stats.inc_value("sharding/shards")
+        if self.incremental:
+            # Further pages of the shard are requested from parse() while new
+            # ads appear (the first page of a counted shard is already parsed)
+            if first_page == 1:
+                yield self.list_page_request(
+                    shard.build_url(page=1),
+                    1,
+                    meta={"shard": shard, "last_page": self.shard_last_page(pages)},
+                )
+            return
+        self.crawler.stats.inc_value("sharding/pages", pages)
+        for page in range(first_page, pages + 1):
+            yield self.list_page_request(shard.build_url(page=page), page)
+
+    def parse_shard(self, response: Response) -> Iterator[scrapy.Request]:
+        """First page of a shard: read the result count, then parse or split"""
+        shard: QueryShard = response.meta["shard"]
+        count = parse_result_count(
+            response.text, listing_total(extract_prerendered_state(response.text))
+        )
+        if count is None:
+            self.logger.warning(f"⚠️ No result count on {response.url}")
+            count = self.planner.cap
+        self.shard_counts.set(shard, count)
+        if not self.planner.fits(count) and self.planner.split(shard):
+            # Children cover the same ads, this page is not needed
+            yield from self.schedule_shard(shard, count, first_page=1)
+            return
+        response.meta["last_page"] = self.shard_last_page(self.planner.pages(count))
+        yield from self.parse(response)
+        yield from self.schedule_shard(shard, count, first_page=2)
+
+    def shard_last_page(self, pages: int) -> int:
+        """Last list page of a shard in incremental mode"""
+        return min(pages, self.max_list_page - self.start_page + 1)
 
     def parse(self, response: Response) -> Iterator[scrapy.Request]:
         """Get all urls"""
@@ -217,15 +494,31 @@ class OlxSpider(scrapy.Spider):
             self.logger.error("❌ PostgresPipeline не знайдено!")
             return
 
-        # Get list existing URL
-        existing_urls = postgres_pipeline.get_existing_urls()
+        # Index of ads already stored in db (loaded once per crawl)
+        known_ads = postgres_pipeline.known_ads
+        card_fingerprints = postgres_pipeline.card_fingerprints
 
-        context = response.meta["context"]
         self.logger.info(f"Parsing response from {response.url}")
+        page: int = response.meta.get("list_page", self.start_page)
         ads_block: SelectorList = response.css(ADS_BLOCK_SELECTOR)
         if not ads_block:
             self.logger.warning(f"No ads found on the page: {response.url}")
+            if self.incremental:
+                self.stop_incremental(response.meta, "no_ads")
             return
+
+        # Card data from the prerendered JSON state, keyed by OLX ad ID
+        state_ads: dict[str | None, dict] = {}
+        if self.use_prerendered_state:
+            state_ads = {
+                ad_id_from_url(state_ad.get("url") or ""): state_ad
+                for state_ad in listing_ads(extract_prerendered_state(response.text))
+            }
+        new_ads = 0
+        # Known cards in a row, carried over the pages of one (shard) query
+        known_streak: int = response.meta.get("known_streak", 0)
+        stop_after_known = self.settings.getint("INCREMENTAL_STOP_AFTER_KNOWN", 0)
+        stats = self.crawler.stats
         for ad in ads_block[:]:
             self.logger.debug(f"Ad block found: {ad.get()[:100]}")
             ad_link: str | None = (
@@ -234,176 +527,408 @@ class OlxSpider(scrapy.Spider):
             if not ad_link:
                 continue
 
-            full_url: str = response.urljoin(ad_link)
-            if "/d/uk/" not in full_url:
-                full_url = full_url.replace("/d/", "/d/uk/")
-            if full_url in existing_urls:
-                self.logger.info(f"⏩ URL вже в базі, пропускаємо: {full_url}")
-                continue
-            self.logger.info(f"Collected URL: {full_url}")
+            # One URL per ad whatever slug, language or query string the card has
+            full_url: str = canonical_ad_url(response.urljoin(ad_link))
+            state_ad = state_ads.get(ad_id_from_url(full_url))
+            # Promoted cards repeat on every page and are not in date order:
+            # they never count towards the known streak or new ads of a page
+            promoted = bool(ad.css(AD_PROMOTED_SELECTOR)) or (
+                state_ad is not None and is_promoted(state_ad)
+            )
+            if promoted:
+                stats.inc_value("dedupe/promoted_cards")
+                if not self.fetch_promoted:
+                    stats.inc_value("dedupe/promoted_skipped")
+                    continue
+            key = ad_key(full_url)
             ad_title: str | None = ad.css(AD_TITLE_SELECTOR).css("::text").get()
             ad_price: str | None = ad.css(AD_PRICE_SELECTOR).css("::text").get()
+            fingerprint = card_fingerprint(
+                ad_title,
+                ad_price,
+                card_date(
+                    " ".join(
+                        ad.css(AD_LOCATION_AND_DATE_SELECTOR).css("::text").getall()
+                    )
+                ),
+            )
+            changed = False
+            if full_url in known_ads:
+                stored = card_fingerprints.get(key)
+                changed = self.detect_changes and stored != fingerprint
+                if not changed:
+                    self.logger.info(f"⏩ URL вже в базі, пропускаємо: {full_url}")
+                    if promoted:
+                        continue
+                    known_streak += 1
+                    if self.incremental and 0 < stop_after_known <= known_streak:
+                        # Sorted by date: everything after the streak is older
+                        self.stop_incremental(response.meta, "known_streak")
+                        return
+                    continue
+                # Ads stored before change detection have no fingerprint yet
+                stats.inc_value(
+                    "change/card_changed"
+                    if stored is not None
+                    else "change/card_unknown"
+                )
+                self.logger.info(f"🔄 Картка змінилась, оновлюємо: {full_url}")
+            if key in self.inflight_ads:
+                # Already scheduled from another page, not committed yet
+                stats.inc_value("dedupe/inflight_skipped")
+                continue
+            self.inflight_ads.add(key)
+            if not promoted and not changed:
+                known_streak = 0
+                new_ads += 1
+            self.logger.info(f"Collected URL: {full_url}")
 
             # Create Item and fill fields
             item: OlxScraperItem = OlxScraperItem()
             item["title"] = ad_title.strip()
             item["price"] = ad_price.strip() if ad_price else None
             item["url"] = full_url.strip()
-            yield scrapy.Request(
-                url=full_url,
-                callback=self.parse_ad,
-                meta={"item": item, "context": context},
-                errback=self.errback_close_page,
+            if state_ad:
+                item.update(ad_to_item_fields(state_ad))
+                item["url"] = full_url.strip()
+            item["card_fingerprint"] = fingerprint
+            yield self.detail_request(full_url, item, refetch=changed)
+
+        if not self.incremental:
+            return
+        shard: QueryShard | None = response.meta.get("shard")
+        if not new_ads:
+            self.stop_incremental(response.meta, "known_page")
+        elif page >= response.meta.get("last_page", self.max_list_page):
+            self.stop_incremental(response.meta, "max_pages")
+        else:
+            url = (shard.build_url if shard else self.url_builder.build_url)(
+                page=page + 1
             )
+            meta = {"known_streak": known_streak}
+            if shard:
+                meta.update(shard=shard, last_page=response.meta["last_page"])
+            yield self.list_page_request(url, page + 1, meta=meta)
+
+    def stop_incremental(self, meta: dict, reason: str) -> None:
+        """
+        Stop the lazy pagination of the incremental mode and record why.
+
+        With QUERY_SHARDING every shard stops on its own: the page counters
+        are summed over shards, the reason and last page are of the last stop.
+        """
+        page = meta.get("list_page", self.start_page)
+        shard: QueryShard | None = meta.get("shard")
+        first_page, last_page = (
+            (1, meta["last_page"]) if shard else (self.start_page, self.max_list_page)
+        )
+        stats = self.crawler.stats
+        stats.set_value("incremental/stop_reason", reason)
+        stats.set_value("incremental/last_page", page)
+        stats.inc_value("incremental/pages_crawled", page - first_page + 1)
+        stats.inc_value("incremental/pages_saved", last_page - page)
+        self.logger.info(
+            f"🏁 Incremental crawl{f' of {shard.label}' if shard else ''} "
+            f"stopped on page {page}: {reason}, {last_page - page} page(s) skipped."
+        )
+
+    def detail_request(
+        self,
+        url: str,
+        item: OlxScraperItem,
+        block_retries: int = 0,
+        refetch: bool = False,
+    ) -> scrapy.Request:
+        """
+        Request for an ad detail page, sent to the least-loaded browser context.
+
+        `refetch` marks a known ad whose card changed: the dupefilter already
+        remembers it, so the request bypasses it.
+        """
+        slot: ContextSlot = self.context_pool.pick()
+        meta = {
+            "item": item,
+            "context": slot.context,
+            "context_slot": slot.index,
+            "block_retries": block_retries,
+        }
+        if slot.proxy:
+            # The HTTP response goes through the same proxy as the page
+            meta["proxy"] = slot.proxy.url
+        return scrapy.Request(
+            url=url,
+            callback=self.parse_ad,
+            meta=meta,
+            errback=self.errback_close_page,
+            dont_filter=refetch or block_retries > 0,
+        )
 
     async def parse_ad(
         self, response: Response
     ) -> AsyncGenerator[OlxScraperItem, None]:
         """Processing the detailed page of the ad"""
+        # The slot was taken in detail_request(): every path must release it
+        slot: ContextSlot = self.context_pool.get(response.meta.get("context_slot"))
         context = response.meta["context"]
         if not context:
             self.logger.error("❌ Playwright context not passed in parse_ad()!")
+            await self.release_slot(slot)
             return
 
-        page = await context.new_page()
+        # Waits while the crawl is paused after a block or concurrency is reduced
+        await self.throttle.acquire()
+        try:
+            page = await slot.page_pool.acquire()
+        except Exception:
+            await self.throttle.release()
+            await self.release_slot(slot)
+            raise
+        page_failed = False
+        api_item: Optional[OlxScraperItem] = None
+        budget = AdTimeBudget(self.settings.getint("AD_TIME_BUDGET_MS", 20_000))
+        timer = StepTimer(self.crawler.stats)
         try:
             start_time = time.time()
-            await page.goto(response.url, wait_until="domcontentloaded")
+            with timer.step("goto"):
+                await page.goto(
+                    response.url,
+                    wait_until="domcontentloaded",
+                    timeout=budget.remaining_ms(),
+                )
             item: OlxScraperItem = response.meta["item"]
 
             await check_403_error(page, response.url, self)
-            await scroll_to_number_of_views(
-                page,
-                FOOTER_BAR_SELECTOR,
-                USER_NAME_SELECTOR,
-                DESCRIPTION_PARTS_SELECTOR,
-                self,
-            )
-            await wait_for_number_of_views(page, AD_VIEW_COUNTER_SELECTOR, self)
-
-            # -- ⬇️ Using variables to improve readability ⬇️ --
-            ad_pub_date_locator = page.locator(AD_PUB_DATE_SELECTOR)
-            user_name_locator = page.locator(USER_NAME_SELECTOR).first
-            user_score_locator = page.locator(USER_SCORE_SELECTOR).first
-            user_registration_locator = page.locator(USER_REGISTRATION_SELECTOR).first
-            user_last_seen_locator = page.locator(USER_LAST_SEEN_SELECTOR).first
-            ad_id_locator = page.locator(AD_ID_SELECTOR).first
-            ad_view_counter_locator = page.locator(AD_VIEW_COUNTER_SELECTOR)
-            contact_phone_locator = page.locator(CONTACT_PHONE_SELECTOR)
-
-            # Ad publication date
-            ad_pub_date = await ad_pub_date_locator.text_content()
-
-            # User profile
-            user_name = await user_name_locator.first.text_content()
-            user_score = (
-                await user_score_locator.first.text_content()
-                if await user_score_locator.first.is_visible(timeout=1000)
-                else "Ще не має рейтингу"
-            )
-            user_registration = await user_registration_locator.text_content()
-            user_last_seen = (
-                await user_last_seen_locator.first.text_content()
-                if await user_last_seen_locator.first.is_visible(timeout=100)
-                else None
-            )
-
-            # Location
-            map_overlay = page.locator(MAP_OVERLAY_SELECTOR)
-            location_section = map_overlay.locator("..")
-            location_parts = await location_section.locator(
-                "svg + div *"
-            ).all_text_contents()
-            location = " ".join(loc.strip() for loc in location_parts if loc)
-
-            # Extracting images
-            block_with_locator = page.locator(BLOCK_WITH_PHOTO_SELECTOR)
-            if await block_with_locator.first.is_visible(timeout=1_000):
-                img_elements = await block_with_locator.locator("img").all()
-                img_urls_list = [
-                    await img.get_attribute("src")
-                    for img in img_elements
-                    if await img.get_attribute("src")
-                ]
-            else:
-                img_urls_list = ["Ad does not have photos"]
-
-            # Extracting tags and description
-            ad_tags_locator = page.locator(AD_TAGS_SELECTOR)
-            ad_tags = (
-                await ad_tags_locator.all_text_contents()
-                if await ad_tags_locator.first.is_visible(timeout=1000)
-                else ["Ad doesnt have tags"]
-            )
-
-            description_parts = await page.locator(
-                DESCRIPTION_PARTS_SELECTOR
-            ).all_text_contents()
-            description = " ".join(part.strip() for part in description_parts if part)
+            self.throttle.record_success(budget.elapsed_ms / 1000)
+            self.context_pool.report(slot, latency=budget.elapsed_ms / 1000)
+
+            # Most fields come from the JSON state of the HTTP response,
+            # the DOM of the page is the fallback
+            state_fields: dict[str, Any] = {}
+            if self.use_prerendered_state:
+                state_ad = detail_ad(extract_prerendered_state(response.text))
+                if state_ad:
+                    state_fields = ad_to_item_fields(state_ad)
+                    state_fields.pop("url", None)
+                    self.crawler.stats.inc_value("prerendered_state/hits")
+                else:
+                    self.crawler.stats.inc_value("prerendered_state/misses")
+
+            # One wait for every section; with the JSON state only the view
+            # counter and the phone button are still needed from the DOM
+            expected = [AD_VIEW_COUNTER_SELECTOR, BTN_SHOW_PHONE_SELECTOR]
+            if not state_fields:
+                expected += [USER_NAME_SELECTOR, DESCRIPTION_PARTS_SELECTOR]
+            with timer.step("wait_sections"):
+                presence = await wait_for_ad_sections(
+                    page,
+                    FOOTER_BAR_SELECTOR,
+                    expected,
+                    budget,
+                    self,
+                    quiet_ms=self.settings.getint("AD_SECTIONS_QUIET_MS", 500),
+                )
 
-            # Extracting ad ID and view counter
-            ad_id = await ad_id_locator.text_content()
+            # All fields in one round-trip, absent elements are not waited for
+            with timer.step("extract"):
+                fields: AdDetailFields = await extract_ad_fields(page, DETAIL_SELECTORS)
+            for field in fields["missing"]:
+                self.crawler.stats.inc_value(f"extractor/missing/{field}")
+            if fields["missing"]:
+                self.logger.debug(
+                    f"Missing fields on {response.url}: {', '.join(fields['missing'])}"
+                )
 
-            ad_view_counter = (
-                await ad_view_counter_locator.text_content()
-                if await ad_view_counter_locator.is_visible(timeout=3_000)
-                else "Ad doesnt have view"
-            )
-            item["ad_pub_date"] = self.parse_date(ad_pub_date)
-            item["user_name"] = user_name.strip() if user_name else None
-            item["user_score"] = user_score if user_score else None
-            item["user_registration"] = (
-                user_registration.strip() if user_registration else None
-            )
+            ad_pub_date = fields["ad_pub_date"]
+            user_last_seen = fields["user_last_seen"]
+            item["ad_pub_date"] = self.parse_date(ad_pub_date) if ad_pub_date else None
+            item["user_name"] = fields["user_name"]
+            item["user_score"] = fields["user_score"] or NO_SCORE
+            item["user_registration"] = fields["user_registration"]
             item["user_last_seen"] = (
                 self.parse_date(user_last_seen)
                 if user_last_seen
                 else self.parse_date("Сьогодні")
             )
-            item["ad_id"] = ad_id
-            item["ad_view_counter"] = ad_view_counter if ad_view_counter else None
-            item["location"] = location.strip() if location else None
-            item["ad_tags"] = ad_tags
-            item["description"] = description if description else None
-            item["img_src_list"] = img_urls_list
-
-            await scroll_and_click_to_show_phone(
-                page,
-                BTN_SHOW_PHONE_SELECTOR,
-                CONTACT_PHONE_SELECTOR,
-                self,
-            )
+            item["ad_id"] = fields["ad_id"]
+            item["ad_view_counter"] = fields["ad_view_counter"] or NO_VIEWS
+            item["location"] = fields["location"]
+            item["ad_tags"] = fields["ad_tags"] or NO_TAGS
+            item["description"] = fields["description"]
+            item["img_src_list"] = fields["img_src_list"] or NO_PHOTOS
+            item.update(state_fields)
+
+            phone_number = NO_PHONE
+            if self.defer_phones:
+                # Stored without the phone, the phone phase reveals it later
+                phone_number = None
+                item["phone_pending"] = bool(presence.get(BTN_SHOW_PHONE_SELECTOR))
+                if item["phone_pending"]:
+                    self.crawler.stats.inc_value("phones/deferred")
+            elif self.phone_api and presence.get(BTN_SHOW_PHONE_SELECTOR):
+                # Revealed after the page and the throttle slot are released:
+                # the API rate limiter must not hold back the rest of the crawl
+                api_item = item
+            if (
+                phone_number == NO_PHONE
+                and api_item is None
+                and presence.get(BTN_SHOW_PHONE_SELECTOR)
+                and not budget.expired
+            ):
+                with timer.step("phone"):
+                    await scroll_and_click_to_show_phone(
+                        page,
+                        BTN_SHOW_PHONE_SELECTOR,
+                        CONTACT_PHONE_SELECTOR,
+                        self,
+                        timeout=budget.remaining_ms(cap=2_000),
+                    )
+                    contact_phone_locator = page.locator(CONTACT_PHONE_SELECTOR)
+                    if await contact_phone_locator.first.is_visible():
+                        phone_number = await contact_phone_locator.first.text_content()
+            elif budget.expired:
+                self.crawler.stats.inc_value("timing/budget_exceeded")
+            timer.record("total", budget.elapsed_ms)
             self.logger.info(
                 f"✅ Loaded {response.url} in {time.time() - start_time:.2f}s"
             )
-            phone_number = (
-                await contact_phone_locator.first.text_content()
-                if await contact_phone_locator.first.is_visible(timeout=2000)
-                else "N/A"
-            )
 
             item["phone_number"] = phone_number
-            self.logger.info(f"📞 Phone number extracted: {phone_number}")
+            if not self.defer_phones and api_item is None:
+                self.logger.info(f"📞 Phone number extracted: {phone_number}")
+            page_bytes, page_blocked = self.resource_blocker.pop_page_metrics(page)
+            self.crawler.stats.max_value("resources/bytes_per_page_max", page_bytes)
+            self.logger.info(
+                f"📦 {page_bytes / 1024:.0f} KiB transferred, "
+                f"{page_blocked} requests blocked."
+            )
             # Save data
-            yield item
+            if api_item is None:
+                yield item
+        except BlockedError as err:
+            page_failed = True
+            backoff = self.throttle.record_block(err.url)
+            self.context_pool.report(slot, blocked=True)
+            self.logger.warning(f"🛑 {err}. Crawl paused for {backoff:.0f}s")
+            retries = response.meta.get("block_retries", 0)
+            if retries < self.settings.getint("THROTTLE_BLOCK_RETRIES", 2):
+                yield self.detail_request(
+                    response.url, response.meta["item"], retries + 1
+                )
         except PlaywrightTimeoutError as err:
+            page_failed = True
+            self.context_pool.report(slot, failed=True)
             self.logger.error(f"⏳ Timeout error while parsing {response.url}: {err}")
         except Exception as e:
+            page_failed = True
             self.logger.error(f"❌ Unexpected error in parse_ad: {e}", exc_info=True)
         finally:
-            await page.close()
+            self.resource_blocker.pop_page_metrics(page)
+            await slot.page_pool.release(page, failed=page_failed)
+            await self.throttle.release()
+            if api_item is None or page_failed:
+                await self.release_slot(slot)
+
+        if api_item is not None and not page_failed:
+            try:
+                await self.reveal_phone(slot, api_item, response.url)
+            finally:
+                await self.release_slot(slot)
+            yield api_item
+
+    async def reveal_phone(
+        self, slot: ContextSlot, item: OlxScraperItem, url: str
+    ) -> None:
+        """Phone of an ad via the phone API; on failure the ad goes to the phone queue"""
+        try:
+            with StepTimer(self.crawler.stats).step("phone_api"):
+                item["phone_number"] = await self.phone_api.fetch(
+                    slot.context, item["ad_id"]
+                )
+            self.logger.info(f"📞 Phone number extracted: {item['phone_number']}")
+        except PhoneApiError as err:
+            self.logger.warning(
+                f"☎️ Phone API failed for {url}: {err}, deferred to the phone queue"
+            )
+            item["phone_number"] = None
+            item["phone_pending"] = True
+            self.crawler.stats.inc_value("phone_api/deferred")
+
+    async def release_slot(self, slot: ContextSlot) -> None:
+        """Finish a request of a context; a context with a retired proxy is rebuilt"""
+        try:
+            new_slot = await self.context_pool.release(slot)
+        except ProxyPoolExhausted as err:
+            self.proxies_exhausted(err)
+            return
+        if not new_slot:
+            return
+        await self.resource_blocker.install(new_slot.context)
+        if new_slot.index == 0:
+            self.browser = new_slot.browser
+            self.context = new_slot.context
+            await self.sync_http_cookies()
+        self.logger.warning(
+            f"🔁 Context {new_slot.index} rebuilt, proxy "
+            f"{slot.proxy.label if slot.proxy else None} -> "
+            f"{new_slot.proxy.label if new_slot.proxy else None}"
+        )
+
+    async def sync_http_cookies(self) -> None:
+        """Copy the login cookies of the list-page context for HTTP list requests"""
+        self.http_cookies = playwright_cookies_to_scrapy(
+            await self.context.cookies(OLX_URL)
+        )
+
+    async def session_refreshed(self, context: BrowserContext) -> None:
+        if context is self.context:
+            await self.sync_http_cookies()
+
+    def proxies_exhausted(self, err: ProxyPoolExhausted) -> None:
+        """No proxy is left: stop the crawl instead of connecting directly"""
+        self.logger.error(f"❌ {err}, stopping the crawl.")
+        self.crawler.engine.close_spider(self, "proxies_exhausted")
+
+    def request_dropped(self, request: scrapy.Request, spider: scrapy.Spider) -> None:
+        """A detail request filtered by the dupefilter gives back its context"""
+        if self.context_pool and "context_slot" in request.meta:
+            # A retiring context may lose its last request here, so it goes
+            # through release_slot(); signal handlers are sync, hence the task
+            slot = self.context_pool.get(request.meta["context_slot"])
+            deferred_from_coro(self.release_slot(slot))
 
     async def close_spider(self, spider):
         """Close Playwright after all"""
         self.logger.info("🛑 Closing Playwright...")
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
+        if self.throttle:
+            self.throttle.close()
+        if self.session_pool:
+            self.session_pool.close()
+        if self.shard_counts:
+            self.shard_counts.save()
+        if self.context_pool:
+            await self.context_pool.close()
 
     async def errback_close_page(self, failure: scrapy.Request) -> None:
         """Handling errors during scraping"""
         meta: Any = failure.request.meta
+        if self.incremental and "list_page" in meta:
+            self.stop_incremental(meta, "list_page_error")
+        slot = None
+        if "context_slot" in meta and self.context_pool:
+            slot = self.context_pool.get(meta["context_slot"])
+        if (
+            self.throttle
+            and failure.check(HttpError)
+            and failure.value.response.status == 403
+        ):
+            backoff = self.throttle.record_block(failure.request.url)
+            if slot:
+                self.context_pool.report(slot, blocked=True)
+            self.logger.warning(
+                f"🛑 HTTP 403 for {failure.request.url}. Crawl paused for {backoff:.0f}s"
+            )
+        if slot:
+            await self.release_slot(slot)
         if "playwright_page" in meta:
             page: Any = meta.get("page")
             if not page:
@@ -424,56 +949,10 @@ class OlxSpider(scrapy.Spider):
                     f"Failed to close page for {failure.request.url}: {e}"
                 )
 
-    def parse_date(self, input_str) -> str:
+    def parse_date(self, input_str: str) -> str | None:
         """Parse a string with a date and returns it in the '15 січня 2025 р.' format."""
-        today: datetime = datetime.now()
-        months_uk: dict[int, str] = {
-            1: "січня",
-            2: "лютого",
-            3: "березня",
-            4: "квітня",
-            5: "травня",
-            6: "червня",
-            7: "липня",
-            8: "серпня",
-            9: "вересня",
-            10: "жовтня",
-            11: "листопада",
-            12: "грудня",
-        }
-        if input_str.startswith("Сьогодні"):
-            full_date: str = today.strftime(f"%d {months_uk[today.month]} %Y р.")
-        elif input_str.startswith("Онлайн вчора"):
-            yesterday = today - timedelta(days=1)
-            full_date: str = yesterday.strftime(
-                f"%d {months_uk[yesterday.month]} %Y р."
-            )
-        elif input_str.startswith("Онлайн в "):
-            full_date: str = today.strftime(f"%d {months_uk[today.month]} %Y р.")
-        elif input_str.startswith("Онлайн "):
-            input_str = input_str[len("Онлайн ") :]
-            match: re.Match[str] | None = re.match(
-                r"(\d{1,2}) ([а-яіїє]+) (\d{4}) р.", input_str
-            )
-            if not match:
-                self.logger.warning("Некоректний формат дати: %s", input_str)
-                return ""
-            day: str = match.group(1).zfill(2)
-            month: str = match.group(2)
-            year: str = match.group(3)
-            if month not in months_uk.values():
-                self.logger.warning("Некоректний місяць у даті: %s", month)
-            full_date = f"{day} {month} {year} р."
-        else:
-            match: re.Match[str] | None = re.match(
-                r"(\d{1,2}) ([а-яіїє]+) (\d{4}) р.", input_str
-            )
-            if not match:
-                self.logger.warning("Некоректний формат дати: %s", input_str)
-            day: str | Any = match.group(1).zfill(2)
-            month: str | Any = match.group(2)
-            year: str = match.group(3)
-            if month not in months_uk.values():
-                self.logger.warning("Некоректний місяць у даті: %s", month)
-            full_date = f"{day} {month} {year} р."
-        return full_date
+        parsed = parse_date(input_str)
+        if parsed is None:
+            self.logger.warning("Некоректний формат дати: %s", input_str)
+            return None
+        return format_date_uk(parsed)
@@ -0,0 +1,115 @@
+"""
+Pool of Playwright pages reused by parse_ad.
+
+A new page (renderer) per ad costs tens to hundreds of milliseconds, so pages
+are taken from the pool, reset after use (about:blank, no page routes) and
+put back. Event listeners are set on the context (ResourceBlocker), not on
+the page, so they need no reset.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from playwright.async_api import BrowserContext, Page
+
+BLANK_URL = "about:blank"
+
+
+class PagePool:
+    """
+    Bounded pool of reusable pages of one BrowserContext.
+
+    At most `size` pages are checked out at the same time. A page is recycled
+    (closed and replaced later) after `max_uses` navigations or after an error.
+
+    Stats: page_pool/hits, misses, recycled, reset_errors, wait_time_total,
+    wait_time_max.
+    """
+
+    def __init__(
+        self,
+        context: BrowserContext,
+        size: int,
+        max_uses: int = 50,
+        stats: Any = None,
+    ):
+        self.context = context
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.stats = stats
+        self._idle: list[Page] = []
+        self._uses: dict[Page, int] = {}
+        self._semaphore = asyncio.Semaphore(self.size)
+
+    async def acquire(self) -> Page:
+        """Check out a page; waits while all `size` pages are busy."""
+        started = time.monotonic()
+        await self._semaphore.acquire()
+        waited = time.monotonic() - started
+        self._inc("page_pool/wait_time_total", round(waited, 4))
+        self._max("page_pool/wait_time_max", round(waited, 4))
+
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                self._inc("page_pool/hits")
+                return page
+            self._uses.pop(page, None)
+
+        self._inc("page_pool/misses")
+        try:
+            page = await self.context.new_page()
+        except Exception:
+            self._semaphore.release()
+            raise
+        self._uses[page] = 0
+        return page
+
+    async def release(self, page: Page, failed: bool = False) -> None:
+        """Return a page to the pool, or close it if it is worn out or broken."""
+        try:
+            uses = self._uses.get(page, 0) + 1
+            if failed or uses >= self.max_uses or page.is_closed():
+                await self._discard(page)
+                return
+            try:
+                await self._reset(page)
+            except Exception:
+                self._inc("page_pool/reset_errors")
+                await self._discard(page)
+                return
+            self._uses[page] = uses
+            self._idle.append(page)
+        finally:
+            self._semaphore.release()
+
+    async def _reset(self, page: Page) -> None:
+        """Bring a page back to a clean state before the next checkout."""
+        await page.unroute_all(behavior="ignoreErrors")
+        await page.goto(BLANK_URL)
+
+    async def _discard(self, page: Page) -> None:
+        self._inc("page_pool/recycled")
+        self._uses.pop(page, None)
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Close all idle pages (call before closing the context)."""
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                await page.close()
+        self._uses.clear()
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
+
+    def _max(self, key: str, value: float) -> None:
+        if self.stats is not None:
+            self.stats.max_value(key, value)
@@ -0,0 +1,159 @@
+"""
+Seller phones straight from the OLX API instead of clicking the button.
+
+The "Show phone" button only sends an XHR to
+``/api/v1/offers/<id>/limited-phones/`` with the session token. The same
+request is made through ``context.request`` (the context cookies are sent
+automatically) without scrolling, clicking or waiting for rendering. Calls
+have their own rate and concurrency limits: OLX limits this endpoint hardest.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Optional
+
+from playwright.async_api import BrowserContext, Error as PlaywrightError
+
+OLX_URL = "https://www.olx.ua/"
+PHONE_API_URL = OLX_URL + "api/v1/offers/{ad_id}/limited-phones/"
+# Cookie with the OAuth token the site itself sends as a Bearer header
+ACCESS_TOKEN_COOKIE = "access_token"
+NUMERIC_AD_ID_RE = re.compile(r"\d+")
+
+
+def numeric_ad_id(ad_id: Any) -> Optional[str]:
+    """The numeric offer id from 861234567, "861234567" or "ID: 861234567"."""
+    if ad_id is None:
+        return None
+    match = NUMERIC_AD_ID_RE.search(str(ad_id))
+    return match.group(0) if match else None
+
+
+class PhoneApiError(Exception):
+    """The phone endpoint did not return a phone (HTTP error, limit, no phone)."""
+
+    def __init__(self, reason: str, status: Optional[int] = None):
+        super().__init__(f"{reason} (status={status})" if status else reason)
+        self.reason = reason
+        self.status = status
+
+
+class RateLimiter:
+    """Allows at most `rate` acquisitions per second (evenly spaced)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+            self._next_at = now + self.interval
+
+
+class PhoneApiClient:
+    """
+    Rate-limited client of the OLX phone endpoint.
+
+    All calls share one RateLimiter (`rate` requests per second) and at most
+    `concurrency` requests are in flight. fetch() raises PhoneApiError so the
+    caller can fall back to the click path.
+
+    Stats: phone_api/requests, success, failed/<reason>, rate_limited,
+    latency_total.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        concurrency: int = 2,
+        timeout_ms: int = 10_000,
+        stats: Any = None,
+    ):
+        self.limiter = RateLimiter(rate)
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.timeout_ms = timeout_ms
+        self.stats = stats
+
+    @classmethod
+    def from_settings(cls, settings, stats: Any = None) -> "PhoneApiClient":
+        return cls(
+            rate=settings.getfloat("PHONE_API_RATE", 1.0),
+            concurrency=settings.getint("PHONE_API_CONCURRENCY", 2),
+            timeout_ms=settings.getint("PHONE_API_TIMEOUT_MS", 10_000),
+            stats=stats,
+        )
+
+    async def fetch(self, context: BrowserContext, ad_id: Any) -> str:
+        """
+        Return the first phone of an ad via the authenticated context.
+
+        :param context: BrowserContext with the user session.
+        :param ad_id: Ad ID (a number or a string like "ID: 123").
+        :raises PhoneApiError: if no phone was received.
+        """
+        offer_id = numeric_ad_id(ad_id)
+        if not offer_id:
+            raise PhoneApiError("no_ad_id")
+        headers = {"Accept": "application/json"}
+        token = await self._access_token(context)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        async with self.semaphore:
+            await self.limiter.wait()
+            self._inc("phone_api/requests")
+            started = time.monotonic()
+            try:
+                response = await context.request.get(
+                    PHONE_API_URL.format(ad_id=offer_id),
+                    headers=headers,
+                    timeout=self.timeout_ms,
+                )
+            except PlaywrightError as err:
+                self._fail("network")
+                raise PhoneApiError("network") from err
+            finally:
+                self._inc(
+                    "phone_api/latency_total", round(time.monotonic() - started, 4)
+                )
+
+            if response.status == 429:
+                self._inc("phone_api/rate_limited")
+            if not response.ok:
+                self._fail(f"http_{response.status}")
+                raise PhoneApiError("http", response.status)
+            try:
+                payload = await response.json()
+            except (PlaywrightError, ValueError) as err:
+                self._fail("bad_json")
+                raise PhoneApiError("bad_json", response.status) from err
+
+        phones = ((payload or {}).get("data") or {}).get("phones") or []
+        if not phones:
+            self._fail("no_phone")
+            raise PhoneApiError("no_phone", response.status)
+        self._inc("phone_api/success")
+        return str(phones[0])
+
+    @staticmethod
+    async def _access_token(context: BrowserContext) -> Optional[str]:
+        for cookie in await context.cookies(OLX_URL):
+            if cookie["name"] == ACCESS_TOKEN_COOKIE:
+                return cookie["value"]
+        return None
+
+    def _fail(self, reason: str) -> None:
+        self._inc(f"phone_api/failed/{reason}")
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
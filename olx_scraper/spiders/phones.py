@@ -0,0 +1,302 @@
+"""
+Second phase of phone reveals (olx_phones) for PHONE_REVEAL_MODE = "deferred".
+
+Revealing a phone needs a login and is what gets accounts blocked, so the olx
+spider stores ads without phones and this spider drains the phone_pending
+queue with its own limits (PHONE_PHASE_CONCURRENCY, PHONE_PHASE_RATE) and one
+context per account; an account that got a 403/429 rests for
+PHONE_PHASE_COOLDOWN seconds. Removed ads (404/410, redirect) are detected
+over plain HTTP before any reveal.
+
+Run: scrapy crawl olx_phones [-s PHONE_PHASE_LIMIT=500]
+"""
+
+import asyncio
+import time
+from typing import AsyncGenerator, Iterator, Optional
+
+import psycopg2
+import scrapy
+from scrapy import signals
+from scrapy.http.response import Response
+from playwright.async_api import Error as PlaywrightError, async_playwright
+
+from ..items import PhoneItem
+from ..utils.canonical import ad_id_from_url
+from ..utils.phone_queue import (
+    PURGE_PENDING_SQL,
+    SELECT_PENDING_PHONES_SQL,
+    prepare_phone_queue,
+)
+from ..utils.placeholders import NO_PHONE
+from ..utils.proxy_pool import ProxyPool, ProxyPoolExhausted
+from .context_pool import ContextPool, ContextSlot
+from .olxspider import BTN_SHOW_PHONE_SELECTOR, CONTACT_PHONE_SELECTOR, CONTEXT_OPTIONS
+from .phone_api import PhoneApiClient, PhoneApiError
+from .playwright_helpers import scroll_and_click_to_show_phone
+from .session_pool import Session, SessionPool
+
+# Statuses of a removed or expired ad page
+GONE_STATUSES = [404, 410]
+# Phone API statuses after which the account of the context rests
+RATE_LIMIT_STATUSES = (403, 429)
+CLICK_TIMEOUT_MS = 5_000
+
+
+class PhoneSpider(scrapy.Spider):
+    """Reveal of deferred phones from the phone_pending queue"""
+
+    name = "olx_phones"
+    allowed_domains: list[str] = ["olx.ua"]
+    handle_httpstatus_list = GONE_STATUSES
+    custom_settings = {
+        "ITEM_PIPELINES": {"olx_scraper.pipelines.PhonePipeline": 300},
+        # Ad pages over Scrapy's HTTP downloader, phones through the contexts
+        "DOWNLOAD_HANDLERS": {},
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.playwright = None
+        self.session_pool: Optional[SessionPool] = None
+        self.context_pool: Optional[ContextPool] = None
+        self.phone_api: Optional[PhoneApiClient] = None
+        # Monotonic time until which the account of a context rests, by slot index
+        self.cooldown_until: dict[int, float] = {}
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        settings.set(
+            "CONCURRENT_REQUESTS",
+            settings.getint("PHONE_PHASE_CONCURRENCY", 2),
+            priority="spider",
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.open_spider, signal=signals.spider_opened)
+        crawler.signals.connect(spider.close_spider, signal=signals.spider_closed)
+        settings = crawler.settings
+        spider.limit = int(
+            kwargs.get("limit", settings.getint("PHONE_PHASE_LIMIT", 2000))
+        )
+        spider.max_attempts = settings.getint("PHONE_PHASE_MAX_ATTEMPTS", 3)
+        spider.cooldown = settings.getfloat("PHONE_PHASE_COOLDOWN", 300.0)
+        spider.click_fallback = settings.getbool("PHONE_PHASE_CLICK_FALLBACK", False)
+        return spider
+
+    async def open_spider(self, spider: scrapy.Spider):
+        """Start Playwright with one context per account"""
+        self.logger.info("🚀 Starting Playwright for the phone phase...")
+        settings = spider.settings
+        self.playwright = await async_playwright().start()
+        proxy_pool = ProxyPool.from_settings(settings, self.crawler.stats)
+        if len(proxy_pool):
+            healthy = await proxy_pool.check_all()
+            self.logger.info(f"🌐 {len(healthy)}/{len(proxy_pool)} proxies healthy.")
+            if not healthy:
+                self.proxies_exhausted(ProxyPoolExhausted("no healthy proxies"))
+                return
+        self.session_pool = SessionPool.from_settings(settings, self.crawler.stats)
+        contexts = settings.getint("PHONE_PHASE_CONTEXTS") or len(
+            self.session_pool.sessions
+        )
+        self.context_pool = ContextPool(
+            self.playwright,
+            launch_options=settings.getdict("PLAYWRIGHT_LAUNCH_OPTIONS"),
+            context_options=CONTEXT_OPTIONS,
+            session_pool=self.session_pool,
+            contexts_per_browser=contexts,
+            stats=self.crawler.stats,
+            proxy_pool=proxy_pool if len(proxy_pool) else None,
+        )
+        await self.context_pool.start(self.login_context)
+        self.session_pool.start_refresh(
+            lambda: [(slot.context, slot.session) for slot in self.context_pool.slots],
+            self,
+        )
+        self.phone_api = PhoneApiClient(
+            rate=settings.getfloat("PHONE_PHASE_RATE", 0.5),
+            concurrency=settings.getint("PHONE_PHASE_CONCURRENCY", 2),
+            timeout_ms=settings.getint("PHONE_API_TIMEOUT_MS", 10_000),
+            stats=self.crawler.stats,
+        )
+        self.logger.info(f"✅ {self.context_pool.size} context(s) ready for phones.")
+
+    async def login_context(self, context, session: Session) -> None:
+        await self.session_pool.ensure(context, session, self)
+
+    async def close_spider(self, spider):
+        self.logger.info("🛑 Closing Playwright...")
+        if self.session_pool:
+            self.session_pool.close()
+        if self.context_pool:
+            await self.context_pool.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+    def select_pending(self) -> list[tuple]:
+        """Due ads of the phone_pending queue, oldest first; dead entries are purged."""
+        settings = self.crawler.settings
+        conn = psycopg2.connect(
+            host=settings.get("POSTGRES_URI"),
+            dbname=settings.get("POSTGRES_DB"),
+            user=settings.get("POSTGRES_USER"),
+            password=settings.get("POSTGRES_PASSWORD"),
+        )
+        try:
+            prepare_phone_queue(conn)
+            with conn.cursor() as cursor:
+                cursor.execute(PURGE_PENDING_SQL)
+                purged = cursor.rowcount
+                conn.commit()
+                cursor.execute(SELECT_PENDING_PHONES_SQL, {"limit": self.limit})
+                pending = cursor.fetchall()
+        finally:
+            conn.close()
+        if purged:
+            self.logger.info(f"🧹 {purged} queue entries of inactive ads purged.")
+            self.inc_stat("phones/purged", purged)
+        return pending
+
+    def start_requests(self) -> Iterator[scrapy.Request]:
+        pending = self.select_pending()
+        self.logger.info(f"☎️ {len(pending)} phones to reveal.")
+        if self.crawler.stats is not None:
+            self.crawler.stats.set_value("phones/selected", len(pending), spider=self)
+        for ad_id, url, attempts in pending:
+            yield scrapy.Request(
+                url,
+                callback=self.parse,
+                errback=self.errback,
+                dont_filter=True,
+                meta={"ad_id": ad_id, "attempts": attempts},
+            )
+
+    async def parse(self, response: Response) -> AsyncGenerator[PhoneItem, None]:
+        ad_id = response.meta["ad_id"]
+        if response.status in GONE_STATUSES or not ad_id_from_url(response.url):
+            # Removed ad: deactivated, leaves the queue without spending the quota
+            self.inc_stat("phones/gone")
+            yield PhoneItem(ad_id=ad_id, is_active=False)
+            return
+
+        slot = await self.acquire_slot()
+        try:
+            phone_number, error = await self.reveal(slot, ad_id, response.url)
+        finally:
+            await self.release_slot(slot)
+        yield self.result(response.meta, phone_number, error)
+
+    def errback(self, failure) -> Iterator[PhoneItem]:
+        self.logger.warning(f"⚠️ Failed to load {failure.request.url}: {failure.value}")
+        yield self.result(failure.request.meta, None, "download")
+
+    def result(
+        self, meta: dict, phone_number: Optional[str], error: Optional[str]
+    ) -> PhoneItem:
+        """Item for PhonePipeline; the last failed attempt stores "N/A"."""
+        if phone_number:
+            self.inc_stat("phones/revealed")
+        elif meta["attempts"] + 1 >= self.max_attempts:
+            self.inc_stat("phones/gave_up")
+            phone_number = NO_PHONE
+        else:
+            self.inc_stat(f"phones/failed/{error}")
+        return PhoneItem(ad_id=meta["ad_id"], phone_number=phone_number, error=error)
+
+    async def reveal(
+        self, slot: ContextSlot, ad_id: str, url: str
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Phone of an ad through the API of the context, the button as an option.
+
+        :return: (phone, or "N/A" if the ad has none; failure reason).
+        """
+        try:
+            phone_number = await self.phone_api.fetch(slot.context, ad_id)
+            self.context_pool.report(slot)
+            return phone_number, None
+        except PhoneApiError as err:
+            if err.reason == "no_phone":
+                return NO_PHONE, None
+            error = f"{err.reason}_{err.status}" if err.status else err.reason
+            if err.status in RATE_LIMIT_STATUSES:
+                self.rest(slot)
+                return None, error
+            if err.status == 401:
+                # Expired session: log the account in again for the next ads
+                await self.session_pool.ensure(slot.context, slot.session, self)
+            self.context_pool.report(slot, failed=True)
+        if self.click_fallback:
+            phone_number = await self.reveal_by_click(slot, url)
+            if phone_number:
+                return phone_number, None
+        return None, error
+
+    async def reveal_by_click(self, slot: ContextSlot, url: str) -> Optional[str]:
+        """The "show phone" button on the ad page, as parse_ad does inline."""
+        page = await slot.page_pool.acquire()
+        page_failed = False
+        try:
+            await page.goto(url, wait_until="domcontentloaded")
+            await scroll_and_click_to_show_phone(
+                page,
+                BTN_SHOW_PHONE_SELECTOR,
+                CONTACT_PHONE_SELECTOR,
+                self,
+                timeout=CLICK_TIMEOUT_MS,
+            )
+            locator = page.locator(CONTACT_PHONE_SELECTOR).first
+            if await locator.is_visible():
+                return await locator.text_content()
+        except PlaywrightError as err:
+            page_failed = True
+            self.logger.warning(f"⚠️ Phone button failed on {url}: {err}")
+        finally:
+            await slot.page_pool.release(page, failed=page_failed)
+        return None
+
+    async def acquire_slot(self) -> ContextSlot:
+        """Least-loaded context whose account is not resting."""
+        while True:
+            now = time.monotonic()
+            ready = [
+                slot
+                for slot in self.context_pool.slots
+                if self.cooldown_until.get(slot.index, 0.0) <= now
+            ]
+            if ready:
+                slot = min(ready, key=lambda s: (s.retiring, s.assigned))
+                slot.assigned += 1
+                return slot
+            await asyncio.sleep(min(self.cooldown_until.values()) - now)
+
+    async def release_slot(self, slot: ContextSlot) -> None:
+        try:
+            new_slot = await self.context_pool.release(slot)
+        except ProxyPoolExhausted as err:
+            self.proxies_exhausted(err)
+            return
+        if new_slot:
+            self.logger.warning(f"🔁 Context {new_slot.index} rebuilt.")
+
+    def proxies_exhausted(self, err: ProxyPoolExhausted) -> None:
+        """No proxy is left: stop the crawl instead of connecting directly"""
+        self.logger.error(f"❌ {err}, stopping the crawl.")
+        self.crawler.engine.close_spider(self, "proxies_exhausted")
+
+    def rest(self, slot: ContextSlot) -> None:
+        """Take the account of a rate-limited context out of rotation for a while."""
+        self.cooldown_until[slot.index] = time.monotonic() + self.cooldown
+        self.context_pool.report(slot, blocked=True)
+        self.inc_stat("phones/cooldowns")
+        self.logger.warning(
+            f"🛑 Phone limit for {slot.session.key}, resting {self.cooldown:.0f}s."
+        )
+
+    def inc_stat(self, key: str, count: int = 1) -> None:
+        if self.crawler.stats is not None:
+            self.crawler.stats.inc_value(key, count, spider=self)
@@ -1,17 +1,24 @@
 """
 Модуль для взаємодії з Playwright у Scrapy.
 Містить допоміжні функції для перевірки помилки 403,
-паузи виконання скрипта, скролінгу та кліків на елементах сторінки.
+паузи виконання скрипта, скролінгу та кліків на елементах сторінки,
+а також профілі блокування зайвих мережевих ресурсів.
 """
 
 import asyncio
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import scrapy
 from decouple import config
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright, Page, BrowserContext
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Request, Route
+
+from .throttle import BlockedError
 
 # Data for OLX Login
 OLX_URL = "https://www.olx.ua/"
@@ -25,34 +32,65 @@ STATE_FILE = PROJECT_ROOT / "state.json"
 # Check that state.json exist else None
 storage_state_path = str(STATE_FILE) if STATE_FILE.exists() else None
 
-
-async def check_403_error(
-    page: Page, ad_link: str, spider: scrapy.Spider, timeout: int = 30_000
-) -> None:
+# Third-party analytics, ads and widgets that the scraper never needs
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "criteo.com",
+    "criteo.net",
+    "adnxs.com",
+    "gemius.pl",
+    "tiktok.com",
+    "clarity.ms",
+    "onetrust.com",
+    "cookielaw.org",
+    "ninja.data.olxcdn.com",
+    "tracking.olx-st.com",
+)
+# Map tiles and scripts (location is read from the text next to the map)
+MAP_DOMAINS = ("maps.googleapis.com", "maps.gstatic.com", "tile.openstreetmap.org")
+
+# Named profiles: which resource types and domains are aborted.
+# XHR/fetch to olx.ua is never blocked, the phone reveal depends on it.
+RESOURCE_PROFILES: dict[str, dict] = {
+    "full": {"resource_types": frozenset(), "domains": ()},
+    "text-only": {
+        "resource_types": frozenset({"image", "media", "font"}),
+        "domains": TRACKER_DOMAINS,
+    },
+    # Also drops stylesheets: fastest, but layout-dependent checks may differ
+    "minimal": {
+        "resource_types": frozenset({"image", "media", "font", "stylesheet"}),
+        "domains": TRACKER_DOMAINS + MAP_DOMAINS,
+    },
+}
+
+
+async def check_403_error(page: Page, ad_link: str, spider: scrapy.Spider) -> None:
     """
     Перевіряє сторінку на наявність помилки 403 від CloudFront.
 
-    Якщо на сторінці знайдено заголовок "403 ERROR", функція:
-    логує повідомлення.
-    очікує за замовчуванням 30 секунд.
-    закриває сторінку.
-    піднімає виключення.
+    Сторінка тут не утримується і не закривається: паузу для всього краулу
+    робить ThrottleController, а сторінку повертає в пул parse_ad.
 
-    :param spider: екземпляр scrapy.Spider
     :param page: Екземпляр Playwright Page.
     :param ad_link: URL оголошення для логування.
-    :param timeout: Час очікування перед закриттям сторінки
-    :raises: Якщо виявлено блокування через CloudFront.
+    :param spider: екземпляр scrapy.Spider
+    :raises BlockedError: Якщо виявлено блокування через CloudFront.
     """
     if await page.locator("h1", has_text="403 ERROR").count() > 0:
-        print(f"===== Attention Blocked by CloudFront !!! URL: {ad_link} =====")
         spider.logger.warning(
-            f"===== Attention 403 ERROR detected. Blocked by CloudFront Next request in {timeout} seconds URL: %s =====",
+            "===== Attention 403 ERROR detected. Blocked by CloudFront URL: %s =====",
             ad_link,
         )
-        await page.wait_for_timeout(timeout)
-        await page.close()
-        raise f"===== Blocked by CloudFront. URL: {ad_link} ====="
+        raise BlockedError(ad_link)
 
 
 async def page_pause(page: Page, spider: scrapy.Spider) -> None:
@@ -68,76 +106,157 @@ async def page_pause(page: Page, spider: scrapy.Spider) -> None:
     await page.pause()
 
 
-async def scroll_to_number_of_views(
-    page: Page,
-    footer_bar_selector: str,
-    user_name_selector: str,
-    description_parts_selector: str,
-    spider: scrapy.Spider,
-) -> None:
+class AdTimeBudget:
     """
-    Скролить сторінку до певних елементів, що містять інформацію (наприклад, кількість переглядів).
+    Загальний ліміт часу на обробку одного оголошення.
 
-    Функція виконує наступне:
-    - Очікує появи елемента, що відповідає селектору футер-бару.
-    - Якщо селектор футер-бару не з’являється, логує помилку, закриває сторінку та повертається.
-    - Скролить до елемента футер-бару.
-    - Очікує появи елементів з user_name та description_parts.
-    - Логує успішне завантаження сторінки.
+    Кожен крок бере свій таймаут з залишку бюджету, тому відсутні елементи
+    не можуть накопичувати фіксовані очікування понад ліміт.
+    """
 
-    :param page: Екземпляр Playwright Page.
-    :param footer_bar_selector: Селектор для елемента футер-бару.
-    :param user_name_selector: Селектор для елемента, що містить ім'я користувача.
-    :param description_parts_selector: Селектор для елементів опису оголошення.
-    :param spider: екземпляр scrapy.Spider
+    def __init__(self, total_ms: int):
+        self.total_ms = total_ms
+        self.started = time.monotonic()
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    @property
+    def expired(self) -> bool:
+        return self.elapsed_ms >= self.total_ms
+
+    def remaining_ms(self, cap: int | None = None) -> int:
+        """Time left (at least 1 ms, Playwright treats 0 as "no timeout")."""
+        remaining = max(1, self.total_ms - self.elapsed_ms)
+        return min(remaining, cap) if cap else remaining
+
+
+# Upper bounds (ms) of the step timing histogram buckets
+TIMING_BUCKETS_MS = (100, 250, 500, 1_000, 2_500, 5_000, 10_000)
+
+
+class StepTimer:
     """
-    try:
-        await page.wait_for_selector(footer_bar_selector, timeout=10_000)
-    except PlaywrightTimeoutError as err:
-        spider.logger.error("=== Footer bar selector it's not displayed: %s ===", err)
-        await page.close()
-        return
-    try:
-        spider.logger.info(
-            "-----===== Start to scrolling into Number of Views =====-----"
-        )
-        await page.locator(footer_bar_selector).scroll_into_view_if_needed(
-            timeout=2_000
-        )
-        await page.locator(user_name_selector).first.wait_for(timeout=5_000)
-        await page.locator(description_parts_selector).wait_for(timeout=5_000)
-        spider.logger.info("-----===== Page should have loaded =====-----")
-    except PlaywrightTimeoutError as err:
-        spider.logger.error(
-            "=== Failed to get elements User Name, Description: %s ===", err
+    Гістограма тривалості кроків обробки оголошення у статистиці Scrapy.
+
+    Usage: ``with timer.step("goto"): await page.goto(...)``. Stats:
+    timing/<step>/le_<N>ms (bucket counters), timing/<step>/count, total_ms.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, (time.monotonic() - started) * 1000)
+
+    def record(self, name: str, duration_ms: float) -> None:
+        if self.stats is None:
+            return
+        bucket = next(
+            (f"le_{bound}ms" for bound in TIMING_BUCKETS_MS if duration_ms <= bound),
+            "gt_{}ms".format(TIMING_BUCKETS_MS[-1]),
         )
+        self.stats.inc_value(f"timing/{name}/{bucket}")
+        self.stats.inc_value(f"timing/{name}/count")
+        self.stats.inc_value(f"timing/{name}/total_ms", int(duration_ms))
+
+
+# Resolves when all selectors are present, or when the DOM has been quiet
+# for `quietMs` (nothing else is going to render: missing ones are absent),
+# or after `timeoutMs`. One round-trip instead of one wait per element.
+WAIT_FOR_SECTIONS_JS = """
+({selectors, quietMs, timeoutMs}) => new Promise((resolve) => {
+    const present = () => selectors.map((s) => !!document.querySelector(s));
+    let done = false;
+    let quietTimer = null;
+    let hardTimer = null;
+    let observer = null;
+    const finish = (reason) => {
+        if (done) return;
+        done = true;
+        if (observer) observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(hardTimer);
+        resolve({present: present(), reason: reason});
+    };
+    const check = () => {
+        if (present().every(Boolean)) finish("all");
+    };
+    const restartQuiet = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish("quiet"), quietMs);
+    };
+    observer = new MutationObserver(() => {
+        check();
+        restartQuiet();
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true,
+    });
+    hardTimer = setTimeout(() => finish("timeout"), timeoutMs);
+    restartQuiet();
+    check();
+})
+"""
 
 
-async def wait_for_number_of_views(
+async def wait_for_ad_sections(
     page: Page,
-    ad_view_counter_selector: str,
+    footer_bar_selector: str,
+    expected_selectors: list[str],
+    budget: AdTimeBudget,
     spider: scrapy.Spider,
-) -> None:
+    quiet_ms: int = 500,
+) -> dict[str, bool]:
     """
-    Очікує на відображення кількості переглядів.
+    Чекає на секції сторінки оголошення одним очікуванням замість серії таймаутів.
 
     Функція виконує наступне:
-    - Очікує появи елемента, що відповідає кількість переглядів.
+    - Очікує появи футер-бару (в межах бюджету) і скролить до нього, щоб
+      запустити lazy-рендеринг секцій з користувачем та переглядами.
+    - Одним викликом очікує, поки з'являться всі очікувані елементи або DOM
+      перестане змінюватися (тоді відсутні елементи вважаються відсутніми).
 
     :param page: Екземпляр Playwright Page.
-    :param ad_view_counter_selector: Селектор для кількості переглядів.
+    :param footer_bar_selector: Селектор футер-бару (останньої секції сторінки).
+    :param expected_selectors: Селектори елементів, які потрібні далі.
+    :param budget: Бюджет часу оголошення.
     :param spider: екземпляр scrapy.Spider
+    :param quiet_ms: Скільки мс без змін DOM означає, що сторінка дорендерилась.
+    :return: Словник {селектор: чи присутній елемент}.
     """
     try:
-        await page.wait_for_selector(ad_view_counter_selector, timeout=3_000)
-    except PlaywrightTimeoutError as err:
-        spider.logger.warning(
-            "=== The expectation for the number of views was not successful: %s ===",
-            err,
+        await page.wait_for_selector(
+            footer_bar_selector, timeout=budget.remaining_ms(cap=10_000)
         )
-        return
-    spider.logger.info("=== Number of views received ===")
-    return
+        await page.locator(footer_bar_selector).scroll_into_view_if_needed(
+            timeout=budget.remaining_ms(cap=2_000)
+        )
+    except PlaywrightTimeoutError as err:
+        spider.logger.error("=== Footer bar selector it's not displayed: %s ===", err)
+        return {selector: False for selector in expected_selectors}
+
+    result = await page.evaluate(
+        WAIT_FOR_SECTIONS_JS,
+        {
+            "selectors": expected_selectors,
+            "quietMs": quiet_ms,
+            "timeoutMs": budget.remaining_ms(),
+        },
+    )
+    presence = dict(zip(expected_selectors, result["present"]))
+    spider.logger.info(
+        "=== Sections ready (%s), absent: %s ===",
+        result["reason"],
+        [selector for selector, found in presence.items() if not found] or "none",
+    )
+    return presence
 
 
 async def scroll_and_click_to_show_phone(
@@ -145,6 +264,7 @@ async def scroll_and_click_to_show_phone(
     btn_show_phone_selector: str,
     contact_phone_selector: str,
     spider: scrapy.Spider,
+    timeout: int = 2_000,
 ) -> None:
     """
     Скролить сторінку до кнопки "Показати телефон" та виконує клік по ній.
@@ -161,24 +281,25 @@ async def scroll_and_click_to_show_phone(
     :param btn_show_phone_selector: Селектор для кнопки "Показати телефон".
     :param contact_phone_selector: Селектор для елемента, що містить контактний телефон.
     :param spider: екземпляр scrapy.Spider
+    :param timeout: Таймаут кожного кроку (мс), зазвичай залишок бюджету оголошення.
     :return: None
     """
     try:
         spider.logger.info("=== Start to scrolling into show phone button ===")
-        await page.locator(btn_show_phone_selector).wait_for(timeout=2_000)
+        await page.locator(btn_show_phone_selector).wait_for(timeout=timeout)
     except PlaywrightTimeoutError as err:
         spider.logger.warning(
             "===The 'Show phone' button is not displayed: %s ===", err
         )
         return
     await page.locator(btn_show_phone_selector).scroll_into_view_if_needed(
-        timeout=2_000
+        timeout=timeout
     )
     spider.logger.info("=== End to scrolling into show phone button ===")
-    await page.click(btn_show_phone_selector, timeout=2_000)
+    await page.click(btn_show_phone_selector, timeout=timeout)
     spider.logger.info("=== The “Show phone” button was clicked ===")
     try:
-        await page.locator(contact_phone_selector).last.wait_for(timeout=2_000)
+        await page.locator(contact_phone_selector).last.wait_for(timeout=timeout)
         spider.logger.info("=== The phone has been displayed successfully ===")
     except PlaywrightTimeoutError:
         spider.logger.warning(
@@ -188,6 +309,102 @@ async def scroll_and_click_to_show_phone(
     return
 
 
+class ResourceBlocker:
+    """
+    Aborts unneeded requests of a BrowserContext according to a named profile.
+
+    Installed on the context (not the page), so pooled pages keep it after
+    their own routes are reset. Counts blocked requests and transferred bytes
+    (encoded body and headers from Request.sizes(), so chunked responses count
+    too) per page and in the Scrapy stats (resources/*). Counters of a page
+    are dropped when it closes, e.g. login or phone fallback pages.
+    """
+
+    def __init__(self, profile: str = "text-only", stats=None):
+        if profile not in RESOURCE_PROFILES:
+            raise ValueError(
+                f"Unknown resource profile {profile!r}, "
+                f"choose one of: {', '.join(RESOURCE_PROFILES)}"
+            )
+        self.profile = profile
+        self.resource_types = RESOURCE_PROFILES[profile]["resource_types"]
+        self.domains = RESOURCE_PROFILES[profile]["domains"]
+        self.stats = stats
+        self.page_bytes: dict[Page, int] = {}
+        self.page_blocked: dict[Page, int] = {}
+
+    async def install(self, context: BrowserContext) -> None:
+        context.on("requestfinished", self.on_request_finished)
+        context.on("page", lambda page: page.on("close", self.forget_page))
+        if self.resource_types or self.domains:
+            await context.route("**/*", self.handle_route)
+
+    def should_block(self, request: Request) -> bool:
+        if request.resource_type in self.resource_types:
+            return True
+        host = urlsplit(request.url).hostname or ""
+        return any(
+            host == domain or host.endswith("." + domain) for domain in self.domains
+        )
+
+    async def handle_route(self, route: Route) -> None:
+        request = route.request
+        if not self.should_block(request):
+            await route.fallback()
+            return
+        self._inc("resources/blocked")
+        self._inc(f"resources/blocked/{request.resource_type}")
+        page = self._page_of(request)
+        if page is not None and not page.is_closed():
+            self.page_blocked[page] = self.page_blocked.get(page, 0) + 1
+        await route.abort("blockedbyclient")
+
+    async def on_request_finished(self, request: Request) -> None:
+        try:
+            sizes = await request.sizes()
+        except PlaywrightError:
+            # The page or context was closed before the sizes were read
+            return
+        size = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        self._inc("resources/bytes", size)
+        page = self._page_of(request)
+        if page is not None and not page.is_closed():
+            self.page_bytes[page] = self.page_bytes.get(page, 0) + size
+
+    def pop_page_metrics(self, page: Page) -> tuple[int, int]:
+        """Return (bytes transferred, requests blocked) for a page and reset them."""
+        return self.page_bytes.pop(page, 0), self.page_blocked.pop(page, 0)
+
+    def forget_page(self, page: Page) -> None:
+        self.pop_page_metrics(page)
+
+    @staticmethod
+    def _page_of(request: Request):
+        try:
+            return request.frame.page
+        except Exception:
+            # Service worker requests do not belong to a frame
+            return None
+
+    def _inc(self, key: str, value: int = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
+
+
+def playwright_cookies_to_scrapy(cookies: list[dict]) -> list[dict]:
+    """Convert BrowserContext.cookies() into the format of scrapy.Request(cookies=...)."""
+    return [
+        {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "domain": cookie.get("domain"),
+            "path": cookie.get("path", "/"),
+            "secure": cookie.get("secure", False),
+        }
+        for cookie in cookies
+    ]
+
+
 # LOGIN OLX
 
 
@@ -232,8 +449,9 @@ async def login_olx(
     olx_email: str,
     olx_password: str,
     spider: scrapy.Spider = None,
+    state_path: Path = STATE_FILE,
 ) -> None:
-    """Logs in to OLX using Playwright and saves the session"""
+    """Logs in to OLX using Playwright and saves the session to state_path"""
     page = await context.new_page()
     await page.evaluate("navigator.webdriver = undefined")
     await page.goto(olx_url, wait_until="domcontentloaded")
@@ -268,7 +486,7 @@ async def login_olx(
 
     finally:
         # Save browser state
-        await context.storage_state(path=STATE_FILE)
+        await context.storage_state(path=state_path)
         await page.close()
 
 
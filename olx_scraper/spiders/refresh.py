@@ -0,0 +1,237 @@
+"""
+Lightweight refresh spider (olx_refresh) for ads already stored in ``ads``.
+
+Price, views and liveness need no login, scrolling or phone reveal, so ad
+pages are fetched by Scrapy's HTTP downloader at high concurrency. Stale
+active ads (REFRESH_MIN_AGE) are ordered by a score computed in SQL: long
+unchecked, fresh and often changing ads go first. A 404/410 or a redirect
+marks an ad inactive; RefreshPipeline writes only changed rows in batches.
+
+Run: scrapy crawl olx_refresh [-s REFRESH_LIMIT=5000]
+"""
+
+import json
+from typing import Any, Iterator, Optional
+
+import psycopg2
+import scrapy
+from scrapy.http.response import Response
+
+from ..items import AdRefreshItem
+from ..pipelines import PostgresPipeline
+from ..utils.canonical import ad_id_from_url
+from ..utils.normalize import parse_count, parse_price
+from ..utils.prerendered_state import (
+    ad_to_item_fields,
+    detail_ad,
+    extract_prerendered_state,
+    is_active_ad,
+)
+from .phone_api import OLX_URL, numeric_ad_id
+
+# Detail page fallbacks when the prerendered state is missing
+AD_PRICE_SELECTOR = 'div[data-testid="ad-price-container"] h3'
+AD_VIEW_COUNTER_SELECTOR = 'span[data-testid="page-view-counter"]'
+
+# Statuses of a removed or expired ad page
+GONE_STATUSES = [404, 410]
+# The page loads its view counter from this endpoint; the HTML does not carry it
+VIEWS_API_URL = OLX_URL + "api/v1/offers/{offer_id}/page-views/"
+
+# Lower bound of the age weight, so old ads are still refreshed eventually
+MIN_AGE_WEIGHT = 0.1
+# Staleness of ads never checked by this spider (and without a known date)
+UNCHECKED_STALENESS_HOURS = 7 * 24
+
+# Refresh priority (higher first):
+#   staleness hours (since the last check, or since publication, at least
+#   min_age, for ads never checked)
+#   * age weight (MIN_AGE_WEIGHT + 0.5 ^ (age days / half-life))
+#   * (1 + volatility_weight * (changes + 1) / (checks + 2))
+# Volatility is smoothed so that never checked ads do not score 0.
+SELECT_REFRESH_CANDIDATES_SQL = """
+SELECT ad_id, url
+FROM (
+    SELECT ads.ad_id, ads.url,
+        CASE
+            WHEN r.last_checked_at IS NOT NULL
+                THEN extract(epoch FROM now() - r.last_checked_at) / 3600
+            WHEN ads.pub_date IS NOT NULL
+                THEN greatest((current_date - ads.pub_date) * 24, %(min_age)s / 3600.0)
+            ELSE %(unchecked_hours)s
+        END
+        * (%(min_age_weight)s
+            + power(0.5, greatest(current_date - ads.pub_date, 0) / %(half_life_days)s))
+        * (1 + %(volatility_weight)s
+            * (COALESCE(r.changes, 0) + 1)::float / (COALESCE(r.checks, 0) + 2))
+        AS score
+    FROM ads
+    LEFT JOIN ad_refresh r ON r.ad_id = ads.ad_id
+    WHERE ads.is_active
+        AND ads.url IS NOT NULL
+        AND (r.last_checked_at IS NULL
+            OR r.last_checked_at < now() - make_interval(secs => %(min_age)s))
+) candidates
+ORDER BY score DESC
+LIMIT %(limit)s
+"""
+
+
+def views_from_api(payload: Any) -> Optional[int]:
+    """View count of a page-views response: {"data": 12} or {"data": {"views": 12}}."""
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if isinstance(data, dict):
+        data = data.get("views", data.get("ad_views"))
+    return data if isinstance(data, int) else None
+
+
+class RefreshSpider(scrapy.Spider):
+    """Refresh of price, views and liveness of stored ads over plain HTTP"""
+
+    name = "olx_refresh"
+    allowed_domains: list[str] = ["olx.ua"]
+    handle_httpstatus_list = GONE_STATUSES
+    custom_settings = {
+        "ITEM_PIPELINES": {"olx_scraper.pipelines.RefreshPipeline": 300},
+        # Scrapy's HTTP downloader only, no browser is started
+        "DOWNLOAD_HANDLERS": {},
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 0.5,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 8.0,
+    }
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        settings.set(
+            "CONCURRENT_REQUESTS",
+            settings.getint("REFRESH_CONCURRENCY", 16),
+            priority="spider",
+        )
+        settings.set(
+            "DOWNLOAD_DELAY",
+            settings.getfloat("REFRESH_DOWNLOAD_DELAY", 0.0),
+            priority="spider",
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.min_age = settings.getint("REFRESH_MIN_AGE", 6 * 3600)
+        spider.limit = int(kwargs.get("limit", settings.getint("REFRESH_LIMIT", 5000)))
+        spider.half_life_days = settings.getfloat("REFRESH_AGE_HALF_LIFE_DAYS", 14.0)
+        spider.volatility_weight = settings.getfloat("REFRESH_VOLATILITY_WEIGHT", 4.0)
+        spider.views_api = settings.getbool("REFRESH_VIEWS_API", True)
+        return spider
+
+    def select_candidates(self) -> list[tuple]:
+        """(ad_id, url) of stale active ads, highest refresh score first."""
+        settings = self.crawler.settings
+        conn = psycopg2.connect(
+            host=settings.get("POSTGRES_URI"),
+            dbname=settings.get("POSTGRES_DB"),
+            user=settings.get("POSTGRES_USER"),
+            password=settings.get("POSTGRES_PASSWORD"),
+        )
+        try:
+            # The pipeline creates ad_refresh, but only after the spider opens
+            PostgresPipeline.prepare_database(conn)
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    SELECT_REFRESH_CANDIDATES_SQL,
+                    {
+                        "min_age": self.min_age,
+                        "unchecked_hours": UNCHECKED_STALENESS_HOURS,
+                        "min_age_weight": MIN_AGE_WEIGHT,
+                        "half_life_days": self.half_life_days,
+                        "volatility_weight": self.volatility_weight,
+                        "limit": self.limit,
+                    },
+                )
+                return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def start_requests(self) -> Iterator[scrapy.Request]:
+        candidates = self.select_candidates()
+        self.logger.info(f"🔄 {len(candidates)} ads selected for refresh.")
+        if self.crawler.stats is not None:
+            self.crawler.stats.set_value(
+                "refresh/selected", len(candidates), spider=self
+            )
+        # Scrapy's scheduler pops higher priorities first
+        for priority, (ad_id, url) in zip(range(len(candidates), 0, -1), candidates):
+            yield scrapy.Request(
+                url,
+                callback=self.parse,
+                priority=priority,
+                dont_filter=True,
+                meta={"ad_id": ad_id},
+            )
+
+    def parse(self, response: Response) -> Iterator[AdRefreshItem]:
+        ad_id = response.meta["ad_id"]
+        if response.status in GONE_STATUSES or not ad_id_from_url(response.url):
+            # Removed ads answer 404/410 or redirect to a search page
+            yield self.inactive_item(ad_id)
+            return
+
+        ad = detail_ad(extract_prerendered_state(response.text))
+        if ad is not None and not is_active_ad(ad):
+            yield self.inactive_item(ad_id)
+            return
+
+        price: Optional[str] = ad_to_item_fields(ad).get("price") if ad else None
+        if not price:
+            price = response.css(AD_PRICE_SELECTOR).css("::text").get()
+        amount, currency = parse_price(price)
+        item = AdRefreshItem(
+            ad_id=ad_id,
+            price=price.strip() if price else None,
+            price_amount=amount,
+            price_currency=currency,
+            is_active=True,
+        )
+        # The counter is rendered by the browser, in the HTML only occasionally
+        view_counter = response.css(AD_VIEW_COUNTER_SELECTOR).css("::text").get()
+        offer_id = numeric_ad_id(ad["id"] if ad else ad_id)
+        if parse_count(view_counter) is None and self.views_api and offer_id:
+            yield scrapy.Request(
+                VIEWS_API_URL.format(offer_id=offer_id),
+                method="POST",
+                callback=self.parse_views,
+                errback=self.views_failed,
+                dont_filter=True,
+                headers={"Accept": "application/json"},
+                meta={"item": item},
+            )
+            return
+        yield self.with_views(item, view_counter)
+
+    def parse_views(self, response: Response) -> Iterator[AdRefreshItem]:
+        try:
+            views = views_from_api(json.loads(response.text))
+        except ValueError:
+            views = None
+        counter = f"Переглядів: {views}" if views is not None else None
+        yield self.with_views(response.meta["item"], counter)
+
+    def views_failed(self, failure) -> Iterator[AdRefreshItem]:
+        self.logger.debug(f"Views request failed for {failure.request.url}")
+        yield self.with_views(failure.request.meta["item"], None)
+
+    def with_views(
+        self, item: AdRefreshItem, view_counter: Optional[str]
+    ) -> AdRefreshItem:
+        """Add the view counter; a missing one keeps the stored views."""
+        item["ad_view_counter"] = view_counter
+        item["view_count"] = parse_count(view_counter)
+        if item["view_count"] is None and self.crawler.stats is not None:
+            self.crawler.stats.inc_value("refresh/views_missing", spider=self)
+        return item
+
+    def inactive_item(self, ad_id: str) -> AdRefreshItem:
+        if self.crawler.stats is not None:
+            self.crawler.stats.inc_value("refresh/inactive", spider=self)
+        return AdRefreshItem(ad_id=ad_id, is_active=False)
@@ -0,0 +1,339 @@
+"""
+Pool of OLX sessions for several accounts (OLX_ACCOUNTS).
+
+The storage state of each account is kept in sessions/<key>.json, its save
+and last validation times in sessions/index.json. On start a session is
+checked with one light API request instead of loading the home page, and only
+invalid sessions log in through the form. Each context of the pool gets its
+own account, so phone reveal limits are spread across accounts. Sessions
+close to expiry are refreshed in the background.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import scrapy
+from playwright.async_api import BrowserContext, Error as PlaywrightError
+
+from .phone_api import ACCESS_TOKEN_COOKIE, OLX_URL
+from .playwright_helpers import OLX_EMAIL, OLX_PASSWORD, login_olx
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SESSIONS_DIR = PROJECT_ROOT / "sessions"
+# Single-account session file used before the session pool
+LEGACY_STATE_FILE = PROJECT_ROOT / "state.json"
+SESSION_VALIDATE_URL = OLX_URL + "api/v1/users/me/"
+
+
+def parse_accounts(text: str) -> list[tuple[str, str]]:
+    """Accounts as "email:password" separated by commas or new lines."""
+    accounts = []
+    for entry in text.replace(",", "\n").splitlines():
+        email, sep, password = entry.strip().partition(":")
+        if email and sep:
+            accounts.append((email, password))
+    return accounts
+
+
+class Session:
+    """Storage state of one OLX account with freshness timestamps."""
+
+    def __init__(self, email: str, password: str, directory: Path):
+        self.email = email
+        self.password = password
+        key = hashlib.sha1(email.lower().encode()).hexdigest()[:12]
+        self.key = key
+        self.state_path = directory / f"{key}.json"
+        self.saved_at = 0.0
+        self.validated_at = 0.0
+        # State copied from the legacy state.json, its account is not confirmed yet
+        self.seeded = False
+        # Contexts currently using this account
+        self.assigned = 0
+
+    def __repr__(self) -> str:
+        return f"<Session {self.key} assigned={self.assigned}>"
+
+    @property
+    def has_state(self) -> bool:
+        return self.state_path.exists()
+
+    def token_expires_at(self) -> Optional[float]:
+        """Expiry of the access token cookie (unix time) from the saved state."""
+        if not self.has_state:
+            return None
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        for cookie in state.get("cookies", []):
+            if (
+                cookie.get("name") == ACCESS_TOKEN_COOKIE
+                and cookie.get("expires", -1) > 0
+            ):
+                return float(cookie["expires"])
+        return None
+
+    def expires_at(self, max_age: float) -> float:
+        """When the session must be refreshed: token expiry or saved_at + max_age."""
+        by_age = self.saved_at + max_age
+        token_expiry = self.token_expires_at()
+        return min(by_age, token_expiry) if token_expiry else by_age
+
+
+class SessionPool:
+    """
+    Sessions of several accounts handed out to browser contexts.
+
+    Stats: sessions/accounts, validated, invalid, logins, refreshed,
+    refresh_errors, seed_mismatch.
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[tuple[str, str]],
+        directory: Path = SESSIONS_DIR,
+        max_age: float = 24 * 3600,
+        refresh_margin: float = 1800,
+        refresh_interval: float = 300,
+        validate_url: str = SESSION_VALIDATE_URL,
+        stats: Any = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.json"
+        self.sessions = [
+            Session(email, password, self.directory)
+            for email, password in dict(accounts).items()
+        ]
+        self.max_age = max_age
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.validate_url = validate_url
+        self.stats = stats
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_index()
+        self._seed_from_legacy_state()
+        self._set("sessions/accounts", len(self.sessions))
+
+    @classmethod
+    def from_settings(cls, settings, stats: Any = None) -> "SessionPool":
+        accounts = parse_accounts(settings.get("OLX_ACCOUNTS") or "")
+        if not accounts:
+            accounts = [(OLX_EMAIL, OLX_PASSWORD)]
+        return cls(
+            accounts,
+            directory=Path(settings.get("SESSIONS_DIR") or SESSIONS_DIR),
+            max_age=settings.getfloat("SESSION_MAX_AGE", 24 * 3600),
+            refresh_margin=settings.getfloat("SESSION_REFRESH_MARGIN", 1800),
+            refresh_interval=settings.getfloat("SESSION_REFRESH_INTERVAL", 300),
+            validate_url=settings.get("SESSION_VALIDATE_URL", SESSION_VALIDATE_URL),
+            stats=stats,
+        )
+
+    def acquire(self) -> Session:
+        """The account used by the fewest contexts."""
+        session = min(self.sessions, key=lambda s: s.assigned)
+        session.assigned += 1
+        return session
+
+    def release(self, session: Optional[Session]) -> None:
+        if session is not None:
+            session.assigned = max(0, session.assigned - 1)
+
+    def storage_state(self, session: Session) -> Optional[str]:
+        """`storage_state=` argument of new_context() (None for a new account)."""
+        return str(session.state_path) if session.has_state else None
+
+    async def validate(self, context: BrowserContext, session: Session) -> bool:
+        """Check the session of a context with one API request (no page load)."""
+        token = next(
+            (
+                cookie["value"]
+                for cookie in await context.cookies(OLX_URL)
+                if cookie["name"] == ACCESS_TOKEN_COOKIE
+            ),
+            None,
+        )
+        if not token:
+            return False
+        try:
+            response = await context.request.get(
+                self.validate_url,
+                headers={
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {token}",
+                },
+                timeout=10_000,
+            )
+        except PlaywrightError:
+            return False
+        if not response.ok:
+            return False
+        if session.seeded:
+            if not await self._seed_matches(response, session):
+                await self._discard_seed(context, session)
+                return False
+            session.seeded = False
+        session.validated_at = time.time()
+        self._save_index()
+        return True
+
+    async def _seed_matches(self, response: Any, session: Session) -> bool:
+        """Whether the legacy state belongs to the account it was copied to."""
+        try:
+            payload = await response.json()
+        except (PlaywrightError, ValueError):
+            return False
+        email = ((payload or {}).get("data") or {}).get("email") or ""
+        return email.lower() == session.email.lower()
+
+    async def _discard_seed(self, context: BrowserContext, session: Session) -> None:
+        """Drop a legacy state of another account, so the session logs in afresh."""
+        self._inc("sessions/seed_mismatch")
+        await context.clear_cookies()
+        session.state_path.unlink(missing_ok=True)
+        session.seeded = False
+        session.saved_at = 0.0
+        self._save_index()
+
+    async def ensure(
+        self, context: BrowserContext, session: Session, spider: scrapy.Spider
+    ) -> None:
+        """
+        Make the context logged in: validate its saved state, log in if needed.
+
+        :param context: Context created from the storage state of the session.
+        :param session: Account session of this context.
+        :param spider: scrapy.Spider instance
+        """
+        fresh = time.time() < session.expires_at(self.max_age)
+        if session.has_state and fresh and await self.validate(context, session):
+            self._inc("sessions/validated")
+            spider.logger.info(f"✅ Сесія {session.key} дійсна, вхід не потрібен.")
+            return
+        self._inc("sessions/invalid")
+        await self.login(context, session, spider)
+
+    async def login(
+        self, context: BrowserContext, session: Session, spider: scrapy.Spider
+    ) -> None:
+        """Log in through the form and save the state with a new timestamp."""
+        self._inc("sessions/logins")
+        await login_olx(
+            context,
+            OLX_URL,
+            session.email,
+            session.password,
+            spider,
+            session.state_path,
+        )
+        session.saved_at = session.validated_at = time.time()
+        session.seeded = False
+        self._save_index()
+
+    def start_refresh(
+        self,
+        bindings: Callable[[], list[tuple[BrowserContext, Session]]],
+        spider: scrapy.Spider,
+        on_refresh: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Refresh sessions in the background during the crawl.
+
+        :param bindings: Returns the current (context, session) pairs of the pool.
+        :param on_refresh: Called with the context whose session was refreshed.
+        """
+        if self.refresh_interval > 0:
+            self._refresh_task = asyncio.ensure_future(
+                self._refresh_loop(bindings, spider, on_refresh)
+            )
+
+    async def _refresh_loop(
+        self,
+        bindings: Callable[[], list[tuple[BrowserContext, Session]]],
+        spider: scrapy.Spider,
+        on_refresh: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            refreshed: set[str] = set()
+            for context, session in bindings():
+                expires_in = session.expires_at(self.max_age) - time.time()
+                if session.key in refreshed or expires_in > self.refresh_margin:
+                    continue
+                try:
+                    await self._refresh(context, session, spider)
+                    refreshed.add(session.key)
+                    if on_refresh is not None:
+                        await on_refresh(context)
+                except Exception as err:
+                    self._inc("sessions/refresh_errors")
+                    spider.logger.warning(
+                        f"⚠️ Не вдалося оновити сесію {session.key}: {err}"
+                    )
+
+    async def _refresh(
+        self, context: BrowserContext, session: Session, spider: scrapy.Spider
+    ) -> None:
+        if await self.validate(context, session):
+            # Still valid: the site has extended the cookies, keep the new ones
+            await context.storage_state(path=session.state_path)
+            session.saved_at = time.time()
+            self._save_index()
+        else:
+            await self.login(context, session, spider)
+        self._inc("sessions/refreshed")
+        spider.logger.info(f"🔄 Сесію {session.key} оновлено.")
+
+    def close(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    def _load_index(self) -> None:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = {}
+        for session in self.sessions:
+            entry = index.get(session.key) or {}
+            session.saved_at = entry.get("saved_at", 0.0)
+            session.validated_at = entry.get("validated_at", 0.0)
+            session.seeded = entry.get("seeded", False)
+
+    def _save_index(self) -> None:
+        index = {
+            session.key: {
+                "saved_at": session.saved_at,
+                "validated_at": session.validated_at,
+                "seeded": session.seeded,
+            }
+            for session in self.sessions
+        }
+        self.index_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+
+    def _seed_from_legacy_state(self) -> None:
+        """
+        The first account starts from the old state.json if it has no state.
+
+        The file may belong to another account, so the seed is kept only after
+        validate() has matched its email with the account.
+        """
+        first = self.sessions[0] if self.sessions else None
+        if first and not first.has_state and LEGACY_STATE_FILE.exists():
+            first.state_path.write_bytes(LEGACY_STATE_FILE.read_bytes())
+            first.saved_at = LEGACY_STATE_FILE.stat().st_mtime
+            first.seeded = True
+            self._save_index()
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
+
+    def _set(self, key: str, value: Any) -> None:
+        if self.stats is not None:
+            self.stats.set_value(key, value)
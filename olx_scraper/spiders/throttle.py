@@ -0,0 +1,194 @@
+"""
+Crawl-wide 403 circuit breaker and adaptive throttling shared by all contexts.
+
+DOWNLOAD_DELAY and Scrapy's AutoThrottle do not apply to Playwright
+navigations in parse_ad, so the pace of ad pages is controlled here:
+- effective concurrency changes like AutoThrottle/AIMD (grows slowly on
+  success, halves on a block or high latency);
+- a CloudFront block (403) opens the breaker: new navigations and the Scrapy
+  engine are paused with an exponential backoff.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+
+
+class BlockedError(Exception):
+    """The site answered with a CloudFront 403 block page."""
+
+    def __init__(self, url: str):
+        super().__init__(f"Blocked by CloudFront. URL: {url}")
+        self.url = url
+
+
+class ThrottleController:
+    """
+    Crawl-wide circuit breaker and concurrency limiter for detail pages.
+
+    Usage in parse_ad: ``await throttle.acquire()`` before navigation,
+    ``throttle.record_success(latency)`` or ``throttle.record_block(url)`` after
+    it and ``throttle.release()`` when the page is done.
+
+    Stats: throttle/state, concurrency, latency_ema, block_rate, backoff
+    (current values) and throttle/blocks, pauses, paused_time (counters).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        target_latency: float = 5.0,
+        backoff_base: float = 30.0,
+        backoff_max: float = 600.0,
+        window: int = 50,
+        stats: Any = None,
+        engine: Any = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.target_latency = target_latency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = stats
+        # Scrapy engine, paused together with page dispatch (list pages, HTTP)
+        self.engine = engine
+
+        self.concurrency = self.max_concurrency
+        self.in_flight = 0
+        self.state = CLOSED
+        self.resume_at = 0.0
+        self.consecutive_blocks = 0
+        self.latency_ema: Optional[float] = None
+        self._successes_since_change = 0
+        # 1 = blocked, 0 = ok for the last `window` navigations
+        self._recent: deque[int] = deque(maxlen=max(1, window))
+        self._condition = asyncio.Condition()
+        self._resume_task: Optional[asyncio.Task] = None
+        self._publish()
+
+    @classmethod
+    def from_crawler(cls, crawler, max_concurrency: int) -> "ThrottleController":
+        settings = crawler.settings
+        return cls(
+            max_concurrency=max_concurrency,
+            min_concurrency=settings.getint("THROTTLE_MIN_CONCURRENCY", 1),
+            target_latency=settings.getfloat("THROTTLE_TARGET_LATENCY", 5.0),
+            backoff_base=settings.getfloat("THROTTLE_BACKOFF_BASE", 30.0),
+            backoff_max=settings.getfloat("THROTTLE_BACKOFF_MAX", 600.0),
+            window=settings.getint("THROTTLE_WINDOW", 50),
+            stats=crawler.stats,
+            engine=crawler.engine,
+        )
+
+    @property
+    def block_rate(self) -> float:
+        return sum(self._recent) / len(self._recent) if self._recent else 0.0
+
+    async def acquire(self) -> None:
+        """Wait until the breaker is closed and a concurrency slot is free."""
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.state == CLOSED and self.in_flight < self.concurrency
+            )
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """A navigation finished without a block after `latency` seconds."""
+        self._recent.append(0)
+        self.consecutive_blocks = 0
+        self.latency_ema = (
+            latency
+            if self.latency_ema is None
+            else 0.8 * self.latency_ema + 0.2 * latency
+        )
+        if self.latency_ema > self.target_latency:
+            # The site slows down: back off before it starts blocking
+            self._set_concurrency(self.concurrency - 1)
+        else:
+            # Additive increase: one more page after `concurrency` good ones
+            self._successes_since_change += 1
+            if self._successes_since_change >= self.concurrency:
+                self._set_concurrency(self.concurrency + 1)
+        self._publish()
+
+    def record_block(self, url: str = "") -> float:
+        """
+        A 403 block was detected: halve concurrency and pause everything.
+
+        :return: Pause duration in seconds.
+        """
+        self._recent.append(1)
+        self.consecutive_blocks += 1
+        self._inc("throttle/blocks")
+        self._set_concurrency(self.concurrency // 2)
+        backoff = min(
+            self.backoff_max, self.backoff_base * 2 ** (self.consecutive_blocks - 1)
+        )
+        resume_at = time.monotonic() + backoff
+        if resume_at > self.resume_at:
+            self._open(resume_at)
+        self._publish(backoff)
+        return backoff
+
+    def _open(self, resume_at: float) -> None:
+        if self.state != OPEN:
+            self._inc("throttle/pauses")
+            if self.engine is not None:
+                self.engine.pause()
+        self.state = OPEN
+        self.resume_at = resume_at
+        if self._resume_task is None or self._resume_task.done():
+            self._resume_task = asyncio.ensure_future(self._resume_later())
+
+    async def _resume_later(self) -> None:
+        started = time.monotonic()
+        # resume_at may be pushed further by blocks of pages still in flight
+        while (delay := self.resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        self._inc("throttle/paused_time", round(time.monotonic() - started, 2))
+        async with self._condition:
+            self.state = CLOSED
+            if self.engine is not None:
+                self.engine.unpause()
+            self._publish()
+            self._condition.notify_all()
+
+    def _set_concurrency(self, value: int) -> None:
+        value = max(self.min_concurrency, min(self.max_concurrency, value))
+        if value != self.concurrency:
+            self.concurrency = value
+            asyncio.ensure_future(self._notify())
+        self._successes_since_change = 0
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        if self._resume_task and not self._resume_task.done():
+            self._resume_task.cancel()
+
+    def _publish(self, backoff: float = 0.0) -> None:
+        if self.stats is None:
+            return
+        self.stats.set_value("throttle/state", self.state)
+        self.stats.set_value("throttle/concurrency", self.concurrency)
+        self.stats.set_value("throttle/block_rate", round(self.block_rate, 3))
+        if self.latency_ema is not None:
+            self.stats.set_value("throttle/latency_ema", round(self.latency_ema, 3))
+        if backoff:
+            self.stats.set_value("throttle/backoff", backoff)
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
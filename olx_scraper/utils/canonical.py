@@ -0,0 +1,43 @@
+"""
+Canonical form of OLX ad URLs and the dedupe key of an ad.
+
+The same ad is reachable through different slugs, language prefixes
+(``/d/`` and ``/d/uk/``) and tracking query strings (``?reason=...``), but the
+ad ID at the end of the URL (``...-IDXvQ3c.html``) never changes. The ID is
+the dedupe key of the spider, the pipelines and the dupefilter.
+"""
+
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+AD_ID_RE = re.compile(r"-ID([0-9A-Za-z]+)\.html")
+# Ad pages are stored and requested in Ukrainian
+AD_PATH_PREFIX = "/d/"
+AD_PATH_PREFIX_UK = "/d/uk/"
+
+
+def ad_id_from_url(url: str) -> Optional[str]:
+    """Return the alphanumeric OLX ad ID from an ad URL or None."""
+    match = AD_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def canonical_ad_url(url: str) -> str:
+    """
+    Ukrainian ad URL without query string and fragment.
+
+    URLs without an ad ID (list pages) are returned unchanged.
+    """
+    parts = urlsplit(url)
+    if not AD_ID_RE.search(parts.path):
+        return url
+    path = parts.path
+    if path.startswith(AD_PATH_PREFIX) and not path.startswith(AD_PATH_PREFIX_UK):
+        path = AD_PATH_PREFIX_UK + path[len(AD_PATH_PREFIX) :]
+    return urlunsplit((parts.scheme or "https", parts.netloc, path, "", ""))
+
+
+def ad_key(url: str) -> str:
+    """Dedupe key of an ad: its ID, or the canonical URL if it has none."""
+    return ad_id_from_url(url) or canonical_ad_url(url)
@@ -0,0 +1,196 @@
+"""
+Catalog of OLX categories discovered from the site instead of hardcoded tables.
+
+The tree is crawled once over plain HTTP: every list page carries the
+category dictionary in its prerendered state (id, slug, parent) and a sidebar
+with the number of ads of each child category
+(``li[data-categoryid] > div > span + div``). The result is stored in a JSON
+file and reused until CATALOG_TTL expires; the olx_catalog spider refreshes
+it with Scrapy requests (``scrapy crawl olx_catalog``, a no-op while fresh).
+
+URL builders resolve subcategory slugs through the catalog (the static tables
+stay as aliases and as the offline fallback), and the query planner uses the
+per-node counts to split searches without count requests.
+
+Run: python -m olx_scraper.utils.category_catalog [transport nedvizhimost ...]
+"""
+
+import json
+import re
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Optional
+
+import requests
+from parsel import Selector
+
+from .prerendered_state import extract_prerendered_state
+
+BASE_URL = "https://www.olx.ua/uk/"
+CATALOG_FILE = "category_catalog.json"
+DEFAULT_ROOTS = ("transport", "nedvizhimost")
+SIDEBAR_ITEM_SELECTOR = "li[data-categoryid]"
+COUNT_RE = re.compile(r"\d+")
+
+
+def parse_sidebar_counts(html: str) -> dict[int, tuple[str, int]]:
+    """{category id: (name, ad count)} from the category sidebar of a list page."""
+    counts = {}
+    for item in Selector(text=html).css(SIDEBAR_ITEM_SELECTOR):
+        category_id = item.attrib.get("data-categoryid", "")
+        if not category_id.isdigit():
+            continue
+        name = (item.css("span::text").get() or "").strip()
+        digits = "".join(COUNT_RE.findall(item.css("span + div::text").get() or ""))
+        counts[int(category_id)] = (name, int(digits) if digits else 0)
+    return counts
+
+
+def parse_state_categories(state: Optional[dict]) -> dict[int, dict]:
+    """{category id: {"slug", "name", "parent_id"}} from a page's prerendered state."""
+    raw = ((state or {}).get("categories") or {}).get("list") or {}
+    nodes = raw.values() if isinstance(raw, dict) else raw
+    categories = {}
+    for node in nodes:
+        if not isinstance(node, dict) or not node.get("id"):
+            continue
+        slug = node.get("normalizedName") or node.get("code") or node.get("slug")
+        if slug:
+            categories[int(node["id"])] = {
+                "slug": slug,
+                "name": node.get("name"),
+                "parent_id": node.get("parentId") or node.get("parent_id"),
+            }
+    return categories
+
+
+def merge_catalog_page(nodes: dict[str, dict], path: str, html: str) -> list[str]:
+    """
+    Add the node `path` and its children from one list page to `nodes`.
+
+    :return: Paths of the child categories that have ads (to crawl deeper).
+    """
+    categories = parse_state_categories(extract_prerendered_state(html))
+    nodes.setdefault(path, {"id": None, "name": None, "count": None})
+    children = []
+    for category_id, (name, count) in parse_sidebar_counts(html).items():
+        category = categories.get(category_id)
+        if not category:
+            continue
+        if category["slug"] == path.rsplit("/", 1)[-1]:
+            # The sidebar header is the current category with its total
+            nodes[path].update(id=category_id, name=name, count=count)
+            continue
+        child_path = f"{path}/{category['slug']}"
+        nodes[child_path] = {"id": category_id, "name": name, "count": count}
+        if count:
+            children.append(child_path)
+    return children
+
+
+class CategoryCatalog:
+    """
+    Category tree keyed by slug path, e.g. "transport/legkovye-avtomobili/bmw".
+
+    Every node: {"id", "name", "count"}; ``count`` is None when unknown.
+    """
+
+    def __init__(self, nodes: Optional[dict[str, dict]] = None, fetched_at: float = 0):
+        self.nodes: dict[str, dict] = nodes or {}
+        self.fetched_at = fetched_at
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def is_fresh(self, ttl: float) -> bool:
+        return bool(self.nodes) and time.time() - self.fetched_at < ttl
+
+    def children(self, path: str) -> dict[str, dict]:
+        """{slug: node} of the direct children of a node."""
+        prefix = path.strip("/") + "/"
+        return {
+            key[len(prefix) :]: node
+            for key, node in self.nodes.items()
+            if key.startswith(prefix) and "/" not in key[len(prefix) :]
+        }
+
+    def count(self, path: str) -> Optional[int]:
+        node = self.nodes.get(path.strip("/"))
+        return node.get("count") if node else None
+
+    def resolve(
+        self, parent_path: str, key: Optional[str], aliases: dict
+    ) -> Optional[str]:
+        """
+        Slug of a child category: the key itself if the catalog knows it,
+        else the static alias table of the builder.
+        """
+        if not key:
+            return None
+        if key in self.children(parent_path):
+            return key
+        return aliases.get(key)
+
+    @classmethod
+    def load(cls, path: Path) -> "CategoryCatalog":
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        return cls(data.get("nodes") or {}, data.get("fetched_at") or 0)
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(
+            json.dumps(
+                {"fetched_at": self.fetched_at, "nodes": self.nodes},
+                ensure_ascii=False,
+                indent=1,
+            ),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def crawl(
+        cls,
+        roots: Iterable[str] = DEFAULT_ROOTS,
+        max_depth: int = 2,
+        delay: float = 1.0,
+        session: Optional[requests.Session] = None,
+    ) -> "CategoryCatalog":
+        """
+        Walk the category tree breadth-first from `roots` over plain HTTP.
+
+        Each visited page gives slugs of its children (prerendered state) and
+        their ad counts (sidebar); nodes with ads are visited down to `max_depth`.
+        """
+        session = session or requests.Session()
+        session.headers.setdefault("User-Agent", "Mozilla/5.0")
+        nodes: dict[str, dict] = {}
+        queue = deque((root.strip("/"), 0) for root in roots)
+        while queue:
+            path, depth = queue.popleft()
+            response = session.get(f"{BASE_URL}{path}/", timeout=30)
+            if response.status_code != 200:
+                continue
+            children = merge_catalog_page(nodes, path, response.text)
+            if depth + 1 < max_depth:
+                queue.extend((child_path, depth + 1) for child_path in children)
+            time.sleep(delay)
+        return cls(nodes, time.time())
+
+
+def load_catalog(settings) -> CategoryCatalog:
+    """
+    The catalog file from settings, stale or empty as it is (builders then
+    fall back to their static tables); it is refreshed by the olx_catalog spider.
+    """
+    return CategoryCatalog.load(Path(settings.get("CATALOG_FILE", CATALOG_FILE)))
+
+
+if __name__ == "__main__":
+    fresh_catalog = CategoryCatalog.crawl(sys.argv[1:] or DEFAULT_ROOTS)
+    fresh_catalog.save(Path(CATALOG_FILE))
+    for node_path, node in sorted(fresh_catalog.nodes.items()):
+        print(f"{node_path:<60} {node['count']}")
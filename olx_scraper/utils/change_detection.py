@@ -0,0 +1,82 @@
+"""
+Change detection for ads that are already stored in the database.
+
+Two hashes are kept per ad in the ``ad_state`` table:
+
+* card fingerprint: a 64-bit hash of the list-card data (title, price, card
+  date). It is compared in ``parse``, so the expensive detail page is opened
+  only for ads whose card changed;
+* content hash: a hash of the scraped detail fields. The ``ads`` upsert only
+  rewrites a row when it differs, so unchanged ads cause no write I/O.
+  Placeholders of fields that were not found are hashed as missing.
+
+Volatile fields (view counter, "online" time of the seller) are not hashed.
+"""
+
+import hashlib
+import json
+import re
+from datetime import date
+from typing import Any, Iterable, Mapping, Optional
+
+from .parse_date import format_date_uk, parse_date
+from .placeholders import is_placeholder
+
+# Fields of the detail page that make up the content hash
+HASHED_FIELDS = (
+    "title",
+    "price",
+    "user_name",
+    "phone_number",
+    "location",
+    "ad_pub_date",
+    "description",
+    "ad_tags",
+    "img_src_list",
+)
+# Ads stored before their phone is revealed (PHONE_REVEAL_MODE = "deferred")
+DEFERRED_PHONE_HASHED_FIELDS = tuple(
+    name for name in HASHED_FIELDS if name != "phone_number"
+)
+# "Київ, Печерський - Сьогодні о 12:30" -> "Сьогодні о 12:30"
+CARD_DATE_RE = re.compile(r"\s-\s([^-]+)$")
+
+
+def _digest(text: str, size: int) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=size).digest()
+
+
+def card_date(location_date: Optional[str], today: Optional[date] = None) -> str:
+    """
+    Stable date of a list card.
+
+    "Сьогодні о 12:30" becomes today's date, so the card of a fresh ad keeps
+    its fingerprint when the site shows the full date on the next day.
+    """
+    if not location_date:
+        return ""
+    match = CARD_DATE_RE.search(location_date.strip())
+    value = match.group(1).strip() if match else location_date.strip()
+    parsed = parse_date(value, today)
+    return format_date_uk(parsed) if parsed else value
+
+
+def card_fingerprint(
+    title: Optional[str], price: Optional[str], date_text: Optional[str]
+) -> int:
+    """Signed 64-bit fingerprint of the card data (fits a BIGINT column)."""
+    text = "\x1f".join(
+        " ".join((part or "").split()) for part in (title, price, date_text)
+    )
+    return int.from_bytes(_digest(text, 8), "big", signed=True)
+
+
+def content_hash(
+    fields: Mapping[str, Any], names: Iterable[str] = HASHED_FIELDS
+) -> str:
+    """Hex hash of the detail fields of an item (placeholders as None)."""
+    values = [
+        None if is_placeholder(name, fields.get(name)) else fields.get(name)
+        for name in names
+    ]
+    return _digest(json.dumps(values, ensure_ascii=False, default=str), 16).hex()
@@ -0,0 +1,159 @@
+"""
+Compact in-memory index of ads that are already stored in the database.
+
+The index is keyed by the OLX ad ID embedded in the ad URL (``...-IDXvQ3c.html``).
+The alphanumeric ID is decoded into a 64-bit integer and kept in a sorted
+``array('q')``, so membership checks are a binary search and the whole index
+costs 8 bytes per ad instead of a Python ``str`` per URL.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from .canonical import ad_id_from_url
+
+# Bijective base-63 numeration (digits 1..62) keeps "0a" and "a" distinct
+_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_DIGITS: dict[str, int] = {char: i + 1 for i, char in enumerate(_ALPHABET)}
+_BASE = len(_ALPHABET) + 1
+# 63 ** 10 < 2 ** 63, longer IDs do not fit into a signed 64-bit slot
+MAX_PACKED_ID_LENGTH = 10
+
+# How many freshly added keys are kept in a set before merging into the array
+MERGE_THRESHOLD = 4_096
+
+
+def pack_ad_id(ad_id: str) -> Optional[int]:
+    """Convert an alphanumeric OLX ad ID into an int (None if it does not fit)."""
+    if len(ad_id) > MAX_PACKED_ID_LENGTH:
+        return None
+    value = 0
+    for char in ad_id:
+        value = value * _BASE + _DIGITS[char]
+    return value
+
+
+class KnownAdIndex:
+    """
+    Set-like index of known ads.
+
+    Keys live in a sorted int array; keys added during the crawl go into a small
+    set that is merged into the array once it grows past ``MERGE_THRESHOLD``.
+    IDs that are too long to pack fall back to an exact set of strings.
+    """
+
+    def __init__(self, keys: Iterable[int] = ()):
+        self._sorted: array = array("q", sorted(set(keys)))
+        self._recent: set[int] = set()
+        self._overflow: set[str] = set()
+
+    @classmethod
+    def from_urls(cls, urls: Iterable[str]) -> "KnownAdIndex":
+        """Build the index from an iterable of ad URLs (e.g. a DB cursor)."""
+        index = cls()
+        keys = array("q")
+        for url in urls:
+            ad_id = ad_id_from_url(url) if url else None
+            if not ad_id:
+                continue
+            key = pack_ad_id(ad_id)
+            if key is None:
+                index._overflow.add(ad_id)
+            else:
+                keys.append(key)
+        index._sorted = array("q", sorted(set(keys)))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent) + len(self._overflow)
+
+    def __contains__(self, url: str) -> bool:
+        ad_id = ad_id_from_url(url)
+        if not ad_id:
+            return False
+        key = pack_ad_id(ad_id)
+        if key is None:
+            return ad_id in self._overflow
+        return self._has_key(key)
+
+    def _has_key(self, key: int) -> bool:
+        if key in self._recent:
+            return True
+        position = bisect_left(self._sorted, key)
+        return position < len(self._sorted) and self._sorted[position] == key
+
+    def add(self, url: str) -> bool:
+        """Add an ad URL to the index. Returns False if the URL has no ad ID."""
+        ad_id = ad_id_from_url(url) if url else None
+        if not ad_id:
+            return False
+        key = pack_ad_id(ad_id)
+        if key is None:
+            self._overflow.add(ad_id)
+            return True
+        # Keys already in the array stay out of the set: they would be counted
+        # twice by len() and bring the next merge closer for nothing
+        if self._has_key(key):
+            return True
+        self._recent.add(key)
+        if len(self._recent) >= MERGE_THRESHOLD:
+            self._merge()
+        return True
+
+    def _merge(self) -> None:
+        """
+        Fold recently added keys into the sorted array in one linear pass.
+
+        Runs of the old array between two new keys are copied as slices, so
+        the cost is a memcpy of the array plus a binary search per new key.
+        """
+        merged = array("q")
+        start = 0
+        for key in sorted(self._recent):
+            position = bisect_left(self._sorted, key, start)
+            merged.extend(self._sorted[start:position])
+            if position == len(self._sorted) or self._sorted[position] != key:
+                merged.append(key)
+            start = position
+        merged.extend(self._sorted[start:])
+        self._sorted = merged
+        self._recent.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the packed part of the index."""
+        return self._sorted.itemsize * len(self._sorted)
+
+
+def benchmark(sizes: Iterable[int] = (10_000, 100_000, 1_000_000)) -> None:
+    """Show that lookup cost stays flat while the number of known ads grows."""
+    import random
+    import time
+
+    lookups = 100_000
+    for size in sizes:
+        ids = [f"{n:x}" for n in random.sample(range(16**8), size)]
+        urls = [
+            f"https://www.olx.ua/d/uk/obyavlenie/ad-ID{ad_id}.html" for ad_id in ids
+        ]
+        started = time.perf_counter()
+        index = KnownAdIndex.from_urls(urls)
+        build_time = time.perf_counter() - started
+
+        probes = random.choices(urls, k=lookups // 2) + [
+            f"https://www.olx.ua/d/uk/obyavlenie/ad-IDzz{n}.html"
+            for n in range(lookups // 2)
+        ]
+        started = time.perf_counter()
+        hits = sum(1 for url in probes if url in index)
+        lookup_time = time.perf_counter() - started
+        print(
+            f"{size:>9} ads | build {build_time:6.2f}s | "
+            f"{lookup_time / lookups * 1e6:6.2f} µs/lookup | "
+            f"{index.nbytes / 1024 / 1024:6.1f} MiB | hits {hits}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,174 @@
+"""
+Migration of the ads table to the typed schema and a query benchmark.
+
+The spider creates the typed columns and indexes on start
+(PostgresPipeline.prepare_database); this script also fills the typed
+columns of rows stored before, with the same parsers as NormalizationPipeline.
+
+The benchmark runs representative analytics queries twice: in the old form,
+parsing the text columns in SQL (full scan), and against the typed, indexed
+columns. Times are the median "Execution Time" of EXPLAIN ANALYZE.
+
+Run: python -m olx_scraper.utils.migrate_ads [--benchmark] [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+
+import psycopg2
+from psycopg2.extras import execute_values
+from scrapy.utils.project import get_project_settings
+
+from ..pipelines import PostgresPipeline
+from .normalize import date_to_datetime, parse_count, parse_price
+from .parse_date import MONTHS_UK, parse_date
+
+BACKFILL_BATCH_SIZE = 5_000
+MONTH_NAMES = ", ".join(f"'{name}'" for name in MONTHS_UK.values())
+
+SELECT_UNTYPED_SQL = """
+SELECT ad_id, price, ad_view_counter, ad_pub_date, user_last_seen
+FROM ads
+WHERE price_amount IS NULL AND view_count IS NULL AND pub_date IS NULL
+    AND ad_id > %s
+ORDER BY ad_id
+LIMIT %s
+"""
+
+UPDATE_TYPED_SQL = """
+UPDATE ads SET
+    price_amount = v.price_amount,
+    price_currency = v.price_currency,
+    view_count = v.view_count,
+    pub_date = v.pub_date,
+    user_last_seen_at = v.user_last_seen_at
+FROM (VALUES %s) AS v (
+    ad_id, price_amount, price_currency, view_count, pub_date, user_last_seen_at
+)
+WHERE ads.ad_id = v.ad_id
+"""
+# Casts give NULL-only columns of VALUES the type of the target column
+TYPED_ROW_TEMPLATE = "(%s, %s::numeric, %s, %s::integer, %s::date, %s::timestamptz)"
+
+# (name, query on the text columns, same query on the typed columns)
+BENCHMARK_QUERIES = (
+    (
+        "price range",
+        "SELECT count(*) FROM ads WHERE NULLIF(regexp_replace(price, '[^0-9]', '',"
+        " 'g'), '')::numeric BETWEEN 10000 AND 20000",
+        "SELECT count(*) FROM ads WHERE price_amount BETWEEN 10000 AND 20000",
+    ),
+    (
+        "published in a month",
+        "SELECT count(*) FROM ads WHERE ad_pub_date LIKE '% січня 2025 р.'",
+        "SELECT count(*) FROM ads WHERE pub_date BETWEEN '2025-01-01' AND '2025-01-31'",
+    ),
+    (
+        "cheapest in a city",
+        "SELECT ad_id, price FROM ads WHERE location LIKE 'Київ%'"
+        " ORDER BY NULLIF(regexp_replace(price, '[^0-9]', '', 'g'), '')::numeric"
+        " LIMIT 20",
+        "SELECT ad_id, price FROM ads WHERE location LIKE 'Київ%'"
+        " AND price_amount IS NOT NULL ORDER BY price_amount LIMIT 20",
+    ),
+    (
+        "latest ads",
+        "SELECT ad_id FROM ads WHERE ad_pub_date ~ '^\\d{1,2} \\S+ \\d{4}'"
+        " ORDER BY make_date(split_part(ad_pub_date, ' ', 3)::int,"
+        f" array_position(ARRAY[{MONTH_NAMES}], split_part(ad_pub_date, ' ', 2)),"
+        " split_part(ad_pub_date, ' ', 1)::int) DESC LIMIT 50",
+        "SELECT ad_id FROM ads WHERE pub_date IS NOT NULL"
+        " ORDER BY pub_date DESC LIMIT 50",
+    ),
+)
+
+
+def connect():
+    settings = get_project_settings()
+    return psycopg2.connect(
+        host=settings.get("POSTGRES_URI"),
+        dbname=settings.get("POSTGRES_DB"),
+        user=settings.get("POSTGRES_USER"),
+        password=settings.get("POSTGRES_PASSWORD"),
+    )
+
+
+def typed_values(row: tuple) -> tuple:
+    ad_id, price, view_counter, pub_date, last_seen = row
+    amount, currency = parse_price(price)
+    return (
+        ad_id,
+        amount,
+        currency,
+        parse_count(view_counter),
+        parse_date(pub_date),
+        date_to_datetime(parse_date(last_seen)),
+    )
+
+
+def backfill(conn, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Fill typed columns of rows that have none; returns the number of rows."""
+    PostgresPipeline.prepare_database(conn)
+    total, last_id = 0, ""
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(SELECT_UNTYPED_SQL, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            execute_values(
+                cursor,
+                UPDATE_TYPED_SQL,
+                [typed_values(row) for row in rows],
+                template=TYPED_ROW_TEMPLATE,
+                page_size=len(rows),
+            )
+        conn.commit()
+        total += len(rows)
+        last_id = rows[-1][0]
+        print(f"Backfilled {total} rows")
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE ads")
+    conn.commit()
+    return total
+
+
+def execution_time(cursor, query: str, runs: int) -> float:
+    """Median execution time of a query in milliseconds."""
+    times = []
+    for _ in range(runs):
+        cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+        plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        times.append(plan[0]["Execution Time"])
+    return statistics.median(times)
+
+
+def benchmark(conn, runs: int = 5) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM ads")
+        print(f"ads rows: {cursor.fetchone()[0]}")
+        print(f"{'query':<22} {'text (ms)':>10} {'typed (ms)':>11} {'speedup':>8}")
+        for name, text_query, typed_query in BENCHMARK_QUERIES:
+            before = execution_time(cursor, text_query, runs)
+            after = execution_time(cursor, typed_query, runs)
+            print(
+                f"{name:<22} {before:>10.2f} {after:>11.2f} "
+                f"{before / max(after, 0.001):>7.1f}x"
+            )
+    conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    connection = connect()
+    try:
+        backfill(connection)
+        if args.benchmark:
+            benchmark(connection, args.runs)
+    finally:
+        connection.close()
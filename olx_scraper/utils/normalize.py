@@ -0,0 +1,67 @@
+"""
+Conversion of scraped text fields into typed values for the ads table.
+
+The spider keeps the text as shown on the site ("12 500 грн.",
+"Переглядів: 1 234", "15 січня 2025 р."); these helpers produce the numeric
+price and currency and the integer view count that are stored in the typed,
+indexed columns (dates are parsed by utils.parse_date).
+"""
+
+import re
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+KYIV_TZ = ZoneInfo("Europe/Kyiv")
+
+# Currency marks of OLX prices, checked in order
+CURRENCIES = (
+    ("грн", "UAH"),
+    ("₴", "UAH"),
+    ("$", "USD"),
+    ("usd", "USD"),
+    ("€", "EUR"),
+    ("eur", "EUR"),
+)
+FREE_PRICE_WORDS = ("безкоштовно", "даром")
+# "12 500.50" with regular, narrow or non-breaking spaces between thousands
+AMOUNT_RE = re.compile(r"\d[\d\s  ]*(?:[.,]\d{1,2})?")
+DIGITS_RE = re.compile(r"\d+")
+
+
+def parse_price(text: Optional[str]) -> tuple[Optional[Decimal], Optional[str]]:
+    """
+    Amount and ISO currency code of a price.
+
+    "12 500 грн." -> (12500, "UAH"), "Безкоштовно" -> (0, None),
+    "Обмін" -> (None, None).
+    """
+    if not text:
+        return None, None
+    lowered = text.lower()
+    if any(word in lowered for word in FREE_PRICE_WORDS):
+        return Decimal(0), None
+    match = AMOUNT_RE.search(text)
+    if not match:
+        return None, None
+    raw = re.sub(r"[\s  ]", "", match.group(0)).replace(",", ".")
+    try:
+        amount = Decimal(raw)
+    except InvalidOperation:
+        return None, None
+    currency = next((code for mark, code in CURRENCIES if mark in lowered), None)
+    return amount, currency
+
+
+def parse_count(text: Optional[str]) -> Optional[int]:
+    """Integer from a counter text: "Переглядів: 1 234" -> 1234."""
+    if not text:
+        return None
+    digits = "".join(DIGITS_RE.findall(text))
+    return int(digits) if digits else None
+
+
+def date_to_datetime(value: Optional[date]) -> Optional[datetime]:
+    """Midnight of a date in Kyiv time (when only the day is known)."""
+    return datetime.combine(value, time(), KYIV_TZ) if value else None
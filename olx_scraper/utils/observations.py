@@ -0,0 +1,178 @@
+"""
+Append-only history of ad prices and views (``ad_observations``).
+
+Every scrape of an ad adds one row (ad_id, time, price, views), so price drops
+and view growth are kept even though the ``ads`` row holds only the latest
+values. The table is range-partitioned by observation month
+(``ad_observations_YYYYMM``):
+
+* partitions for the current and the next month are created on spider start;
+* queries bounded by time only touch the partitions of that period, and the
+  (ad_id, observed_at) index serves the history of one ad;
+* retention detaches (and optionally drops) partitions older than
+  OBSERVATIONS_RETENTION_MONTHS, without a DELETE over millions of rows.
+
+Run: python -m olx_scraper.utils.observations [--history AD_ID] [--drops]
+"""
+
+import argparse
+import re
+from datetime import date
+from typing import Iterable, Optional
+
+TABLE = "ad_observations"
+PARTITION_RE = re.compile(rf"^{TABLE}_(\d{{4}})(\d{{2}})$")
+
+CREATE_OBSERVATIONS_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    ad_id VARCHAR(255) NOT NULL,
+    observed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    price_amount NUMERIC(14, 2),
+    price_currency CHAR(3),
+    view_count INTEGER
+) PARTITION BY RANGE (observed_at)
+"""
+
+# Created on the parent, so every partition gets them
+CREATE_OBSERVATIONS_INDEXES_SQL = (
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_ad_idx ON {TABLE} (ad_id, observed_at)",
+    # Rows arrive in time order: a BRIN index is tiny and prunes by time
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_time_idx ON {TABLE} USING brin (observed_at)",
+)
+
+INSERT_OBSERVATIONS_SQL = f"""
+INSERT INTO {TABLE} (ad_id, price_amount, price_currency, view_count)
+VALUES %s
+"""
+
+PRICE_HISTORY_SQL = f"""
+SELECT observed_at, price_amount, price_currency, view_count
+FROM {TABLE}
+WHERE ad_id = %(ad_id)s
+ORDER BY observed_at
+"""
+
+# Ads observed today cheaper than at their previous observation. The lookback
+# window bounds the partitions the previous observation is searched in.
+PRICE_DROPS_SQL = f"""
+SELECT o.ad_id, previous.price_amount AS old_price, o.price_amount AS new_price,
+    o.price_currency, o.observed_at
+FROM {TABLE} o
+CROSS JOIN LATERAL (
+    SELECT p.price_amount
+    FROM {TABLE} p
+    WHERE p.ad_id = o.ad_id
+        AND p.observed_at < o.observed_at
+        AND p.observed_at >= o.observed_at - make_interval(days => %(lookback_days)s)
+    ORDER BY p.observed_at DESC
+    LIMIT 1
+) previous
+WHERE o.observed_at >= current_date
+    AND o.price_amount < previous.price_amount
+ORDER BY previous.price_amount - o.price_amount DESC
+"""
+
+
+def month_start(value: date, months: int = 0) -> date:
+    """First day of the month `months` after the month of `value`."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_{month.year}{month.month:02d}"
+
+
+def create_partition_sql(month: date) -> str:
+    start = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{start}') TO ('{month_start(start, 1)}')"
+    )
+
+
+def prepare_observations(conn, months_ahead: int = 1) -> None:
+    """Create the table, its indexes and partitions up to `months_ahead` months."""
+    today = date.today()
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_OBSERVATIONS_TABLE_SQL)
+        for statement in CREATE_OBSERVATIONS_INDEXES_SQL:
+            cursor.execute(statement)
+        for months in range(months_ahead + 1):
+            cursor.execute(create_partition_sql(month_start(today, months)))
+    conn.commit()
+
+
+def list_partitions(conn) -> list[tuple[str, date]]:
+    """(name, month) of the attached partitions, oldest first."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class parent ON pg_inherits.inhparent = parent.oid"
+            " JOIN pg_class child ON pg_inherits.inhrelid = child.oid"
+            " WHERE parent.relname = %s",
+            (TABLE,),
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return sorted(parse_partitions(names))
+
+
+def parse_partitions(names: Iterable[str]) -> list[tuple[str, date]]:
+    """(name, month) of the names that follow the partition naming."""
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return partitions
+
+
+def apply_retention(
+    conn, keep_months: int, drop: bool = False, today: Optional[date] = None
+) -> list[str]:
+    """
+    Detach partitions of months older than the last `keep_months` months.
+
+    Detached tables keep their data (archive or drop them later) unless `drop`.
+    Returns the names of the detached partitions.
+    """
+    if keep_months <= 0:
+        return []
+    cutoff = month_start(today or date.today(), -(keep_months - 1))
+    expired = [name for name, month in list_partitions(conn) if month < cutoff]
+    with conn.cursor() as cursor:
+        for name in expired:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+    conn.commit()
+    return expired
+
+
+if __name__ == "__main__":
+    from .migrate_ads import connect
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", metavar="AD_ID")
+    parser.add_argument("--drops", action="store_true")
+    parser.add_argument("--lookback-days", type=int, default=30)
+    args = parser.parse_args()
+    connection = connect()
+    try:
+        with connection.cursor() as db_cursor:
+            if args.history:
+                db_cursor.execute(PRICE_HISTORY_SQL, {"ad_id": args.history})
+                for observation in db_cursor.fetchall():
+                    print(*observation)
+            if args.drops:
+                db_cursor.execute(
+                    PRICE_DROPS_SQL, {"lookback_days": args.lookback_days}
+                )
+                for drop_row in db_cursor.fetchall():
+                    print(*drop_row)
+            if not args.history and not args.drops:
+                for partition, first_day in list_partitions(connection):
+                    print(partition, first_day)
+    finally:
+        connection.close()
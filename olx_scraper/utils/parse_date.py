@@ -1,60 +1,135 @@
+"""
+Parser of OLX dates shared by the spider and the utils.
+
+Handles relative forms ("Сьогодні о 12:30", "Онлайн вчора о 10:15",
+"Онлайн в 10:15") and full dates ("15 січня 2025 р.", "Онлайн 13 травня
+2024 р.") and returns ``datetime.date``. Patterns are compiled once and
+results are cached by (raw string, current day), so the same strings seen on
+every list page are parsed once per day.
+
+Run: python -m olx_scraper.utils.parse_date [corpus.txt]
+"""
+
 import re
-import typing
-from datetime import datetime, timedelta
-
-
-def parse_date(input_str) -> str:
-    """Parse a string with a date and returns it in the '15 січня 2025 р.' format."""
-    today: datetime = datetime.now()
-    months_uk: dict[int, str] = {
-        1: "січня",
-        2: "лютого",
-        3: "березня",
-        4: "квітня",
-        5: "травня",
-        6: "червня",
-        7: "липня",
-        8: "серпня",
-        9: "вересня",
-        10: "жовтня",
-        11: "листопада",
-        12: "грудня",
-    }
-    if input_str.startswith("Сьогодні"):
-        full_date: str = today.strftime(f"%d {months_uk[today.month]} %Y р.")
-    elif input_str.startswith("Онлайн вчора"):
-        yesterday = today - timedelta(days=1)
-        full_date: str = yesterday.strftime(f"%d {months_uk[yesterday.month]} %Y р.")
-    elif input_str.startswith("Онлайн в "):
-        full_date: str = today.strftime(f"%d {months_uk[today.month]} %Y р.")
-    elif input_str.startswith("Онлайн "):
-        input_str = input_str[len("Онлайн ") :]
-        match: re.Match[str] | None = re.match(
-            r"(\d{1,2}) ([а-яіїє]+) (\d{4}) р\.", input_str
-        )
-        if not match:
-            print(f"Некоректний формат дати: {input_str}")
-            return ""
-        day: str = match.group(1).zfill(2)
-        month: str = match.group(2)
-        year: str = match.group(3)
-        if month not in months_uk.values():
-            print(f"Некоректний місяць у даті: {month}")
-        full_date = f"{day} {month} {year} р."
-    else:
-        match: re.Match[str] | None = re.match(
-            r"(\d{1,2}) ([а-яіїє]+) (\d{4}) р\.", input_str
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional
+
+MONTHS_UK: dict[int, str] = {
+    1: "січня",
+    2: "лютого",
+    3: "березня",
+    4: "квітня",
+    5: "травня",
+    6: "червня",
+    7: "липня",
+    8: "серпня",
+    9: "вересня",
+    10: "жовтня",
+    11: "листопада",
+    12: "грудня",
+}
+MONTH_NUMBERS: dict[str, int] = {name: number for number, name in MONTHS_UK.items()}
+
+FULL_DATE_RE = re.compile(r"(\d{1,2})\s+([а-яіїєґ']+)\s+(\d{4})")
+# "Сьогодні о 12:30", "Онлайн сьогодні", "Онлайн в 10:15", "Онлайн щойно"
+TODAY_RE = re.compile(r"^(?:онлайн\s+)?(?:сьогодні|щойно|в\s+\d{1,2}:\d{2})")
+# "Вчора о 18:00", "Онлайн вчора о 10:15"
+YESTERDAY_RE = re.compile(r"^(?:онлайн\s+)?вчора")
+
+PARSE_CACHE_SIZE = 4_096
+
+
+def format_date_uk(value: date) -> str:
+    """Format a date as '15 січня 2025 р.' (the format stored in the ads table)."""
+    return f"{value.day:02d} {MONTHS_UK[value.month]} {value.year} р."
+
+
+def parse_date(text: Optional[str], today: Optional[date] = None) -> Optional[date]:
+    """
+    Date of an OLX date string, None if it is not one.
+
+    :param text: String from the site, e.g. "Сьогодні о 12:30" or "15 січня 2025 р.".
+    :param today: Current day for relative dates (today by default).
+    """
+    if not text:
+        return None
+    return _parse_date(text, today or date.today())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_date(text: str, today: date) -> Optional[date]:
+    value = text.strip().lower()
+    if TODAY_RE.match(value):
+        return today
+    if YESTERDAY_RE.match(value):
+        return today - timedelta(days=1)
+    match = FULL_DATE_RE.search(value)
+    if not match:
+        return None
+    month = MONTH_NUMBERS.get(match.group(2))
+    if not month:
+        return None
+    try:
+        return date(int(match.group(3)), month, int(match.group(1)))
+    except ValueError:
+        return None
+
+
+def sample_corpus(size: int = 200_000) -> list[str]:
+    """
+    Date strings in the forms and proportions seen on OLX pages: publication
+    dates of fresh ads ("Сьогодні о ..."), seller activity ("Онлайн ...") and
+    full dates of older ads.
+    """
+    import random
+
+    rng = random.Random(0)
+    today = date.today()
+    corpus = []
+    for _ in range(size):
+        kind = rng.random()
+        clock = f"{rng.randrange(24):02d}:{rng.randrange(60):02d}"
+        if kind < 0.35:
+            corpus.append(f"Сьогодні о {clock}")
+        elif kind < 0.5:
+            corpus.append(f"Онлайн в {clock}")
+        elif kind < 0.6:
+            corpus.append(f"Онлайн вчора о {clock}")
+        else:
+            day = today - timedelta(days=rng.randrange(1, 400))
+            prefix = "Онлайн " if kind < 0.7 else ""
+            corpus.append(prefix + format_date_uk(day))
+    return corpus
+
+
+def benchmark(corpus: list[str]) -> None:
+    """Throughput of the parser with and without the cache."""
+    import time
+
+    for name, parse in (
+        ("uncached", lambda text: _parse_date.__wrapped__(text, date.today())),
+        ("cached", parse_date),
+    ):
+        _parse_date.cache_clear()
+        started = time.perf_counter()
+        parsed = sum(1 for text in corpus if parse(text) is not None)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:>8}: {len(corpus) / elapsed:>12,.0f} strings/s | "
+            f"{elapsed / len(corpus) * 1e6:5.2f} µs/string | "
+            f"parsed {parsed}/{len(corpus)}"
         )
-        if not match:
-            print(f"Некоректний формат дати: {input_str}")
-        day: str | typing.Any = match.group(1).zfill(2)
-        month: str | typing.Any = match.group(2)
-        year: str = match.group(3)
-        if month not in months_uk.values():
-            print(f"Некоректний місяць у даті: {month}")
-        full_date = f"{day} {month} {year} р."
-    return full_date
+    print(f"cache: {_parse_date.cache_info()}")
 
 
 if __name__ == "__main__":
-    print(parse_date("Онлайн 13 травня 2024 р."))
+    import sys
+
+    if len(sys.argv) > 1:
+        # One raw date string per line, e.g. collected from list and ad pages
+        with open(sys.argv[1], encoding="utf-8") as corpus_file:
+            strings = [line.rstrip("\n") for line in corpus_file if line.strip()]
+    else:
+        strings = sample_corpus()
+    benchmark(strings)
@@ -0,0 +1,118 @@
+"""
+Queue of ads whose phone is revealed in a separate phase (``phone_pending``).
+
+With PHONE_REVEAL_MODE = "deferred" the olx spider stores ads without the
+phone (the most block-prone and quota-limited step) and PostgresPipeline
+enqueues every ad that has a "show phone" button and no stored phone. The
+olx_phones spider drains the queue with its own concurrency, rate limit and
+sessions and fills in ``ads.phone_number`` in bulk; failed reveals are retried
+later with an exponential delay. Ads found removed are marked inactive and,
+like ads deactivated elsewhere (olx_refresh), leave the queue.
+
+Run: python -m olx_scraper.utils.phone_queue
+"""
+
+TABLE = "phone_pending"
+
+CREATE_PHONE_PENDING_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    ad_id VARCHAR(255) PRIMARY KEY,
+    enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+)
+"""
+CREATE_PHONE_PENDING_INDEX_SQL = (
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_next_idx ON {TABLE} (next_attempt_at)"
+)
+
+# Ads whose phone is not stored yet (written by the ads upsert just before)
+ENQUEUE_PHONES_SQL = f"""
+INSERT INTO {TABLE} (ad_id)
+SELECT v.ad_id
+FROM (VALUES %s) AS v (ad_id)
+JOIN ads ON ads.ad_id = v.ad_id
+WHERE ads.phone_number IS NULL
+ON CONFLICT (ad_id) DO NOTHING
+"""
+
+SELECT_PENDING_PHONES_SQL = f"""
+SELECT p.ad_id, ads.url, p.attempts
+FROM {TABLE} p
+JOIN ads ON ads.ad_id = p.ad_id
+WHERE p.next_attempt_at <= now()
+    AND ads.is_active
+    AND ads.url IS NOT NULL
+ORDER BY p.enqueued_at
+LIMIT %(limit)s
+"""
+
+# Entries whose ad is gone, inactive or has no URL can never be revealed
+PURGE_PENDING_SQL = f"""
+DELETE FROM {TABLE} p
+WHERE NOT EXISTS (
+    SELECT 1 FROM ads
+    WHERE ads.ad_id = p.ad_id AND ads.is_active AND ads.url IS NOT NULL
+)
+"""
+
+# Revealed phones ("N/A" for ads without one) and removed ads leave the queue
+UPDATE_PHONES_SQL = """
+UPDATE ads SET phone_number = v.phone_number
+FROM (VALUES %s) AS v (ad_id, phone_number)
+WHERE ads.ad_id = v.ad_id
+"""
+DEACTIVATE_ADS_SQL = """
+UPDATE ads SET
+    is_active = false,
+    removed_at = COALESCE(ads.removed_at, now())
+FROM (VALUES %s) AS v (ad_id)
+WHERE ads.ad_id = v.ad_id
+"""
+DELETE_PENDING_SQL = f"""
+DELETE FROM {TABLE} p
+USING (VALUES %s) AS v (ad_id)
+WHERE p.ad_id = v.ad_id
+"""
+
+# Failed reveals wait `delay` seconds, doubled with every attempt
+RESCHEDULE_PENDING_SQL = f"""
+UPDATE {TABLE} p SET
+    attempts = p.attempts + 1,
+    last_error = v.error,
+    next_attempt_at = now() + make_interval(secs => v.delay * power(2, p.attempts))
+FROM (VALUES %s) AS v (ad_id, error, delay)
+WHERE p.ad_id = v.ad_id
+"""
+RESCHEDULE_ROW_TEMPLATE = "(%s, %s, %s::double precision)"
+
+QUEUE_SUMMARY_SQL = f"""
+SELECT count(*),
+    count(*) FILTER (WHERE next_attempt_at <= now()),
+    count(*) FILTER (WHERE attempts > 0),
+    min(enqueued_at)
+FROM {TABLE}
+"""
+
+
+def prepare_phone_queue(conn) -> None:
+    """Create the queue table and its index."""
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_PHONE_PENDING_TABLE_SQL)
+        cursor.execute(CREATE_PHONE_PENDING_INDEX_SQL)
+    conn.commit()
+
+
+if __name__ == "__main__":
+    from .migrate_ads import connect
+
+    connection = connect()
+    try:
+        prepare_phone_queue(connection)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(QUEUE_SUMMARY_SQL)
+            total, due, retried, oldest = db_cursor.fetchone()
+        print(f"pending: {total} | due: {due} | retried: {retried} | oldest: {oldest}")
+    finally:
+        connection.close()
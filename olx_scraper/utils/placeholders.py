@@ -0,0 +1,55 @@
+"""
+Values stored for detail fields that were not found on the ad page.
+
+The spider and the pipelines share them: when a changed ad is re-fetched
+partially, the ads upsert keeps the stored value of every field that came
+back as its placeholder, and the content hash treats placeholders as missing.
+"""
+
+from typing import Any
+
+NO_TITLE = "No Title"
+NO_PRICE = "0"
+NO_USER_NAME = "Anonymous"
+# Also stored for ads without a phone and after the last failed reveal
+NO_PHONE = "N/A"
+NO_SCORE = "Ще не має рейтингу"
+NO_REGISTRATION = "Unknown"
+NO_LAST_SEEN = "Unknown"
+NO_VIEWS = "Ad doesnt have view"
+NO_LOCATION = "Unknown"
+NO_PUB_DATE = "Unknown"
+NO_DESCRIPTION = "No Description"
+NO_TAGS = ["Ad doesnt have tags"]
+NO_PHOTOS = ["Ad does not have photos"]
+
+# Placeholder of each ads column
+PLACEHOLDERS: dict[str, Any] = {
+    "title": NO_TITLE,
+    "price": NO_PRICE,
+    "user_name": NO_USER_NAME,
+    "phone_number": NO_PHONE,
+    "user_score": NO_SCORE,
+    "user_registration": NO_REGISTRATION,
+    "user_last_seen": NO_LAST_SEEN,
+    "ad_view_counter": NO_VIEWS,
+    "location": NO_LOCATION,
+    "ad_pub_date": NO_PUB_DATE,
+    "description": NO_DESCRIPTION,
+    "ad_tags": NO_TAGS,
+    "img_src_list": NO_PHOTOS,
+}
+
+
+def is_placeholder(field: str, value: Any) -> bool:
+    """Whether a field value carries no scraped data (empty or the placeholder)."""
+    return (
+        value is None or value == "" or value == [] or value == PLACEHOLDERS.get(field)
+    )
+
+
+def sql_literal(value: Any) -> str:
+    """SQL literal of a placeholder; lists become PostgreSQL array literals."""
+    if isinstance(value, list):
+        value = "{" + ",".join(f'"{item}"' for item in value) + "}"
+    return "'" + value.replace("'", "''") + "'"
@@ -0,0 +1,176 @@
+"""
+Extracts ad data from the JSON state that OLX prerenders into every page.
+
+List and detail pages contain a script with
+``window.__PRERENDERED_STATE__= "<JSON encoded as a JS string>";``.
+Decoding it gives the ad ID, title, price, location, photos, params, user info
+and creation time without rendering, scrolling or waiting in a browser.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Any, Optional
+
+from .parse_date import MONTHS_UK, format_date_uk
+
+PRERENDERED_STATE_RE = re.compile(
+    r'window\.__PRERENDERED_STATE__\s*=\s*("(?:[^"\\]|\\.)*")\s*;', re.S
+)
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+PHOTO_SIZE = "1000x700"
+
+
+def extract_prerendered_state(html: str) -> Optional[dict]:
+    """Return the decoded prerendered state of a page or None."""
+    match = PRERENDERED_STATE_RE.search(html)
+    if not match:
+        return None
+    try:
+        # The state is a JSON document serialized into a JS string literal
+        return json.loads(json.loads(match.group(1)))
+    except (TypeError, ValueError):
+        return None
+
+
+def detail_ad(state: Optional[dict]) -> Optional[dict]:
+    """The ad object of a detail page state."""
+    if not state:
+        return None
+    ad = (state.get("ad") or {}).get("ad")
+    return ad if isinstance(ad, dict) and ad.get("id") else None
+
+
+def is_active_ad(ad: dict) -> bool:
+    """Whether the ad of a detail page state is still active (not removed/outdated)."""
+    return ad.get("status") in (None, "active") and ad.get("isActive") is not False
+
+
+def listing_ads(state: Optional[dict]) -> list[dict]:
+    """Ads (cards) of a list page state."""
+    if not state:
+        return []
+    ads = ((state.get("listing") or {}).get("listing") or {}).get("ads")
+    return [ad for ad in ads or [] if isinstance(ad, dict)]
+
+
+def is_promoted(ad: dict) -> bool:
+    """Whether a card of a list page state is a promoted ("ТОП") ad."""
+    promotion = ad.get("promotion") or {}
+    return bool(ad.get("isPromoted") or promotion.get("top_ad"))
+
+
+def listing_total(state: Optional[dict]) -> Optional[int]:
+    """Total number of ads matching the search of a list page state."""
+    if not state:
+        return None
+    listing = (state.get("listing") or {}).get("listing") or {}
+    total = listing.get("totalElements")
+    return int(total) if isinstance(total, (int, float)) else None
+
+
+def _parse_iso(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _price(ad: dict) -> Optional[str]:
+    price = ad.get("price") or {}
+    if price.get("displayValue"):
+        return price["displayValue"]
+    regular = price.get("regularPrice") or {}
+    if regular.get("value") is None:
+        return None
+    value = f"{regular['value']:,}".replace(",", " ")
+    return f"{value} {regular.get('currencySymbol') or regular.get('currencyCode', '')}".strip()
+
+
+def _location(ad: dict) -> Optional[str]:
+    location = ad.get("location") or {}
+    parts = [
+        location.get("cityName"),
+        location.get("districtName"),
+        location.get("regionName"),
+    ]
+    text = ", ".join(part for part in parts if part)
+    return text or None
+
+
+def _photos(ad: dict) -> list[str]:
+    photos = []
+    for photo in ad.get("photos") or []:
+        link = photo.get("link") if isinstance(photo, dict) else photo
+        if link:
+            photos.append(link.replace("{width}x{height}", PHOTO_SIZE))
+    return photos
+
+
+def _params(ad: dict) -> list[str]:
+    tags = []
+    for param in ad.get("params") or []:
+        name = param.get("name")
+        value = param.get("value") or param.get("normalizedValue")
+        if isinstance(value, dict):
+            value = value.get("label") or value.get("key")
+        if name and value:
+            tags.append(f"{name}: {value}")
+        elif value:
+            tags.append(str(value))
+    return tags
+
+
+def ad_to_item_fields(ad: dict) -> dict[str, Any]:
+    """
+    Map an ad from the prerendered state onto OlxScraperItem fields.
+
+    Only fields present in the state are returned, so the result can be merged
+    into an item and the DOM extraction fills the rest.
+    """
+    fields: dict[str, Any] = {
+        "ad_id": f"ID: {ad['id']}" if ad.get("id") else None,
+        "title": (ad.get("title") or "").strip() or None,
+        "price": _price(ad),
+        "location": _location(ad),
+        "url": ad.get("url"),
+        "img_src_list": _photos(ad) or None,
+        "ad_tags": _params(ad) or None,
+    }
+    description = ad.get("description")
+    if description:
+        fields["description"] = " ".join(
+            HTML_TAG_RE.sub(" ", description.replace("<br />", "\n")).split()
+        )
+    created = _parse_iso(ad.get("createdTime"))
+    if created:
+        fields["ad_pub_date"] = format_date_uk(created)
+
+    user = ad.get("user") or {}
+    fields["user_name"] = (user.get("name") or "").strip() or None
+    registered = _parse_iso(user.get("created"))
+    if registered:
+        fields["user_registration"] = (
+            f"На OLX з {MONTHS_UK[registered.month]} {registered.year} р."
+        )
+    last_seen = _parse_iso(user.get("lastSeen"))
+    if last_seen:
+        fields["user_last_seen"] = format_date_uk(last_seen)
+        # Exact time for the typed column (the text keeps only the day)
+        fields["user_last_seen_at"] = last_seen
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+if __name__ == "__main__":
+    import sys
+
+    import requests
+
+    url = sys.argv[1] if len(sys.argv) > 1 else "https://www.olx.ua/uk/list/"
+    response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
+    page_state = extract_prerendered_state(response.text)
+    ad_on_page = detail_ad(page_state)
+    for ad_data in [ad_on_page] if ad_on_page else listing_ads(page_state):
+        print(ad_to_item_fields(ad_data))
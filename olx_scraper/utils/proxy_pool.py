@@ -0,0 +1,225 @@
+"""
+Health-scored proxy pool bound to Playwright contexts.
+
+Proxies come from the settings (PROXY_LIST / PROXY_FILE), are all checked in
+parallel, and every BrowserContext gets its own proxy. During the crawl each
+proxy is scored by latency and by its share of blocks (403) and errors;
+low-scored proxies are retired and their contexts rebuilt with another proxy.
+Once every proxy is retired the pool raises ProxyPoolExhausted instead of
+handing out contexts without a proxy.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+PROXY_CHECK_URL = "https://www.olx.ua/robots.txt"
+
+
+class ProxyPoolExhausted(Exception):
+    """Every configured proxy is retired; contexts must not connect directly."""
+
+
+@dataclass(eq=False)
+class Proxy:
+    """One proxy with its health counters."""
+
+    url: str
+    latency_ema: Optional[float] = None
+    requests: int = 0
+    blocks: int = 0
+    failures: int = 0
+    assigned: int = 0
+    retired: bool = False
+
+    @property
+    def label(self) -> str:
+        """host:port, safe to log and to use in stats keys (no credentials)."""
+        parts = urlsplit(self.url)
+        return f"{parts.hostname}:{parts.port}" if parts.port else str(parts.hostname)
+
+    @property
+    def block_rate(self) -> float:
+        return self.blocks / self.requests if self.requests else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    def score(self, target_latency: float = 5.0) -> float:
+        """Health in [0, 1]: 1 is a fast proxy that is never blocked."""
+        latency_factor = (
+            1.0
+            if self.latency_ema is None
+            else target_latency / max(target_latency, self.latency_ema)
+        )
+        return (1 - self.block_rate) * (1 - self.failure_rate) * latency_factor
+
+    def playwright_config(self) -> dict[str, str]:
+        """`proxy=` argument of Browser.new_context()."""
+        parts = urlsplit(self.url)
+        config = {"server": f"{parts.scheme}://{parts.hostname}:{parts.port}"}
+        if parts.username:
+            config["username"] = parts.username
+            config["password"] = parts.password or ""
+        return config
+
+
+def parse_proxy_list(text: str) -> list[str]:
+    """Proxy URLs separated by commas, spaces or new lines; `#` starts a comment."""
+    urls = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for url in line.replace(",", " ").split():
+            urls.append(url if "://" in url else f"http://{url}")
+    return urls
+
+
+class ProxyPool:
+    """
+    Health-scored proxies handed out to browser contexts.
+
+    A proxy is retired when it fails the startup check or when, after
+    `min_samples` requests, its score drops below `min_score`.
+
+    Stats: proxy/checked, healthy, retired, blocks, failures and
+    proxy/score/<host:port>.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        check_url: str = PROXY_CHECK_URL,
+        check_timeout: float = 15.0,
+        target_latency: float = 5.0,
+        min_score: float = 0.5,
+        min_samples: int = 10,
+        stats: Any = None,
+    ):
+        self.proxies = [Proxy(url) for url in dict.fromkeys(urls)]
+        self.check_url = check_url
+        self.check_timeout = check_timeout
+        self.target_latency = target_latency
+        self.min_score = min_score
+        self.min_samples = min_samples
+        self.stats = stats
+
+    @classmethod
+    def from_settings(cls, settings, stats: Any = None) -> "ProxyPool":
+        text = settings.get("PROXY_LIST") or ""
+        proxy_file = settings.get("PROXY_FILE")
+        if proxy_file and Path(proxy_file).exists():
+            text += "\n" + Path(proxy_file).read_text(encoding="utf-8")
+        return cls(
+            parse_proxy_list(text),
+            check_url=settings.get("PROXY_CHECK_URL", PROXY_CHECK_URL),
+            check_timeout=settings.getfloat("PROXY_CHECK_TIMEOUT", 15.0),
+            target_latency=settings.getfloat("THROTTLE_TARGET_LATENCY", 5.0),
+            min_score=settings.getfloat("PROXY_MIN_SCORE", 0.5),
+            min_samples=settings.getint("PROXY_MIN_SAMPLES", 10),
+            stats=stats,
+        )
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    @property
+    def healthy(self) -> list[Proxy]:
+        return [proxy for proxy in self.proxies if not proxy.retired]
+
+    async def check_all(self) -> list[Proxy]:
+        """Check every proxy concurrently; failing ones are retired."""
+        results = await asyncio.gather(*(self.check(proxy) for proxy in self.proxies))
+        self._set("proxy/checked", len(results))
+        self._set("proxy/healthy", sum(results))
+        return self.healthy
+
+    async def check(self, proxy: Proxy) -> bool:
+        started = time.monotonic()
+        try:
+            response = await asyncio.to_thread(
+                requests.get,
+                self.check_url,
+                proxies={"http": proxy.url, "https": proxy.url},
+                timeout=self.check_timeout,
+            )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        if ok:
+            self.record(proxy, latency=time.monotonic() - started)
+        else:
+            self.retire(proxy)
+        return ok
+
+    def acquire(self) -> Proxy:
+        """
+        The healthy proxy with the fewest contexts (best score first).
+
+        :raises ProxyPoolExhausted: if every proxy has been retired.
+        """
+        candidates = self.healthy
+        if not candidates:
+            self._inc("proxy/exhausted")
+            raise ProxyPoolExhausted(f"all {len(self.proxies)} proxies are retired")
+        proxy = min(
+            candidates,
+            key=lambda p: (p.assigned, -p.score(self.target_latency)),
+        )
+        proxy.assigned += 1
+        return proxy
+
+    def release(self, proxy: Optional[Proxy]) -> None:
+        if proxy is not None:
+            proxy.assigned = max(0, proxy.assigned - 1)
+
+    def record(
+        self,
+        proxy: Optional[Proxy],
+        latency: Optional[float] = None,
+        blocked: bool = False,
+        failed: bool = False,
+    ) -> bool:
+        """
+        Update proxy health after a request.
+
+        :return: True if the proxy should be retired.
+        """
+        if proxy is None:
+            return False
+        proxy.requests += 1
+        if latency is not None:
+            proxy.latency_ema = (
+                latency
+                if proxy.latency_ema is None
+                else 0.8 * proxy.latency_ema + 0.2 * latency
+            )
+        if blocked:
+            proxy.blocks += 1
+            self._inc("proxy/blocks")
+        if failed:
+            proxy.failures += 1
+            self._inc("proxy/failures")
+        score = proxy.score(self.target_latency)
+        self._set(f"proxy/score/{proxy.label}", round(score, 3))
+        if proxy.requests >= self.min_samples and score < self.min_score:
+            self.retire(proxy)
+        return proxy.retired
+
+    def retire(self, proxy: Proxy) -> None:
+        if not proxy.retired:
+            proxy.retired = True
+            self._inc("proxy/retired")
+
+    def _inc(self, key: str, value: float = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, value)
+
+    def _set(self, key: str, value: Any) -> None:
+        if self.stats is not None:
+            self.stats.set_value(key, value)
@@ -0,0 +1,256 @@
+"""
+Planner that splits a large OLX search into shards under the pagination cap.
+
+OLX shows at most ~25 pages of a search, so a query like all of
+``transport/legkovye-avtomobili`` cannot be covered by END_PAGE. The planner
+reads the result count of a query (page 1 is fetched anyway) and, while it is
+above the cap, splits the query recursively:
+
+1. by subcategory: children from the category catalog (skipping empty ones),
+   or the static tables (transport type / car brand, real estate type);
+2. by location, when SHARDING_LOCATIONS is configured;
+3. by price range (``search[filter_float_price:from/to]``), halving the range.
+
+Counts are cached on disk with a TTL, so repeated runs go straight to the
+final shards.
+"""
+
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional
+
+from .category_catalog import CategoryCatalog
+from .url_builders.real_estate_builder import RealEstateUrlBuilder
+from .url_builders.transport_builder import TransportUrlBuilder
+from .url_factory import UrlBuilderFactory
+
+PRICE_FROM = "search[filter_float_price:from]"
+PRICE_TO = "search[filter_float_price:to]"
+ORDER_FILTER = "search[order]"
+NEWEST_FIRST = "created_at:desc"
+# Filters that do not change the number of results
+COUNT_NEUTRAL_FILTERS = {"currency", ORDER_FILTER}
+# "Ми знайшли 1 234 оголошення" when the prerendered state is not available
+TOTAL_COUNT_RE = re.compile(r'data-testid="total-count"[^>]*>[^<\d]*([\d\s ]+)', re.S)
+
+
+@dataclass(frozen=True)
+class QueryShard:
+    """One search query: the arguments of UrlBuilderFactory.get_builder."""
+
+    category: str = "list"
+    location: Optional[str] = None
+    subcategory_1: Optional[str] = None
+    subcategory_2: Optional[str] = None
+    filters: dict = field(default_factory=dict, hash=False)
+    # How the shard was produced, e.g. "price 0-5000" (for logs)
+    label: str = "root"
+
+    def build_url(self, page: int = 1) -> str:
+        builder = UrlBuilderFactory.get_builder(
+            category=self.category,
+            location=self.location,
+            subcategory_1=self.subcategory_1,
+            subcategory_2=self.subcategory_2,
+            # Builders pop "q" from the dict, give them a copy
+            filters_dict=dict(self.filters),
+        )
+        return builder.build_url(page=page)
+
+    @property
+    def category_path(self) -> str:
+        """Catalog path, e.g. "transport/legkovye-avtomobili/bmw"."""
+        parts = (self.category, self.subcategory_1, self.subcategory_2)
+        return "/".join(part for part in parts if part)
+
+    @property
+    def key(self) -> str:
+        """Cache key: URL of the first page."""
+        return self.build_url(page=1)
+
+    def with_changes(self, label: str, **changes) -> "QueryShard":
+        return replace(self, label=f"{self.label} > {label}", **changes)
+
+
+def parse_result_count(html: str, state_total: Optional[int]) -> Optional[int]:
+    """Result count from the prerendered state, or from the page header."""
+    if state_total is not None:
+        return state_total
+    match = TOTAL_COUNT_RE.search(html)
+    if not match:
+        return None
+    digits = re.sub(r"\D", "", match.group(1))
+    return int(digits) if digits else None
+
+
+class QueryPlanner:
+    """
+    Decides whether a shard fits under the cap and how to split it.
+
+    :param max_pages: Pages OLX serves for one query.
+    :param page_size: Ads per list page.
+    :param max_price: Upper price bound for the first split by price.
+    :param locations: Locations for the split by city/region (optional).
+    :param catalog: Category catalog with ad counts (optional).
+    """
+
+    def __init__(
+        self,
+        max_pages: int = 25,
+        page_size: int = 40,
+        max_price: float = 10_000_000,
+        locations: Optional[list[str]] = None,
+        catalog: Optional[CategoryCatalog] = None,
+    ):
+        self.max_pages = max_pages
+        self.page_size = page_size
+        self.max_price = max_price
+        self.locations = locations or []
+        self.catalog = catalog
+
+    @classmethod
+    def from_settings(
+        cls, settings, catalog: Optional[CategoryCatalog] = None
+    ) -> "QueryPlanner":
+        return cls(
+            max_pages=settings.getint("SHARDING_MAX_PAGES", 25),
+            page_size=settings.getint("SHARDING_PAGE_SIZE", 40),
+            max_price=settings.getfloat("SHARDING_MAX_PRICE", 10_000_000),
+            locations=settings.getlist("SHARDING_LOCATIONS"),
+            catalog=catalog,
+        )
+
+    @property
+    def cap(self) -> int:
+        """Largest result count one shard can cover."""
+        return self.max_pages * self.page_size
+
+    def fits(self, count: int) -> bool:
+        return count <= self.cap
+
+    def pages(self, count: int) -> int:
+        return max(1, min(self.max_pages, math.ceil(count / self.page_size)))
+
+    def split(self, shard: QueryShard) -> list[QueryShard]:
+        """Child shards covering `shard`, or [] if it cannot be split further."""
+        return (
+            self.split_by_subcategory(shard)
+            or self.split_by_location(shard)
+            or self.split_by_price(shard)
+        )
+
+    def catalog_count(self, shard: QueryShard) -> Optional[int]:
+        """Ad count of an unfiltered category shard from the catalog."""
+        if (
+            not self.catalog
+            or shard.location
+            or set(shard.filters) - COUNT_NEUTRAL_FILTERS
+        ):
+            return None
+        return self.catalog.count(shard.category_path)
+
+    def split_by_subcategory(self, shard: QueryShard) -> list[QueryShard]:
+        if shard.subcategory_2 or (shard.category == "list"):
+            return []
+        children = self.catalog.children(shard.category_path) if self.catalog else {}
+        if children:
+            field_name = "subcategory_2" if shard.subcategory_1 else "subcategory_1"
+            return [
+                shard.with_changes(slug, **{field_name: slug})
+                for slug, node in children.items()
+                if node.get("count") != 0
+            ]
+        if shard.category == "transport":
+            if not shard.subcategory_1:
+                return [
+                    shard.with_changes(slug, subcategory_1=slug)
+                    for slug in TransportUrlBuilder.TRANSPORT_TYPES
+                ]
+            if shard.subcategory_1 == "legkovye-avtomobili" and not shard.subcategory_2:
+                return [
+                    shard.with_changes(slug, subcategory_2=slug)
+                    for slug in TransportUrlBuilder.SUB_CATEGORY_TRANSPORT
+                ]
+        if shard.category == "nedvizhimost" and not shard.subcategory_1:
+            return [
+                shard.with_changes(slug, subcategory_1=slug)
+                for slug in RealEstateUrlBuilder.PROPERTY_TYPES
+            ]
+        return []
+
+    def split_by_location(self, shard: QueryShard) -> list[QueryShard]:
+        if shard.location or not self.locations:
+            return []
+        return [
+            shard.with_changes(location, location=location)
+            for location in self.locations
+        ]
+
+    def split_by_price(self, shard: QueryShard) -> list[QueryShard]:
+        low = float(shard.filters.get(PRICE_FROM, 0))
+        high = float(shard.filters.get(PRICE_TO, self.max_price))
+        if high - low < 2:
+            return []
+        # Prices are skewed: split at the geometric middle of the range (from 1)
+        middle = int(math.sqrt(max(low, 1) * high))
+        middle = min(max(middle, int(low) + 1), int(high) - 1)
+        children = []
+        for start, end in ((int(low), middle), (middle + 1, int(high))):
+            filters = {**shard.filters, PRICE_FROM: start, PRICE_TO: end}
+            if start == 0:
+                filters.pop(PRICE_FROM)
+            children.append(shard.with_changes(f"price {start}-{end}", filters=filters))
+        # Ads priced above max_price are kept by an open-ended last shard
+        if PRICE_TO not in shard.filters:
+            children.append(
+                shard.with_changes(
+                    f"price {int(high) + 1}+",
+                    filters={**shard.filters, PRICE_FROM: int(high) + 1},
+                )
+            )
+        return children
+
+
+class ShardCountCache:
+    """Result counts of shards stored in a JSON file with a TTL."""
+
+    def __init__(self, path: Path, ttl: float = 6 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._counts: dict[str, list[float]] = {}
+        try:
+            self._counts = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    def get(self, shard: QueryShard) -> Optional[int]:
+        entry = self._counts.get(shard.key)
+        if entry and time.time() - entry[1] < self.ttl:
+            return int(entry[0])
+        return None
+
+    def set(self, shard: QueryShard, count: int) -> None:
+        self._counts[shard.key] = [count, time.time()]
+
+    def save(self) -> None:
+        now = time.time()
+        fresh = {
+            key: entry
+            for key, entry in self._counts.items()
+            if now - entry[1] < self.ttl
+        }
+        self.path.write_text(json.dumps(fresh), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    planner = QueryPlanner()
+    root = QueryShard("transport", subcategory_1="legkovye-avtomobili")
+    print(root.key, planner.cap)
+    for child in planner.split(root)[:3]:
+        print(child.label, child.key)
+        for grandchild in planner.split(child):
+            print("   ", grandchild.label, grandchild.key)
@@ -8,6 +8,8 @@ class BaseUrlBuilder(ABC):
     """
 
     BASE_URL = "https://www.olx.ua/uk/"
+    # CategoryCatalog shared by all builders (see UrlBuilderFactory.use_catalog)
+    catalog = None
 
     def __init__(self, category: str, filters_dict=None):
         """
@@ -25,6 +27,15 @@ class BaseUrlBuilder(ABC):
         """
         pass
 
+    def resolve_slug(self, parent_path, key, table):
+        """
+        Slug of a subcategory: from the category catalog if it knows `key`,
+        otherwise from the builder's static table (aliases, offline fallback).
+        """
+        if self.catalog is not None:
+            return self.catalog.resolve(parent_path, key, table)
+        return table.get(key)
+
     def format_keyword(self):
         """Formats the keyword `q-{keyword}/` (spaces are replaced by hyphens)"""
         if self.keyword:
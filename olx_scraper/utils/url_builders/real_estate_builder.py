@@ -52,11 +52,11 @@ class RealEstateUrlBuilder(BaseUrlBuilder):
         :param location: Локація (наприклад, 'ivano-frankovsk').
         """
         super().__init__("nedvizhimost", filters_dict)
-        self.property_type = self.PROPERTY_TYPES.get(
-            subcategory_1
+        self.property_type = self.resolve_slug(
+            "nedvizhimost", subcategory_1, self.PROPERTY_TYPES
         )  # Може бути `None`, якщо не вказано
-        self.deal_type = self.DEAL_TYPES.get(
-            subcategory_2
+        self.deal_type = self.resolve_slug(
+            f"nedvizhimost/{self.property_type}", subcategory_2, self.DEAL_TYPES
         )  # Може бути `None`, якщо не вказано
         self.location = location
 
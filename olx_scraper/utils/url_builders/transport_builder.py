@@ -125,10 +125,19 @@ class TransportUrlBuilder(BaseUrlBuilder):
         self, subcategory_1=None, subcategory_2=None, location=None, filters_dict=None
     ):
         super().__init__("transport", filters_dict)
-        self.transport_type = self.TRANSPORT_TYPES.get(subcategory_1)
+        self.transport_type = self.resolve_slug(
+            "transport", subcategory_1, self.TRANSPORT_TYPES
+        )
         self.transport_sub_category = (
-            self.SUB_CATEGORY_TRANSPORT.get(subcategory_2)
-            if subcategory_1 == "legkovye-avtomobili"
+            self.resolve_slug(
+                f"transport/{self.transport_type}",
+                subcategory_2,
+                # Only cars have a static table of brands
+                self.SUB_CATEGORY_TRANSPORT
+                if subcategory_1 == "legkovye-avtomobili"
+                else {},
+            )
+            if self.transport_type
             else None
         )
         self.location = location
@@ -1,4 +1,5 @@
 from typing import Optional
+from .url_builders.base_builder import BaseUrlBuilder
 from .url_builders.general_list_builder import GeneralListUrlBuilder
 from .url_builders.real_estate_builder import RealEstateUrlBuilder
 from .url_builders.transport_builder import TransportUrlBuilder
@@ -15,6 +16,11 @@ class UrlBuilderFactory:
         "transport": TransportUrlBuilder,
     }
 
+    @staticmethod
+    def use_catalog(catalog):
+        """Resolve subcategory slugs of all builders through a CategoryCatalog"""
+        BaseUrlBuilder.catalog = catalog if catalog else None
+
     @staticmethod
     def get_builder(
         category,
@@ -5,5 +5,8 @@ export PATH="/usr/local/bin:/usr/bin:/bin:$PATH"
 # Wait for PostgreSQL to be ready
 /app/wait-for-postgres.sh db
 
+# Refresh the category catalog when it is stale (no-op otherwise)
+cd /app && /usr/local/bin/scrapy crawl olx_catalog >> /app/logs/scrapy.log 2>&1
+
 # Run the Scrapy spider from right path
 cd /app && /usr/local/bin/scrapy crawl olx >> /app/logs/scrapy.log 2>&1
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+The ads upsert keeps stored values when a changed ad is re-fetched partially.
+
+PostgreSQL is not needed: INSERT_ADS_SQL only uses ON CONFLICT, EXCLUDED,
+COALESCE/NULLIF and IS DISTINCT FROM, which SQLite understands as well.
+"""
+
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from itemadapter import ItemAdapter
+
+from olx_scraper.items import OlxScraperItem
+from olx_scraper.pipelines import ADS_COLUMNS, INSERT_ADS_SQL, NormalizationPipeline
+from olx_scraper.pipelines import PostgresPipeline
+from olx_scraper.utils.placeholders import NO_PHONE, NO_PHOTOS, NO_SCORE, NO_TAGS
+from olx_scraper.utils.placeholders import NO_VIEWS
+
+URL = "https://www.olx.ua/d/uk/obyavlenie/flat-IDabc12.html"
+
+
+def sqlite_value(value):
+    """Bind a row value as psycopg2 would send it (arrays as array literals)."""
+    if isinstance(value, list):
+        return "{" + ",".join(f'"{item}"' for item in value) + "}"
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def upsert(conn, **fields) -> dict:
+    item = OlxScraperItem(ad_id="ID: abc12", url=URL, **fields)
+    NormalizationPipeline().process_item(item, spider=None)
+    row = PostgresPipeline.item_to_row(ItemAdapter(item))[: len(ADS_COLUMNS)]
+    placeholders = "(" + ", ".join("?" for _ in ADS_COLUMNS) + ")"
+    conn.execute(
+        INSERT_ADS_SQL.replace("%s", placeholders),
+        [sqlite_value(value) for value in row],
+    )
+    cursor = conn.execute("SELECT * FROM ads")
+    names = [column[0] for column in cursor.description]
+    return dict(zip(names, cursor.fetchone()))
+
+
+def test_partial_refetch_keeps_stored_values():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        f"CREATE TABLE ads (ad_id TEXT PRIMARY KEY, {', '.join(ADS_COLUMNS[1:])})"
+    )
+    full = upsert(
+        conn,
+        title="Квартира",
+        price="12 500 грн.",
+        phone_number="+380 67 000 00 00",
+        user_score="4.8",
+        ad_view_counter="Переглядів: 120",
+        ad_tags=["Поверх: 3"],
+        img_src_list=["https://img/1.jpg"],
+    )
+    assert full["view_count"] == 120
+
+    # The card changed (new price), the re-fetch lost the phone, views, ...
+    partial = upsert(
+        conn,
+        title="Квартира",
+        price="11 000 грн.",
+        phone_number=NO_PHONE,
+        user_score=NO_SCORE,
+        ad_view_counter=NO_VIEWS,
+        ad_tags=NO_TAGS,
+        img_src_list=NO_PHOTOS,
+    )
+
+    assert partial["price"] == "11 000 грн."
+    assert partial["price_amount"] == "11000"
+    for column in (
+        "phone_number",
+        "user_score",
+        "ad_view_counter",
+        "view_count",
+        "ad_tags",
+        "img_src_list",
+    ):
+        assert partial[column] == full[column], column
+
+
+def test_placeholders_are_hashed_as_missing():
+    adapter = ItemAdapter(OlxScraperItem(title="Квартира", phone_number=NO_PHONE))
+    without_phone = ItemAdapter(OlxScraperItem(title="Квартира"))
+
+    row = PostgresPipeline.item_to_row(adapter)
+    assert (
+        row[ADS_COLUMNS.index("content_hash")]
+        == PostgresPipeline.item_to_row(without_phone)[
+            ADS_COLUMNS.index("content_hash")
+        ]
+    )
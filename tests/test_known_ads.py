@@ -0,0 +1,33 @@
+import random
+
+from olx_scraper.utils.known_ads import MERGE_THRESHOLD, KnownAdIndex
+
+
+def ad_url(ad_id: str) -> str:
+    return f"https://www.olx.ua/d/uk/obyavlenie/ad-ID{ad_id}.html"
+
+
+def test_merge_keeps_array_sorted_and_unique():
+    stored = [f"{n:x}" for n in random.sample(range(16**6), 10_000)]
+    index = KnownAdIndex.from_urls(ad_url(ad_id) for ad_id in stored)
+    # Some of the added keys are already stored, they must not be duplicated
+    added = stored[: MERGE_THRESHOLD // 2] + [f"zz{n}" for n in range(MERGE_THRESHOLD)]
+    for ad_id in added:
+        index.add(ad_url(ad_id))
+
+    packed = list(index._sorted)
+    assert not index._recent
+    assert packed == sorted(set(packed))
+    assert len(index) == len(stored) + MERGE_THRESHOLD
+    assert all(ad_url(ad_id) in index for ad_id in stored + added)
+    assert ad_url("missing1") not in index
+
+
+def test_readding_known_url_keeps_len():
+    index = KnownAdIndex.from_urls([ad_url("abc1"), ad_url("abc2")])
+    index.add(ad_url("abc3"))
+    for ad_id in ("abc1", "abc2", "abc3"):
+        assert index.add(ad_url(ad_id))
+
+    assert len(index) == 3
+    assert len(index._recent) == 1
@@ -0,0 +1,157 @@
+"""
+ProxyPool against local stand-ins: no network, no real proxies.
+
+A minimal forward proxy (StandInProxy) relays requests to a local origin
+server; a blocking instance answers 403 like a banned exit node and a closed
+port plays a dead proxy.
+"""
+
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from olx_scraper.utils.proxy_pool import ProxyPool, ProxyPoolExhausted
+
+
+class StandInProxy:
+    """
+    Minimal local forward HTTP proxy (absolute-URI requests and CONNECT).
+
+    Counts proxied requests in `handled`; `block=True` answers every request
+    with 403.
+    """
+
+    def __init__(self, block: bool = False):
+        self.block = block
+        self.handled = 0
+        self.server = None
+        self.url = ""
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            method, target = head.split(b" ", 2)[:2]
+            self.handled += 1
+            if self.block:
+                writer.write(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+                return
+            if method == b"CONNECT":
+                host, port = target.decode().rsplit(":", 1)
+                up_reader, up_writer = await asyncio.open_connection(host, int(port))
+                writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            else:
+                host_port = target.split(b"/")[2].decode()
+                host, _, port = host_port.partition(":")
+                up_reader, up_writer = await asyncio.open_connection(
+                    host, int(port or 80)
+                )
+                path = (
+                    b"/" + target.split(b"/", 3)[3] if target.count(b"/") > 2 else b"/"
+                )
+                up_writer.write(head.replace(target, path, 1))
+            await asyncio.gather(
+                self._pipe(reader, up_writer), self._pipe(up_reader, writer)
+            )
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _pipe(reader, writer) -> None:
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"User-agent: *\n"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def origin_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/robots.txt"
+    server.shutdown()
+
+
+async def check_pool(origin_url: str):
+    good, banned = StandInProxy(), StandInProxy(block=True)
+    await good.start()
+    await banned.start()
+    dead_url = f"http://127.0.0.1:{closed_port()}"
+    try:
+        pool = ProxyPool(
+            [good.url, banned.url, dead_url],
+            check_url=origin_url,
+            check_timeout=5,
+            min_samples=3,
+        )
+        healthy = await pool.check_all()
+        return pool, good, banned, healthy
+    finally:
+        await good.stop()
+        await banned.stop()
+
+
+def test_check_all_keeps_only_working_proxies(origin_url):
+    pool, good, banned, healthy = asyncio.run(check_pool(origin_url))
+
+    assert [proxy.url for proxy in healthy] == [good.url]
+    assert good.handled == 1
+    assert banned.handled == 1
+    assert len(pool.healthy) == 1
+
+
+def test_blocks_retire_proxy_and_exhaust_pool(origin_url):
+    pool, good, _, _ = asyncio.run(check_pool(origin_url))
+    proxy = pool.acquire()
+    assert proxy.url == good.url
+
+    retired = [pool.record(proxy, latency=0.1, blocked=True) for _ in range(3)]
+
+    # The startup check is the first of min_samples=3 requests
+    assert retired == [False, True, True]
+    with pytest.raises(ProxyPoolExhausted):
+        pool.acquire()
+
+
+def test_acquire_spreads_contexts_over_proxies():
+    pool = ProxyPool(["http://a:1", "http://b:2"])
+
+    first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+
+    assert {first.url, second.url} == {"http://a:1", "http://b:2"}
+    assert sorted(proxy.assigned for proxy in pool.proxies) == [1, 2]
+    pool.release(third)
+    assert [proxy.assigned for proxy in pool.proxies] == [1, 1]